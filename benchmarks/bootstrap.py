@@ -0,0 +1,20 @@
+"""Make the packages of this repository importable as packages.brainbot outside an agent."""
+
+import os
+import sys
+import types
+
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def register_packages() -> None:
+    """Register the repository root as the packages.brainbot namespace, like the agent loader does."""
+    if "packages.brainbot" in sys.modules:
+        return
+    packages = sys.modules.setdefault("packages", types.ModuleType("packages"))
+    if not hasattr(packages, "__path__"):
+        packages.__path__ = []  # type: ignore
+    brainbot = types.ModuleType("packages.brainbot")
+    brainbot.__path__ = [REPO_ROOT]  # type: ignore
+    sys.modules["packages.brainbot"] = brainbot
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+Load test the channel manager's ChannelHandler against a Raiden REST API.
+
+Builds the handler with its models in process, feeds it RaidenMessage
+envelopes at a target rate, as the agent loop would, and reports the
+throughput and the latency from each envelope's arrival to the decoded reply.
+Requests and replies go through the envelope and RaidenSerializer encoding
+of the wire, so the protocol's hot path is part of the latency. By default
+the load goes to an in-process mock node, so the test runs without network
+access:
+
+    python benchmarks/load_generator.py --rate 200 --duration 30 --latency-ms 50
+    python benchmarks/load_generator.py --nodes 3 --rate 300 --latency-ms 50
+    python benchmarks/load_generator.py --no-mock --port 5001 --rate 20
+"""
+
+import argparse
+import importlib
+import json
+import logging
+import sys
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional
+
+from aea.configurations.base import SkillConfig
+from aea.mail.base import Envelope
+from aea.protocols.base import Message
+from aea.skills.base import Skill, SkillContext
+
+from bootstrap import register_packages
+from mock_raiden_node import (
+    DEFAULT_BALANCE,
+    DEFAULT_HOST,
+    DEFAULT_PORT,
+    TOKEN_ADDRESS,
+    MockRaidenNode,
+    MockRaidenServer,
+    partner_address,
+)
+
+
+AGENT_ADDRESS = "channel_manager"
+DEFAULT_RATE = 100.0  # messages per second
+DEFAULT_DURATION = 10.0  # time in seconds
+DEFAULT_PARTNERS = 100
+DEFAULT_SENDERS = 10
+DEFAULT_DRAIN_TIMEOUT = 30.0  # time in seconds
+READY_TIMEOUT = 30.0  # time in seconds
+MOCK_PORT_ATTEMPTS = 10
+
+
+def to_wire(message: Message) -> bytes:
+    """Encode a message into the envelope bytes a connection carries."""
+    return Envelope(to=message.to, sender=message.sender, message=message).encode()
+
+
+def from_wire(data: bytes, serializer: Any) -> Message:
+    """Decode envelope bytes and their message, as the agent does with what a connection received."""
+    envelope = Envelope.decode(data)
+    message = serializer.decode(envelope.message)
+    message.sender = envelope.sender
+    message.to = envelope.to
+    return message
+
+
+class ReplyCollector:
+    """Stands in for the agent outbox, takes every reply over the wire and timestamps it."""
+
+    def __init__(self, decode: Callable[[bytes], Message]) -> None:
+        """
+        Initialize the collector.
+
+        :param decode: decodes the envelope bytes of a reply, as the peer does
+        """
+        self._decode = decode
+        self._lock = threading.Lock()
+        self.replied_at = {}  # type: Dict[str, float]
+        self.outcomes = {}  # type: Dict[str, int]
+        self.all_replied = threading.Event()
+        self.expected = None  # type: Optional[int]
+
+    def put_message(self, message: Any, *args: Any, **kwargs: Any) -> None:
+        """Record a reply of the handler once it is decoded from its envelope."""
+        reply = self._decode(to_wire(message))
+        now = time.perf_counter()
+        with self._lock:
+            self.replied_at[reply.dialogue_reference[0]] = now
+            outcome = reply.performative.value
+            self.outcomes[outcome] = self.outcomes.get(outcome, 0) + 1
+            if self.expected is not None and len(self.replied_at) >= self.expected:
+                self.all_replied.set()
+
+
+class LoadAgentContext:
+    """The parts of the agent context the channel manager uses."""
+
+    def __init__(self, outbox: ReplyCollector) -> None:
+        """Initialize the context."""
+        self.address = AGENT_ADDRESS
+        self.agent_name = AGENT_ADDRESS
+        self.outbox = outbox
+        self.storage = None
+        self.shared_state = {}  # type: Dict[str, Any]
+
+
+class ReadyMonitor:
+    """Stands in for ChannelMonitorBehaviour, the node is managed outside the test."""
+
+    node_status = None
+    restarts = 0
+    is_node_ready = True
+    nodes = []  # type: List[Any]
+
+    @staticmethod
+    def is_ready(index: int) -> bool:
+        """Every node is ready."""
+        return True
+
+
+def build_skill(args: argparse.Namespace, outbox: ReplyCollector) -> Skill:
+    """Build the channel handler and the models it depends on."""
+    register_packages()
+    handlers = importlib.import_module("packages.brainbot.skills.channel_manager.handlers")
+    channel_state = importlib.import_module(
+        "packages.brainbot.skills.channel_manager.channel_state"
+    )
+    dialogues = importlib.import_module("packages.brainbot.skills.channel_manager.dialogues")
+    metrics = importlib.import_module("packages.brainbot.skills.channel_manager.metrics")
+    raiden_client = importlib.import_module(
+        "packages.brainbot.skills.channel_manager.raiden_client"
+    )
+
+    context = SkillContext()
+    context.set_agent_context(LoadAgentContext(outbox))  # type: ignore
+    logger = logging.getLogger("load_generator.channel_manager")
+    logger.setLevel(logging.WARNING)
+    context.logger = logger
+    models = {
+        "channel_state": channel_state.ChannelStateStore(
+            name="channel_state", skill_context=context
+        ),
+        "metrics": metrics.SkillMetrics(name="metrics", skill_context=context, enabled=False),
+        "raiden_client": raiden_client.RaidenClient(
+            name="raiden_client",
+            skill_context=context,
+            host=args.host,
+            port=args.port,
+            pool_size=args.pool_size,
+            node_count=args.nodes,
+        ),
+        "raiden_dialogues": dialogues.RaidenDialogues(
+            name="raiden_dialogues", skill_context=context
+        ),
+    }
+    handler = handlers.ChannelHandler(
+        name="channel_handler",
+        skill_context=context,
+        execution_mode=args.execution_mode,
+        max_workers=args.max_workers,
+        max_active_lanes=args.max_active_lanes,
+        journal_file=args.journal_file,
+        journal_sync_delay=args.journal_sync_delay,
+        rate_limit=args.rate_limit,
+        max_in_flight=args.max_in_flight,
+        routing_policy=args.routing_policy,
+    )
+    configuration = SkillConfig(name="channel_manager", author="brainbot", version="0.1.0")
+    skill = Skill(
+        configuration,
+        context,
+        handlers={"channel_handler": handler},
+        behaviours={"channel_monitor": ReadyMonitor()},  # type: ignore
+        models=models,
+    )
+    return skill
+
+
+def wait_until_ready(raiden_client: Any, timeout: float = READY_TIMEOUT) -> None:
+    """Wait for the node's API to report ready."""
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            if raiden_client.get_node_status(timeout=1.0).get("status") == "ready":
+                return
+        except Exception:  # pylint: disable=broad-except
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Raiden API at {raiden_client.api} is not ready")
+        time.sleep(0.2)
+
+
+def percentile(values: List[float], share: float) -> float:
+    """Get the nearest-rank percentile of sorted values."""
+    if not values:
+        return 0.0
+    index = min(len(values) - 1, max(0, int(round(share * len(values) + 0.5)) - 1))
+    return values[index]
+
+
+def run(args: argparse.Namespace) -> Dict[str, Any]:
+    """Run the load test, return the report."""
+    register_packages()
+    message_module = importlib.import_module("packages.brainbot.protocols.raiden.message")
+    serialization_module = importlib.import_module(
+        "packages.brainbot.protocols.raiden.serialization"
+    )
+    raiden_message = message_module.RaidenMessage
+    serializer = serialization_module.RaidenSerializer
+
+    outbox = ReplyCollector(lambda data: from_wire(data, serializer))
+    skill = build_skill(args, outbox)
+    context = skill.skill_context
+    handler = skill.handlers["channel_handler"]
+    for raiden_client in context.raiden_client.nodes:
+        wait_until_ready(raiden_client)
+    handler.setup()
+
+    total = max(1, int(args.rate * args.duration))
+    outbox.expected = total
+    partners = [raiden_message.Address(partner_address(index)) for index in range(args.partners)]
+    token_address = raiden_message.Address(TOKEN_ADDRESS)
+    sent_at = {}  # type: Dict[str, float]
+    start = time.perf_counter()
+    for index in range(total):
+        delay = start + index / args.rate - time.perf_counter()
+        if delay > 0:
+            time.sleep(delay)
+        reference = str(index)
+        if args.performative == "batch_transfer":
+            batch = [partners[(index * args.batch_size + i) % len(partners)] for i in range(args.batch_size)]
+            contents = dict(
+                partner_addresses=tuple(batch),
+                token_addresses=(token_address,) * len(batch),
+                amounts=(args.amount,) * len(batch),
+            )
+        else:
+            contents = dict(
+                partner_address=partners[index % len(partners)],
+                token_address=token_address,
+                amount=args.amount,
+            )
+        message = raiden_message(
+            performative=raiden_message.Performative(args.performative),
+            dialogue_reference=(reference, ""),
+            **contents,
+        )
+        message.sender = f"agent_{index % args.senders}"
+        message.to = AGENT_ADDRESS
+        # the peer encodes the envelope, the agent decodes it on arrival
+        data = to_wire(message)
+        sent_at[reference] = time.perf_counter()
+        handler.handle(from_wire(data, serializer))
+    sending_time = time.perf_counter() - start
+
+    outbox.all_replied.wait(args.drain_timeout)
+    handler.teardown()
+    context.raiden_client.teardown()
+
+    latencies = sorted(
+        outbox.replied_at[reference] - sent
+        for reference, sent in sent_at.items()
+        if reference in outbox.replied_at
+    )
+    replies = len(latencies)
+    last_reply = max(outbox.replied_at.values()) if replies else start
+    elapsed = max(last_reply - start, 1e-9)
+    return {
+        "performative": args.performative,
+        "sent": total,
+        "replies": replies,
+        "outcomes": dict(outbox.outcomes),
+        "offered_rate": total / max(sending_time, 1e-9),
+        "throughput": replies / elapsed,
+        "latency_ms": {
+            "p50": percentile(latencies, 0.50) * 1000,
+            "p90": percentile(latencies, 0.90) * 1000,
+            "p99": percentile(latencies, 0.99) * 1000,
+            "max": (latencies[-1] if latencies else 0.0) * 1000,
+        },
+        "config": {
+            "execution_mode": args.execution_mode,
+            "max_workers": args.max_workers,
+            "max_active_lanes": args.max_active_lanes,
+            "pool_size": args.pool_size,
+            "journal_file": args.journal_file,
+            "rate_limit": args.rate_limit,
+            "max_in_flight": args.max_in_flight,
+            "nodes": args.nodes,
+            "routing_policy": args.routing_policy,
+            "partners": args.partners,
+            "mock": args.mock,
+            "latency_ms": args.latency_ms,
+            "error_rate": args.error_rate,
+        },
+    }
+
+
+def start_mock_servers(args: argparse.Namespace) -> List[MockRaidenServer]:
+    """Start a mock node per node of the test, on consecutive ports."""
+    for _ in range(MOCK_PORT_ATTEMPTS):
+        servers = []  # type: List[MockRaidenServer]
+        try:
+            for index in range(args.nodes):
+                node = MockRaidenNode.with_partners(
+                    args.partners,
+                    DEFAULT_BALANCE,
+                    latency=args.latency_ms / 1000,
+                    jitter=args.jitter_ms / 1000,
+                    error_rate=args.error_rate,
+                )
+                # the first on an ephemeral port, so a running node on 5001 does not get in the way
+                port = servers[0].address[1] + index if servers else 0
+                servers.append(MockRaidenServer(node, args.host, port).start())
+            return servers
+        except OSError:
+            for server in servers:
+                server.stop()
+    raise RuntimeError(f"No {args.nodes} consecutive free ports for the mock nodes")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the load generator."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="messages per second")
+    parser.add_argument("--duration", type=float, default=DEFAULT_DURATION, help="seconds of load")
+    parser.add_argument(
+        "--performative", choices=("transfer", "batch_transfer"), default="transfer"
+    )
+    parser.add_argument("--batch-size", type=int, default=10)
+    parser.add_argument("--amount", type=int, default=1)
+    parser.add_argument("--partners", type=int, default=DEFAULT_PARTNERS)
+    parser.add_argument("--senders", type=int, default=DEFAULT_SENDERS)
+    parser.add_argument("--execution-mode", choices=("pool", "sync"), default="pool")
+    parser.add_argument("--max-workers", type=int, default=4)
+    parser.add_argument("--max-active-lanes", type=int, default=4)
+    parser.add_argument("--pool-size", type=int, default=8)
+    parser.add_argument("--journal-file", help="journal the requests to this file")
+    parser.add_argument("--journal-sync-delay", type=float, default=0.0)
+    parser.add_argument(
+        "--rate-limit", type=float, default=100.0, help="requests per second and sender, 0 for none"
+    )
+    parser.add_argument(
+        "--max-in-flight", type=int, default=1000, help="requests in flight, 0 for no cap"
+    )
+    parser.add_argument("--nodes", type=int, default=1, help="nodes, on consecutive ports")
+    parser.add_argument("--routing-policy", choices=("hash", "least_loaded"), default="hash")
+    parser.add_argument("--drain-timeout", type=float, default=DEFAULT_DRAIN_TIMEOUT)
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--no-mock", dest="mock", action="store_false", help="use the node at --host:--port"
+    )
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="mock node latency")
+    parser.add_argument("--jitter-ms", type=float, default=0.0, help="mock node jitter")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="mock node error rate")
+    parser.add_argument("--output", help="write the report as JSON to this file")
+    args = parser.parse_args(argv)
+
+    servers = []  # type: List[MockRaidenServer]
+    if args.mock:
+        servers = start_mock_servers(args)
+        args.port = servers[0].address[1]
+    try:
+        report = run(args)
+    finally:
+        for server in servers:
+            server.stop()
+
+    latency = report["latency_ms"]
+    print(
+        f"{report['performative']}: sent {report['sent']} at {report['offered_rate']:.1f}/s, "
+        f"{report['replies']} replies {report['outcomes']}\n"
+        f"throughput {report['throughput']:.1f}/s, latency p50 {latency['p50']:.1f} ms, "
+        f"p90 {latency['p90']:.1f} ms, p99 {latency['p99']:.1f} ms, max {latency['max']:.1f} ms"
+    )
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    return 0 if report["replies"] == report["sent"] else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,355 @@
+#!/usr/bin/env python3
+"""
+A local stand-in for the Raiden REST API, for load tests without a node or an Ethereum RPC.
+
+Serves the v1 endpoints the channel manager uses with in-memory channel
+state, a configurable response latency and a configurable rate of injected
+errors:
+
+    python benchmarks/mock_raiden_node.py --port 5001 --latency-ms 50 --error-rate 0.01
+
+Unknown command line options are ignored and --api-address is understood, so
+the script can also be started in place of the raiden binary.
+"""
+
+import argparse
+import json
+import random
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5001
+DEFAULT_PARTNERS = 100
+DEFAULT_BALANCE = 10 ** 21
+NODE_ADDRESS = "0x" + "11" * 20
+TOKEN_ADDRESS = "0x" + "22" * 20
+SETTLE_TIMEOUT = 500
+
+_CHANNEL_PATH = re.compile(r"^channels/(?P<token>0x[0-9a-fA-F]+)(?:/(?P<partner>0x[0-9a-fA-F]+))?$")
+_PAYMENT_PATH = re.compile(r"^payments(?:/(?P<token>0x[0-9a-fA-F]+)/(?P<partner>0x[0-9a-fA-F]+))?$")
+
+
+def partner_address(index: int) -> str:
+    """Get the address of the index-th generated partner."""
+    return "0x" + f"{index + 1:040x}"
+
+
+class MockApiError(Exception):
+    """An error response of the mock node."""
+
+    def __init__(self, status: int, message: str) -> None:
+        """Initialize the error."""
+        super().__init__(message)
+        self.status = status
+
+
+class MockRaidenNode:
+    """The in-memory state and behaviour of the mock node."""
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        channels: Optional[List[Dict[str, Any]]] = None,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Initialize the mock node.
+
+        :param latency: the mean response latency in seconds
+        :param jitter: the maximum deviation from the mean latency in seconds
+        :param error_rate: the share of requests answered with an injected 500
+        :param channels: the initial channels, as returned by the channels endpoint
+        :param seed: the seed of the latency and error randomness
+        """
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._channels = {}  # type: Dict[Tuple[str, str], Dict[str, Any]]
+        self._payments = []  # type: List[Dict[str, Any]]
+        self._next_identifier = 1
+        self.requests = 0
+        self.errors = 0
+        for channel in channels or []:
+            self._channels[self._key(channel["token_address"], channel["partner_address"])] = dict(channel)
+
+    @classmethod
+    def with_partners(
+        cls, partners: int, balance: int = DEFAULT_BALANCE, **kwargs: Any
+    ) -> "MockRaidenNode":
+        """Create a mock node with an open channel to each of `partners` generated partners."""
+        channels = [
+            cls._new_channel(partner_address(index), TOKEN_ADDRESS, balance)
+            for index in range(partners)
+        ]
+        return cls(channels=channels, **kwargs)
+
+    @staticmethod
+    def _key(token: str, partner: str) -> Tuple[str, str]:
+        """Get the key of a channel."""
+        return token.lower(), partner.lower()
+
+    @staticmethod
+    def _new_channel(partner: str, token: str, deposit: int) -> Dict[str, Any]:
+        """Get the state of a newly opened channel."""
+        return {
+            "channel_identifier": str(int(partner, 16) % 10 ** 6),
+            "partner_address": partner,
+            "token_address": token,
+            "token_network_address": "0x" + "33" * 20,
+            "balance": str(deposit),
+            "total_deposit": str(deposit),
+            "total_withdraw": "0",
+            "state": "opened",
+            "settle_timeout": str(SETTLE_TIMEOUT),
+            "reveal_timeout": "50",
+        }
+
+    def handle(self, method: str, path: str, body: Optional[Dict[str, Any]]) -> Tuple[int, Any]:
+        """
+        Answer one API request after the configured latency.
+
+        :param method: the HTTP method
+        :param path: the path below /api/v1/
+        :param body: the decoded JSON body, if any
+        :return: the status code and the JSON response
+        """
+        delay = self.latency + self._random.uniform(-self.jitter, self.jitter)
+        if delay > 0:
+            time.sleep(delay)
+        with self._lock:
+            self.requests += 1
+            if self.error_rate and self._random.random() < self.error_rate:
+                self.errors += 1
+                return 500, {"errors": "injected failure"}
+            try:
+                return 200, self._route(method, path, body or {})
+            except MockApiError as e:
+                self.errors += 1
+                return e.status, {"errors": str(e)}
+
+    def _route(self, method: str, path: str, body: Dict[str, Any]) -> Any:
+        """Dispatch a request, must be called with the lock held."""
+        if method == "GET" and path == "status":
+            return {"status": "ready"}
+        if method == "GET" and path == "address":
+            return {"our_address": NODE_ADDRESS}
+        if method == "GET" and path == "version":
+            return {"version": "mock"}
+        if method == "GET" and path == "tokens":
+            return sorted({token for token, _ in self._channels})
+        if method == "GET" and path == "channels":
+            return [dict(channel) for channel in self._channels.values()]
+        if method == "PUT" and path == "channels":
+            return self._open_channel(body)
+        match = _CHANNEL_PATH.match(path)
+        if match:
+            return self._channel(method, match.group("token"), match.group("partner"), body)
+        match = _PAYMENT_PATH.match(path)
+        if match:
+            if method == "POST" and match.group("partner"):
+                return self._pay(match.group("token"), match.group("partner"), body)
+            if method == "GET":
+                return self._list_payments(body)
+        raise MockApiError(404, f"No mock for {method} {path}")
+
+    def _channel(self, method: str, token: str, partner: Optional[str], body: Dict[str, Any]) -> Any:
+        """Handle the requests on one channel or the channels of one token."""
+        if partner is None:
+            if method != "GET":
+                raise MockApiError(405, "Method not allowed")
+            return [
+                dict(channel)
+                for (channel_token, _), channel in self._channels.items()
+                if channel_token == token.lower()
+            ]
+        channel = self._channels.get(self._key(token, partner))
+        if channel is None:
+            raise MockApiError(404, "Channel does not exist")
+        if method == "GET":
+            return dict(channel)
+        if method != "PATCH":
+            raise MockApiError(405, "Method not allowed")
+        if channel["state"] != "opened":
+            raise MockApiError(409, f"Channel is {channel['state']}")
+        if body.get("state") == "closed":
+            channel["state"] = "closed"
+        elif "total_deposit" in body:
+            total_deposit = int(body["total_deposit"])
+            current = int(channel["total_deposit"])
+            if total_deposit <= current:
+                raise MockApiError(409, "Total deposit did not increase")
+            channel["balance"] = str(int(channel["balance"]) + total_deposit - current)
+            channel["total_deposit"] = str(total_deposit)
+        else:
+            raise MockApiError(400, "Nothing to update")
+        return dict(channel)
+
+    def _open_channel(self, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Open a channel."""
+        key = self._key(body["token_address"], body["partner_address"])
+        existing = self._channels.get(key)
+        if existing is not None and existing["state"] == "opened":
+            raise MockApiError(409, "Channel already exists")
+        channel = self._new_channel(
+            body["partner_address"], body["token_address"], int(body.get("total_deposit") or 0)
+        )
+        self._channels[key] = channel
+        return dict(channel)
+
+    def _pay(self, token: str, partner: str, body: Dict[str, Any]) -> Dict[str, Any]:
+        """Make a payment through the channel with the partner."""
+        channel = self._channels.get(self._key(token, partner))
+        if channel is None or channel["state"] != "opened":
+            raise MockApiError(409, "No open channel with the partner")
+        amount = int(body["amount"])
+        balance = int(channel["balance"])
+        if amount <= 0 or amount > balance:
+            raise MockApiError(409, f"Insufficient balance {balance} for amount {amount}")
+        channel["balance"] = str(balance - amount)
+        identifier = int(body.get("identifier") or self._next_identifier)
+        self._next_identifier = identifier + 1
+        payment = {
+            "initiator_address": NODE_ADDRESS,
+            "target_address": partner,
+            "token_address": token,
+            "amount": str(amount),
+            "identifier": str(identifier),
+            "secret": "0x" + "00" * 32,
+            "secret_hash": "0x" + "00" * 32,
+        }
+        self._payments.append(
+            {
+                "event": "EventPaymentSentSuccess",
+                "log_time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+                **payment,
+            }
+        )
+        return payment
+
+    def _list_payments(self, query: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """List the payment events, optionally one page of them."""
+        offset = int(query.get("offset") or 0)
+        limit = query.get("limit")
+        end = offset + int(limit) if limit is not None else None
+        return [dict(event) for event in self._payments[offset:end]]
+
+
+class MockRaidenServer:
+    """The HTTP server of a mock node, run in a background thread."""
+
+    def __init__(self, node: MockRaidenNode, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT) -> None:
+        """Initialize the server."""
+        self.node = node
+
+        class _RequestHandler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # headers and body go out in two writes, with Nagle's algorithm on a
+            # kept-alive connection the body waits for the client's delayed ACK
+            disable_nagle_algorithm = True
+
+            def _handle(self) -> None:
+                path, _, query = self.path.partition("?")
+                if not path.startswith("/api/v1/"):
+                    self._respond(404, {"errors": "Not found"})
+                    return
+                length = int(self.headers.get("Content-Length") or 0)
+                body = json.loads(self.rfile.read(length)) if length else {}
+                if query:
+                    body.update(
+                        pair.split("=", 1) for pair in query.split("&") if "=" in pair
+                    )
+                status, response = node.handle(self.command, path[len("/api/v1/"):], body)
+                self._respond(status, response)
+
+            def _respond(self, status: int, response: Any) -> None:
+                payload = json.dumps(response).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(payload)))
+                self.end_headers()
+                self.wfile.write(payload)
+
+            do_GET = do_PUT = do_PATCH = do_POST = do_DELETE = _handle
+
+            def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), _RequestHandler)
+        self._server.daemon_threads = True
+        self._thread = None  # type: Optional[threading.Thread]
+
+    @property
+    def address(self) -> Tuple[str, int]:
+        """Get the host and port the server listens on."""
+        host, port = self._server.server_address[:2]
+        return host, port
+
+    def start(self) -> "MockRaidenServer":
+        """Start serving in a background thread."""
+        self._thread = threading.Thread(
+            target=self._server.serve_forever, name="mock_raiden", daemon=True
+        )
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop serving."""
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the mock node until interrupted."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--host", default=DEFAULT_HOST)
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--api-address", help="host:port, as understood by the raiden binary")
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--jitter-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--partners", type=int, default=DEFAULT_PARTNERS)
+    parser.add_argument("--balance", type=int, default=DEFAULT_BALANCE)
+    parser.add_argument("--channels", help="JSON file with the initial channels")
+    parser.add_argument("--seed", type=int)
+    args, _ = parser.parse_known_args(argv)
+
+    host, port = args.host, args.port
+    if args.api_address:
+        host, _, port_str = args.api_address.rpartition(":")
+        port = int(port_str)
+    options = dict(
+        latency=args.latency_ms / 1000,
+        jitter=args.jitter_ms / 1000,
+        error_rate=args.error_rate,
+        seed=args.seed,
+    )
+    if args.channels:
+        with open(args.channels, "r") as f:
+            node = MockRaidenNode(channels=json.load(f), **options)
+    else:
+        node = MockRaidenNode.with_partners(args.partners, args.balance, **options)
+
+    server = MockRaidenServer(node, host, port).start()
+    print(f"Mock Raiden node listening on http://{host}:{port}/api/v1/", flush=True)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.stop()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
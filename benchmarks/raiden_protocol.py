@@ -0,0 +1,306 @@
+#!/usr/bin/env python3
+"""
+Benchmark the hot path of the raiden protocol package.
+
+Measures, per performative, the throughput of RaidenSerializer.encode and
+decode, of building a RaidenMessage (which runs _is_consistent) and of
+_is_consistent on its own, plus the create/update/lookup rates of
+RaidenDialogues as the number of dialogues grows. Runs offline, the results
+are written as JSON. Every rate is also scored relative to a calibration loop
+of plain Python measured right around it, which takes out most of the speed
+of the machine and of its load at the time. The scores are compared against
+a baseline stored beforehand on the same machine, only if one is given:
+
+    python benchmarks/raiden_protocol.py --output results.json
+    python benchmarks/raiden_protocol.py --save-baseline
+    python benchmarks/raiden_protocol.py --baseline benchmarks/raiden_protocol_baseline.json
+"""
+
+import argparse
+import importlib
+import json
+import os
+import platform
+import sys
+import time
+import timeit
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from aea.common import Address
+from aea.protocols.base import Message
+from aea.protocols.dialogue.base import Dialogue
+
+from bootstrap import REPO_ROOT, register_packages
+
+
+DEFAULT_BASELINE = os.path.join(REPO_ROOT, "benchmarks", "raiden_protocol_baseline.json")
+DEFAULT_TOLERANCE = 0.25
+DEFAULT_REPEAT = 5
+DEFAULT_MIN_TIME = 0.2  # time in seconds per measurement
+DIALOGUE_COUNTS = (100, 1000, 10000)
+
+ADDRESS = bytes.fromhex("ab" * 20)
+TOKEN = bytes.fromhex("cd" * 20)
+AMOUNT = 10 ** 18
+
+
+def _import_packages() -> Tuple[Any, Any, Any]:
+    """Import the protocol the way the agent does, as packages.brainbot."""
+    register_packages()
+    message = importlib.import_module("packages.brainbot.protocols.raiden.message")
+    serialization = importlib.import_module(
+        "packages.brainbot.protocols.raiden.serialization"
+    )
+    dialogues = importlib.import_module("packages.brainbot.protocols.raiden.dialogues")
+    return message, serialization, dialogues
+
+
+def sample_contents(raiden_message: Any) -> Dict[Any, Dict[str, Any]]:
+    """Get representative contents of every performative."""
+    performative = raiden_message.Performative
+    contents = {
+        performative.OPEN_CHANNEL: dict(
+            partner_address=ADDRESS, token_address=TOKEN, total_deposit=AMOUNT
+        ),
+        performative.CLOSE_CHANNEL: dict(partner_address=ADDRESS, token_address=TOKEN),
+        performative.DEPOSIT: dict(
+            partner_address=ADDRESS, token_address=TOKEN, amount=AMOUNT
+        ),
+        performative.TRANSFER: dict(
+            partner_address=ADDRESS, token_address=TOKEN, amount=AMOUNT
+        ),
+        performative.BATCH_TRANSFER: dict(
+            partner_addresses=(ADDRESS,) * 50,
+            token_addresses=(TOKEN,) * 50,
+            amounts=(AMOUNT,) * 50,
+        ),
+        performative.PAYMENT_RECEIVED: dict(
+            partner_address=ADDRESS,
+            token_address=TOKEN,
+            amount=AMOUNT,
+            identifier="1234567890",
+            log_time="2022-05-01T12:00:00.000000",
+        ),
+        performative.SUCCESS: dict(action="transfer", detail='{"amount": "1"}'),
+        performative.FAILURE: dict(action="transfer", detail="Insufficient capacity"),
+        performative.STOP_NODE: dict(),
+    }
+    missing = set(performative) - set(contents)
+    if missing:
+        raise RuntimeError(f"No sample contents for {sorted(p.value for p in missing)}")
+    return contents
+
+
+def calibration_loop() -> int:
+    """A fixed workload of plain Python, the unit the benchmarks are compared in."""
+    fields = {}  # type: Dict[str, int]
+    total = 0
+    for index in range(200):
+        key = str(index)
+        fields[key] = index
+        total += len(key) + fields.get(key, 0)
+    return total
+
+
+def measure(fn: Callable[[], Any], repeat: int, min_time: float) -> float:
+    """Get the best rate of `fn` in calls per second."""
+    timer = timeit.Timer(fn)
+    number, elapsed = timer.autorange()
+    number = max(1, int(number * min_time / max(elapsed, 1e-9)))
+    best = min(timer.repeat(repeat=repeat, number=number))
+    return number / best
+
+
+def measure_calibration(repeat: int, min_time: float) -> float:
+    """Get the best rate of the calibration loop in runs per second."""
+    return measure(calibration_loop, repeat, min_time)
+
+
+def measure_calibrated(fn: Callable[[], Any], repeat: int, min_time: float) -> Tuple[float, float]:
+    """Get the best rate of `fn` and of the calibration loop measured right around it."""
+    before = measure_calibration(repeat, min_time / 2)
+    rate = measure(fn, repeat, min_time)
+    after = measure_calibration(repeat, min_time / 2)
+    return rate, max(before, after)
+
+
+def bench_messages(
+    repeat: int, min_time: float, pattern: str = ""
+) -> Dict[str, Tuple[float, float]]:
+    """Measure message construction, encoding and decoding per performative, with their calibration."""
+    message_module, serialization_module, _ = _import_packages()
+    raiden_message = message_module.RaidenMessage
+    serializer = serialization_module.RaidenSerializer
+    results = {}  # type: Dict[str, Tuple[float, float]]
+    for performative, contents in sample_contents(raiden_message).items():
+        name = performative.value
+
+        def build() -> Any:
+            message = raiden_message(
+                performative=performative, dialogue_reference=("1", ""), **contents
+            )
+            message._is_consistent()  # pylint: disable=protected-access
+            return message
+
+        message = build()
+        encoded = serializer.encode(message)
+        if serializer.decode(encoded) != message:
+            raise RuntimeError(f"{name} does not survive an encode/decode round trip")
+        cases = {
+            f"init.{name}": build,
+            f"encode.{name}": lambda: serializer.encode(message),
+            f"decode.{name}": lambda: serializer.decode(encoded),
+            f"validate.{name}": message._is_consistent,  # pylint: disable=protected-access
+        }
+        for case, fn in cases.items():
+            if pattern in case:
+                results[case] = measure_calibrated(fn, repeat, min_time)
+    return results
+
+
+def bench_dialogues(
+    repeat: int, min_time: float, pattern: str = ""
+) -> Dict[str, Tuple[float, float]]:
+    """Measure dialogue create, update and lookup rates for growing dialogue counts, with their calibration."""
+    message_module, _, dialogues_module = _import_packages()
+    raiden_message = message_module.RaidenMessage
+    base_dialogues = dialogues_module.RaidenDialogues
+    role = dialogues_module.RaidenDialogue.Role.NODE
+
+    def role_from_first_message(  # pylint: disable=unused-argument
+        message: Message, receiver_address: Address
+    ) -> Dialogue.Role:
+        return role
+
+    class Dialogues(base_dialogues):  # type: ignore
+        def __init__(self) -> None:
+            base_dialogues.__init__(
+                self, self_address="node", role_from_first_message=role_from_first_message
+            )
+
+    contents = dict(partner_address=ADDRESS, token_address=TOKEN, amount=AMOUNT)
+    results = {}  # type: Dict[str, Tuple[float, float]]
+    for count in DIALOGUE_COUNTS:
+        if not any(pattern in f"dialogues.{op}.{count}" for op in ("create", "update", "lookup")):
+            continue
+        incoming = []  # type: List[Any]
+        for index in range(count):
+            message = raiden_message(
+                performative=raiden_message.Performative.TRANSFER,
+                dialogue_reference=(str(index), ""),
+                **contents,
+            )
+            message.sender = f"agent_{index % 100}"
+            message.to = "node"
+            incoming.append(message)
+
+        before = measure_calibration(repeat, min_time / 2)
+        best = {"create": float("inf"), "update": float("inf"), "lookup": float("inf")}
+        for _ in range(repeat):
+            dialogues = Dialogues()
+            start = time.perf_counter()
+            for index in range(count):
+                dialogues.create(
+                    counterparty=f"agent_{index % 100}",
+                    performative=raiden_message.Performative.TRANSFER,
+                    **contents,
+                )
+            best["create"] = min(best["create"], time.perf_counter() - start)
+
+            dialogues = Dialogues()
+            start = time.perf_counter()
+            for message in incoming:
+                dialogues.update(message)
+            best["update"] = min(best["update"], time.perf_counter() - start)
+
+            start = time.perf_counter()
+            for message in incoming:
+                dialogues.get_dialogue(message)
+            best["lookup"] = min(best["lookup"], time.perf_counter() - start)
+
+        calibration = max(before, measure_calibration(repeat, min_time / 2))
+        for operation, elapsed in best.items():
+            if pattern in f"dialogues.{operation}.{count}":
+                results[f"dialogues.{operation}.{count}"] = (count / elapsed, calibration)
+    return results
+
+
+def compare(
+    results: Dict[str, float], baseline: Dict[str, float], tolerance: float
+) -> List[str]:
+    """
+    Get a line per benchmark that is slower than the baseline by more than `tolerance`.
+
+    Both are scores, in operations per run of the calibration loop.
+    """
+    regressions = []
+    for name, score in sorted(results.items()):
+        expected = baseline.get(name)
+        if expected and score < expected * (1 - tolerance):
+            regressions.append(
+                f"{name}: {score:,.3f} vs baseline {expected:,.3f} per calibration loop "
+                f"({score / expected - 1:+.0%})"
+            )
+    return regressions
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    """Run the benchmarks, return the process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--output", help="write the results as JSON to this file")
+    parser.add_argument(
+        "--baseline", help="compare against the baseline stored in this file on this machine"
+    )
+    parser.add_argument(
+        "--save-baseline",
+        action="store_true",
+        help=f"store the results as the baseline, in --baseline or {DEFAULT_BASELINE}",
+    )
+    parser.add_argument("--tolerance", type=float, default=DEFAULT_TOLERANCE)
+    parser.add_argument("--repeat", type=int, default=DEFAULT_REPEAT)
+    parser.add_argument("--min-time", type=float, default=DEFAULT_MIN_TIME)
+    parser.add_argument("--filter", default="", help="only run benchmarks containing this")
+    args = parser.parse_args(argv)
+
+    measured = bench_messages(args.repeat, args.min_time, args.filter)
+    measured.update(bench_dialogues(args.repeat, args.min_time, args.filter))
+    rates = {name: rate for name, (rate, _) in measured.items()}
+    scores = {name: rate / calibration for name, (rate, calibration) in measured.items()}
+    report = {
+        "unit": "operations per run of the calibration loop",
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "rates": rates,
+        "results": scores,
+    }
+    print(f"{'benchmark':40} {'rate':>16} {'score':>10}")
+    for name, rate in sorted(rates.items()):
+        print(f"{name:40} {rate:>14,.0f}/s {scores[name]:>10,.3f}")
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+    if args.save_baseline:
+        with open(args.baseline or DEFAULT_BASELINE, "w") as f:
+            json.dump(report, f, indent=2, sort_keys=True)
+            f.write("\n")
+        return 0
+
+    if args.baseline is None:
+        return 0
+    with open(args.baseline, "r") as f:
+        baseline = json.load(f)
+    if "rates" not in baseline:
+        print(f"The baseline at {args.baseline} holds no scores, store it again")
+        return 1
+    regressions = compare(scores, baseline["results"], args.tolerance)
+    if regressions:
+        print(f"\n{len(regressions)} benchmarks regressed by more than {args.tolerance:.0%}:")
+        for line in regressions:
+            print(f"  {line}")
+        return 1
+    print(f"\nNo regressions beyond {args.tolerance:.0%} of the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
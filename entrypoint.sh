@@ -1,3 +1,79 @@
 #!/usr/bin/env bash
-aea fingerprint skill brainbot/channel_manager:0.1.0
-aea install && aea build && aea run
+# Boot the agent: fingerprint the skill, install its dependencies, build the
+# connections and run. A full boot leaves a manifest with the content hashes
+# of the packages and of the installed dependencies; while both still match,
+# fast boot (FAST_BOOT=1, the default) goes straight to `aea run`.
+# `entrypoint.sh prepare` boots without running, as the image build does.
+# The time of every phase is reported.
+set -euo pipefail
+export LC_ALL=C
+
+SKILL=brainbot/channel_manager:0.1.0
+MANIFEST=${BOOT_MANIFEST:-.boot_manifest}
+FAST_BOOT=${FAST_BOOT:-1}
+PACKAGE_PATHS=(aea-config.yaml connections contracts protocols skills)
+
+boot_start=$EPOCHREALTIME
+phase_start=$boot_start
+
+seconds_since() {
+    awk -v now="$EPOCHREALTIME" -v start="$1" 'BEGIN { printf "%.2f", now - start }'
+}
+
+phase_done() {
+    echo "boot: $1 took $(seconds_since "$phase_start")s"
+    phase_start=$EPOCHREALTIME
+}
+
+manifest() {
+    local sources dependencies
+    sources=$(
+        find "${PACKAGE_PATHS[@]}" -type f ! -path '*/__pycache__/*' ! -name '*.py[cod]' -print0 \
+            | sort -z | xargs -0 sha256sum | sha256sum
+    )
+    # the name and version of every installed distribution, as pip freeze without its startup
+    dependencies=$(
+        python3 - <<'PYTHON' | sha256sum
+import os
+import sys
+
+print(sys.version)
+for path in sys.path:
+    if os.path.isdir(path):
+        print(path, *sorted(name for name in os.listdir(path) if name.endswith((".dist-info", ".egg-info"))))
+PYTHON
+    )
+    echo "sources ${sources%% *}"
+    echo "dependencies ${dependencies%% *}"
+}
+
+current=$(manifest)
+phase_done "manifest check"
+
+if [[ $FAST_BOOT == 1 && -f $MANIFEST && $current == "$(<"$MANIFEST")" ]]; then
+    echo "boot: packages and dependencies unchanged, skipping fingerprint, install and build"
+else
+    if [[ -f $MANIFEST ]]; then
+        while read -r part hash; do
+            grep -qx "$part $hash" "$MANIFEST" || echo "boot: $part changed"
+        done <<< "$current"
+    fi
+    # a boot that fails halfway must not leave the old manifest behind
+    rm -f "$MANIFEST"
+    aea fingerprint skill "$SKILL"
+    phase_done fingerprint
+    aea install
+    phase_done install
+    aea build
+    phase_done build
+    # the fingerprint rewrites skill.yaml, so hash what the next boot will see
+    manifest > "$MANIFEST.tmp"
+    mv "$MANIFEST.tmp" "$MANIFEST"
+    phase_done "manifest write"
+fi
+echo "boot: ready to run after $(seconds_since "$boot_start")s"
+
+if [[ ${1:-} == prepare ]]; then
+    exit 0
+fi
+exec aea run
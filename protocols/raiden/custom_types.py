@@ -0,0 +1,234 @@
+# -*- coding: utf-8 -*-
+
+"""This module contains class representations corresponding to every custom type in the protocol specification."""
+
+import re
+from functools import lru_cache
+from typing import Any, Iterable, Tuple, Union
+
+from eth_utils import to_checksum_address as _to_checksum_address
+
+
+UINT256_MAX = 2 ** 256 - 1
+UINT256_BYTES = 32
+ADDRESS_BYTES = 20
+ADDRESS_CACHE_SIZE = 4096
+
+_DECIMAL = re.compile(r"[0-9]+")
+_HEX_ADDRESS = re.compile(r"0x[0-9a-fA-F]{40}")
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def to_checksum_address(address: bytes) -> str:
+    """Format a 20-byte address as EIP-55 mixed-case hex, once per distinct address."""
+    return _to_checksum_address(address)
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def _parse_address(value: str) -> bytes:
+    """Parse a hex address, mixed-case hex has to carry a valid EIP-55 checksum."""
+    if not _HEX_ADDRESS.fullmatch(value):
+        raise ValueError(f"Invalid address {value!r}")
+    digits = value[2:]
+    address = bytes.fromhex(digits)
+    if digits not in (digits.lower(), digits.upper()) and to_checksum_address(address) != value:
+        raise ValueError(f"Invalid checksum of address {value!r}")
+    return address
+
+
+def to_address_bytes(value: Union[bytes, str]) -> bytes:
+    """Get the 20 bytes of an address given as bytes or as hex."""
+    if isinstance(value, bytes):
+        return value
+    return _parse_address(value)
+
+
+def is_address(value: Any) -> bool:
+    """Check that a value is a 20-byte address."""
+    return isinstance(value, bytes) and len(value) == ADDRESS_BYTES
+
+
+def _to_bytes(value: int) -> bytes:
+    """Encode an amount as big-endian bytes without leading zeros, 0 as no bytes."""
+    return value.to_bytes((value.bit_length() + 7) // 8, "big")
+
+
+def _from_bytes(data: bytes) -> "Amount":
+    """Decode big-endian bytes of at most 32 bytes into an amount."""
+    if len(data) > UINT256_BYTES:
+        raise ValueError(f"Amount of {len(data)} bytes does not fit into 256 bits")
+    return Amount(int.from_bytes(data, "big"))
+
+
+def is_amount(value: Any) -> bool:
+    """Check that a value is an unsigned 256-bit integer."""
+    return (
+        isinstance(value, int)
+        and not isinstance(value, bool)
+        and 0 <= value <= UINT256_MAX
+    )
+
+
+class Address(bytes):
+    """
+    A 20-byte account or token address.
+
+    Addresses travel as their raw bytes. Hex input, as used by Raiden's API,
+    is parsed and checksum-validated once per
+    distinct address, and str() formats them as cached EIP-55 hex.
+    """
+
+    def __new__(cls, value: Union[bytes, str]) -> "Address":
+        """Create an address from its 20 bytes or its hex."""
+        if isinstance(value, str):
+            value = _parse_address(value)
+        if not is_address(value):
+            raise ValueError(f"Address {value!r} is not 20 bytes")
+        return super().__new__(cls, value)
+
+    def __str__(self) -> str:
+        """Get the checksummed hex of the address."""
+        return to_checksum_address(self)
+
+    def __repr__(self) -> str:
+        """Get the representation of the address."""
+        return f"Address({to_checksum_address(self)!r})"
+
+    @staticmethod
+    def encode(address_protobuf_object: Any, address_object: bytes) -> None:
+        """
+        Encode an instance of this class into the protocol buffer object.
+
+        The protocol buffer object in the address_protobuf_object argument is matched with the instance of this class in the 'address_object' argument.
+
+        :param address_protobuf_object: the protocol buffer object whose type corresponds with this class.
+        :param address_object: an instance of this class to be encoded in the protocol buffer object.
+        """
+        address_protobuf_object.value = bytes(address_object)
+
+    @classmethod
+    def decode(cls, address_protobuf_object: Any) -> "Address":
+        """
+        Decode a protocol buffer object that corresponds with this class into an instance of this class.
+
+        A new instance of this class is created that matches the protocol buffer object in the 'address_protobuf_object' argument.
+
+        :param address_protobuf_object: the protocol buffer object whose type corresponds with this class.
+        :return: A new instance of this class that matches the protocol buffer object in the 'address_protobuf_object' argument.
+        """
+        return cls(address_protobuf_object.value)
+
+
+class Addresses(tuple):
+    """The addresses of a batch, a tuple of 20-byte addresses."""
+
+    def __new__(cls, values: Iterable[Union[bytes, str]] = ()) -> "Addresses":
+        """Create the addresses from bytes or hex."""
+        return super().__new__(cls, (Address(value) for value in values))
+
+    @staticmethod
+    def encode(addresses_protobuf_object: Any, addresses_object: Tuple[bytes, ...]) -> None:
+        """
+        Encode an instance of this class into the protocol buffer object.
+
+        The protocol buffer object in the addresses_protobuf_object argument is matched with the instance of this class in the 'addresses_object' argument.
+
+        :param addresses_protobuf_object: the protocol buffer object whose type corresponds with this class.
+        :param addresses_object: an instance of this class to be encoded in the protocol buffer object.
+        """
+        addresses_protobuf_object.SetInParent()
+        addresses_protobuf_object.values.extend(bytes(value) for value in addresses_object)
+
+    @classmethod
+    def decode(cls, addresses_protobuf_object: Any) -> "Addresses":
+        """
+        Decode a protocol buffer object that corresponds with this class into an instance of this class.
+
+        A new instance of this class is created that matches the protocol buffer object in the 'addresses_protobuf_object' argument.
+
+        :param addresses_protobuf_object: the protocol buffer object whose type corresponds with this class.
+        :return: A new instance of this class that matches the protocol buffer object in the 'addresses_protobuf_object' argument.
+        """
+        return tuple.__new__(
+            cls, (Address(value) for value in addresses_protobuf_object.values)
+        )
+
+
+class Amount(int):
+    """
+    A token amount, an unsigned 256-bit integer.
+
+    Amounts are plain ints to the skills; on the wire they are the big-endian
+    bytes of the value without leading zeros, at most 32 bytes. A decimal
+    string, as used by Raiden's API, is accepted as input.
+    """
+
+    def __new__(cls, value: Any) -> "Amount":
+        """Create an amount from an int or a decimal string."""
+        if isinstance(value, str):
+            if not _DECIMAL.fullmatch(value):
+                raise ValueError(f"Invalid amount {value!r}")
+            value = int(value)
+        if not is_amount(value):
+            raise ValueError(f"Amount {value!r} is not an unsigned 256-bit integer")
+        return super().__new__(cls, value)
+
+    @staticmethod
+    def encode(amount_protobuf_object: Any, amount_object: int) -> None:
+        """
+        Encode an instance of this class into the protocol buffer object.
+
+        The protocol buffer object in the amount_protobuf_object argument is matched with the instance of this class in the 'amount_object' argument.
+
+        :param amount_protobuf_object: the protocol buffer object whose type corresponds with this class.
+        :param amount_object: an instance of this class to be encoded in the protocol buffer object.
+        """
+        amount_protobuf_object.SetInParent()
+        amount_protobuf_object.value = _to_bytes(amount_object)
+
+    @classmethod
+    def decode(cls, amount_protobuf_object: Any) -> "Amount":
+        """
+        Decode a protocol buffer object that corresponds with this class into an instance of this class.
+
+        A new instance of this class is created that matches the protocol buffer object in the 'amount_protobuf_object' argument.
+
+        :param amount_protobuf_object: the protocol buffer object whose type corresponds with this class.
+        :return: A new instance of this class that matches the protocol buffer object in the 'amount_protobuf_object' argument.
+        """
+        return _from_bytes(amount_protobuf_object.value)
+
+
+class Amounts(tuple):
+    """The amounts of a batch, a tuple of unsigned 256-bit integers."""
+
+    def __new__(cls, values: Iterable[Any] = ()) -> "Amounts":
+        """Create the amounts from ints or decimal strings."""
+        return super().__new__(cls, (Amount(value) for value in values))
+
+    @staticmethod
+    def encode(amounts_protobuf_object: Any, amounts_object: Tuple[int, ...]) -> None:
+        """
+        Encode an instance of this class into the protocol buffer object.
+
+        The protocol buffer object in the amounts_protobuf_object argument is matched with the instance of this class in the 'amounts_object' argument.
+
+        :param amounts_protobuf_object: the protocol buffer object whose type corresponds with this class.
+        :param amounts_object: an instance of this class to be encoded in the protocol buffer object.
+        """
+        amounts_protobuf_object.SetInParent()
+        amounts_protobuf_object.values.extend(_to_bytes(value) for value in amounts_object)
+
+    @classmethod
+    def decode(cls, amounts_protobuf_object: Any) -> "Amounts":
+        """
+        Decode a protocol buffer object that corresponds with this class into an instance of this class.
+
+        A new instance of this class is created that matches the protocol buffer object in the 'amounts_protobuf_object' argument.
+
+        :param amounts_protobuf_object: the protocol buffer object whose type corresponds with this class.
+        :return: A new instance of this class that matches the protocol buffer object in the 'amounts_protobuf_object' argument.
+        """
+        return tuple.__new__(
+            cls, (_from_bytes(value) for value in amounts_protobuf_object.values)
+        )
@@ -26,12 +26,22 @@ class RaidenDialogue(Dialogue):
             RaidenMessage.Performative.CLOSE_CHANNEL,
             RaidenMessage.Performative.DEPOSIT,
             RaidenMessage.Performative.TRANSFER,
+            RaidenMessage.Performative.BATCH_TRANSFER,
+            RaidenMessage.Performative.STOP_NODE,
+            RaidenMessage.Performative.PAYMENT_RECEIVED,
         }
     )
     TERMINAL_PERFORMATIVES: FrozenSet[Message.Performative] = frozenset(
-        {RaidenMessage.Performative.SUCCESS, RaidenMessage.Performative.FAILURE}
+        {
+            RaidenMessage.Performative.SUCCESS,
+            RaidenMessage.Performative.FAILURE,
+            RaidenMessage.Performative.PAYMENT_RECEIVED,
+        }
     )
     VALID_REPLIES: Dict[Message.Performative, FrozenSet[Message.Performative]] = {
+        RaidenMessage.Performative.BATCH_TRANSFER: frozenset(
+            {RaidenMessage.Performative.SUCCESS, RaidenMessage.Performative.FAILURE}
+        ),
         RaidenMessage.Performative.CLOSE_CHANNEL: frozenset(
             {RaidenMessage.Performative.SUCCESS, RaidenMessage.Performative.FAILURE}
         ),
@@ -42,6 +52,7 @@ class RaidenDialogue(Dialogue):
         RaidenMessage.Performative.OPEN_CHANNEL: frozenset(
             {RaidenMessage.Performative.SUCCESS, RaidenMessage.Performative.FAILURE}
         ),
+        RaidenMessage.Performative.PAYMENT_RECEIVED: frozenset(),
         RaidenMessage.Performative.STOP_NODE: frozenset(
             {RaidenMessage.Performative.SUCCESS, RaidenMessage.Performative.FAILURE}
         ),
@@ -4,31 +4,51 @@
 
 # pylint: disable=too-many-statements,too-many-locals,no-member,too-few-public-methods,too-many-branches,not-an-iterable,unidiomatic-typecheck,unsubscriptable-object
 import logging
-from typing import Any, Optional, Set, Tuple, cast
+import threading
+from typing import Any, Callable, Dict, Optional, Set, Tuple, cast
 
 from aea.configurations.base import PublicId
-from aea.exceptions import AEAEnforceError, enforce
+from aea.exceptions import enforce
 from aea.protocols.base import Message
 
+from packages.brainbot.protocols.raiden.custom_types import Address as CustomAddress
+from packages.brainbot.protocols.raiden.custom_types import Addresses as CustomAddresses
+from packages.brainbot.protocols.raiden.custom_types import Amount as CustomAmount
+from packages.brainbot.protocols.raiden.custom_types import Amounts as CustomAmounts
+from packages.brainbot.protocols.raiden.custom_types import is_address, is_amount
+
 
 _default_logger = logging.getLogger("aea.packages.brainbot.protocols.raiden.message")
 
 DEFAULT_BODY_SIZE = 4
 
+_MISSING = object()
+_trusted_construction = threading.local()
+
 
 class RaidenMessage(Message):
     """Autonomous implementation of the Raiden protocol"""
 
-    protocol_id = PublicId.from_str("brainbot/raiden:0.0.1")
-    protocol_specification_id = PublicId.from_str("brainbot/raiden:0.0.1")
+    protocol_id = PublicId.from_str("brainbot/raiden:0.2.0")
+    protocol_specification_id = PublicId.from_str("brainbot/raiden:0.2.0")
+
+    Address = CustomAddress
+
+    Addresses = CustomAddresses
+
+    Amount = CustomAmount
+
+    Amounts = CustomAmounts
 
     class Performative(Message.Performative):
         """Performatives for the raiden protocol."""
 
+        BATCH_TRANSFER = "batch_transfer"
         CLOSE_CHANNEL = "close_channel"
         DEPOSIT = "deposit"
         FAILURE = "failure"
         OPEN_CHANNEL = "open_channel"
+        PAYMENT_RECEIVED = "payment_received"
         STOP_NODE = "stop_node"
         SUCCESS = "success"
         TRANSFER = "transfer"
@@ -38,10 +58,12 @@ class RaidenMessage(Message):
             return str(self.value)
 
     _performatives = {
+        "batch_transfer",
         "close_channel",
         "deposit",
         "failure",
         "open_channel",
+        "payment_received",
         "stop_node",
         "success",
         "transfer",
@@ -52,13 +74,18 @@ class RaidenMessage(Message):
         __slots__ = (
             "action",
             "amount",
+            "amounts",
             "detail",
             "dialogue_reference",
+            "identifier",
+            "log_time",
             "message_id",
             "partner_address",
+            "partner_addresses",
             "performative",
             "target",
             "token_address",
+            "token_addresses",
             "total_deposit",
         )
 
@@ -87,6 +114,23 @@ class RaidenMessage(Message):
             **kwargs,
         )
 
+    @classmethod
+    def trusted(cls, **kwargs: Any) -> "RaidenMessage":
+        """
+        Build a message whose contents are known to follow the protocol, without validating it.
+
+        Meant for messages built by RaidenSerializer.decode, whose field table
+        and custom types already guarantee the content names and types.
+
+        :param kwargs: the arguments of RaidenMessage.
+        :return: the message.
+        """
+        _trusted_construction.active = True
+        try:
+            return cls(**kwargs)
+        finally:
+            _trusted_construction.active = False
+
     @property
     def valid_performatives(self) -> Set[str]:
         """Get valid performatives."""
@@ -123,10 +167,16 @@ class RaidenMessage(Message):
         return cast(str, self.get("action"))
 
     @property
-    def amount(self) -> str:
+    def amount(self) -> int:
         """Get the 'amount' content from the message."""
         enforce(self.is_set("amount"), "'amount' content is not set.")
-        return cast(str, self.get("amount"))
+        return cast(int, self.get("amount"))
+
+    @property
+    def amounts(self) -> Tuple[int, ...]:
+        """Get the 'amounts' content from the message."""
+        enforce(self.is_set("amounts"), "'amounts' content is not set.")
+        return cast(Tuple[int, ...], self.get("amounts"))
 
     @property
     def detail(self) -> Optional[str]:
@@ -134,198 +184,198 @@ class RaidenMessage(Message):
         return cast(Optional[str], self.get("detail"))
 
     @property
-    def partner_address(self) -> str:
+    def identifier(self) -> str:
+        """Get the 'identifier' content from the message."""
+        enforce(self.is_set("identifier"), "'identifier' content is not set.")
+        return cast(str, self.get("identifier"))
+
+    @property
+    def log_time(self) -> str:
+        """Get the 'log_time' content from the message."""
+        enforce(self.is_set("log_time"), "'log_time' content is not set.")
+        return cast(str, self.get("log_time"))
+
+    @property
+    def partner_address(self) -> bytes:
         """Get the 'partner_address' content from the message."""
         enforce(self.is_set("partner_address"), "'partner_address' content is not set.")
-        return cast(str, self.get("partner_address"))
+        return cast(bytes, self.get("partner_address"))
 
     @property
-    def token_address(self) -> str:
+    def partner_addresses(self) -> Tuple[bytes, ...]:
+        """Get the 'partner_addresses' content from the message."""
+        enforce(
+            self.is_set("partner_addresses"), "'partner_addresses' content is not set."
+        )
+        return cast(Tuple[bytes, ...], self.get("partner_addresses"))
+
+    @property
+    def token_address(self) -> bytes:
         """Get the 'token_address' content from the message."""
         enforce(self.is_set("token_address"), "'token_address' content is not set.")
-        return cast(str, self.get("token_address"))
+        return cast(bytes, self.get("token_address"))
 
     @property
-    def total_deposit(self) -> str:
+    def token_addresses(self) -> Tuple[bytes, ...]:
+        """Get the 'token_addresses' content from the message."""
+        enforce(self.is_set("token_addresses"), "'token_addresses' content is not set.")
+        return cast(Tuple[bytes, ...], self.get("token_addresses"))
+
+    @property
+    def total_deposit(self) -> int:
         """Get the 'total_deposit' content from the message."""
         enforce(self.is_set("total_deposit"), "'total_deposit' content is not set.")
-        return cast(str, self.get("total_deposit"))
+        return cast(int, self.get("total_deposit"))
 
     def _is_consistent(self) -> bool:
-        """Check that the message follows the raiden protocol."""
-        try:
-            enforce(
-                isinstance(self.dialogue_reference, tuple),
-                "Invalid type for 'dialogue_reference'. Expected 'tuple'. Found '{}'.".format(
-                    type(self.dialogue_reference)
-                ),
-            )
-            enforce(
-                isinstance(self.dialogue_reference[0], str),
-                "Invalid type for 'dialogue_reference[0]'. Expected 'str'. Found '{}'.".format(
-                    type(self.dialogue_reference[0])
-                ),
-            )
-            enforce(
-                isinstance(self.dialogue_reference[1], str),
-                "Invalid type for 'dialogue_reference[1]'. Expected 'str'. Found '{}'.".format(
-                    type(self.dialogue_reference[1])
-                ),
-            )
-            enforce(
-                type(self.message_id) is int,
-                "Invalid type for 'message_id'. Expected 'int'. Found '{}'.".format(
-                    type(self.message_id)
-                ),
-            )
-            enforce(
-                type(self.target) is int,
-                "Invalid type for 'target'. Expected 'int'. Found '{}'.".format(
-                    type(self.target)
-                ),
-            )
-
-            # Light Protocol Rule 2
-            # Check correct performative
-            enforce(
-                isinstance(self.performative, RaidenMessage.Performative),
-                "Invalid 'performative'. Expected either of '{}'. Found '{}'.".format(
-                    self.valid_performatives, self.performative
-                ),
-            )
-
-            # Check correct contents
-            actual_nb_of_contents = len(self._body) - DEFAULT_BODY_SIZE
-            expected_nb_of_contents = 0
-            if self.performative == RaidenMessage.Performative.OPEN_CHANNEL:
-                expected_nb_of_contents = 3
-                enforce(
-                    isinstance(self.partner_address, str),
-                    "Invalid type for content 'partner_address'. Expected 'str'. Found '{}'.".format(
-                        type(self.partner_address)
-                    ),
-                )
-                enforce(
-                    isinstance(self.token_address, str),
-                    "Invalid type for content 'token_address'. Expected 'str'. Found '{}'.".format(
-                        type(self.token_address)
-                    ),
-                )
-                enforce(
-                    isinstance(self.total_deposit, str),
-                    "Invalid type for content 'total_deposit'. Expected 'str'. Found '{}'.".format(
-                        type(self.total_deposit)
-                    ),
-                )
-            elif self.performative == RaidenMessage.Performative.CLOSE_CHANNEL:
-                expected_nb_of_contents = 2
-                enforce(
-                    isinstance(self.partner_address, str),
-                    "Invalid type for content 'partner_address'. Expected 'str'. Found '{}'.".format(
-                        type(self.partner_address)
-                    ),
-                )
-                enforce(
-                    isinstance(self.token_address, str),
-                    "Invalid type for content 'token_address'. Expected 'str'. Found '{}'.".format(
-                        type(self.token_address)
-                    ),
-                )
-            elif self.performative == RaidenMessage.Performative.DEPOSIT:
-                expected_nb_of_contents = 3
-                enforce(
-                    isinstance(self.partner_address, str),
-                    "Invalid type for content 'partner_address'. Expected 'str'. Found '{}'.".format(
-                        type(self.partner_address)
-                    ),
-                )
-                enforce(
-                    isinstance(self.token_address, str),
-                    "Invalid type for content 'token_address'. Expected 'str'. Found '{}'.".format(
-                        type(self.token_address)
-                    ),
-                )
-                enforce(
-                    isinstance(self.amount, str),
-                    "Invalid type for content 'amount'. Expected 'str'. Found '{}'.".format(
-                        type(self.amount)
-                    ),
-                )
-            elif self.performative == RaidenMessage.Performative.TRANSFER:
-                expected_nb_of_contents = 3
-                enforce(
-                    isinstance(self.partner_address, str),
-                    "Invalid type for content 'partner_address'. Expected 'str'. Found '{}'.".format(
-                        type(self.partner_address)
-                    ),
-                )
-                enforce(
-                    isinstance(self.token_address, str),
-                    "Invalid type for content 'token_address'. Expected 'str'. Found '{}'.".format(
-                        type(self.token_address)
-                    ),
-                )
-                enforce(
-                    isinstance(self.amount, str),
-                    "Invalid type for content 'amount'. Expected 'str'. Found '{}'.".format(
-                        type(self.amount)
-                    ),
-                )
-            elif self.performative == RaidenMessage.Performative.SUCCESS:
-                expected_nb_of_contents = 1
-                enforce(
-                    isinstance(self.action, str),
-                    "Invalid type for content 'action'. Expected 'str'. Found '{}'.".format(
-                        type(self.action)
-                    ),
-                )
-                if self.is_set("detail"):
-                    expected_nb_of_contents += 1
-                    detail = cast(str, self.detail)
-                    enforce(
-                        isinstance(detail, str),
-                        "Invalid type for content 'detail'. Expected 'str'. Found '{}'.".format(
-                            type(detail)
-                        ),
-                    )
-            elif self.performative == RaidenMessage.Performative.FAILURE:
-                expected_nb_of_contents = 1
-                enforce(
-                    isinstance(self.action, str),
-                    "Invalid type for content 'action'. Expected 'str'. Found '{}'.".format(
-                        type(self.action)
-                    ),
-                )
-                if self.is_set("detail"):
-                    expected_nb_of_contents += 1
-                    detail = cast(str, self.detail)
-                    enforce(
-                        isinstance(detail, str),
-                        "Invalid type for content 'detail'. Expected 'str'. Found '{}'.".format(
-                            type(detail)
-                        ),
-                    )
-            elif self.performative == RaidenMessage.Performative.STOP_NODE:
-                expected_nb_of_contents = 0
-
-            # Check correct content count
-            enforce(
-                expected_nb_of_contents == actual_nb_of_contents,
-                "Incorrect number of contents. Expected {}. Found {}".format(
-                    expected_nb_of_contents, actual_nb_of_contents
-                ),
-            )
-
-            # Light Protocol Rule 3
-            if self.message_id == 1:
-                enforce(
-                    self.target == 0,
-                    "Invalid 'target'. Expected 0 (because 'message_id' is 1). Found {}.".format(
-                        self.target
-                    ),
-                )
-        except (AEAEnforceError, ValueError, KeyError) as e:
-            _default_logger.error(str(e))
-            return False
+        """
+        Check that the message follows the raiden protocol.
 
+        Reads the slots directly and runs the validator of the performative,
+        the error is only formatted for a message that fails.
+        """
+        if getattr(_trusted_construction, "active", False):
+            return True
+        error = _validate_header(self._slots)
+        if error is None:
+            error = _VALIDATORS[self._slots.performative](self._slots)
+        if error is not None:
+            _default_logger.error(error)
+            return False
         return True
+
+
+Validator = Callable[[Any], Optional[str]]
+
+# The contents of every speech act as (name, type) in protocol_specs.yaml
+_SPEECH_ACTS = {
+    RaidenMessage.Performative.BATCH_TRANSFER: (
+        ("partner_addresses", "ct:Addresses"),
+        ("token_addresses", "ct:Addresses"),
+        ("amounts", "ct:Amounts"),
+    ),
+    RaidenMessage.Performative.CLOSE_CHANNEL: (
+        ("partner_address", "ct:Address"),
+        ("token_address", "ct:Address"),
+    ),
+    RaidenMessage.Performative.DEPOSIT: (
+        ("partner_address", "ct:Address"),
+        ("token_address", "ct:Address"),
+        ("amount", "ct:Amount"),
+    ),
+    RaidenMessage.Performative.FAILURE: (
+        ("action", "pt:str"),
+        ("detail", "pt:optional[pt:str]"),
+    ),
+    RaidenMessage.Performative.OPEN_CHANNEL: (
+        ("partner_address", "ct:Address"),
+        ("token_address", "ct:Address"),
+        ("total_deposit", "ct:Amount"),
+    ),
+    RaidenMessage.Performative.PAYMENT_RECEIVED: (
+        ("partner_address", "ct:Address"),
+        ("token_address", "ct:Address"),
+        ("amount", "ct:Amount"),
+        ("identifier", "pt:str"),
+        ("log_time", "pt:str"),
+    ),
+    RaidenMessage.Performative.STOP_NODE: (),
+    RaidenMessage.Performative.SUCCESS: (
+        ("action", "pt:str"),
+        ("detail", "pt:optional[pt:str]"),
+    ),
+    RaidenMessage.Performative.TRANSFER: (
+        ("partner_address", "ct:Address"),
+        ("token_address", "ct:Address"),
+        ("amount", "ct:Amount"),
+    ),
+}  # type: Dict[RaidenMessage.Performative, Tuple[Tuple[str, str], ...]]
+
+# The check and the expectation, for the error, of every content type
+_TYPE_CHECKS = {
+    "pt:str": (lambda value: isinstance(value, str), "'str'"),
+    "ct:Address": (is_address, "20-byte 'bytes'"),
+    "ct:Addresses": (
+        lambda value: isinstance(value, tuple) and all(map(is_address, value)),
+        "a 'tuple' of 20-byte 'bytes'",
+    ),
+    "ct:Amount": (is_amount, "an unsigned 256-bit 'int'"),
+    "ct:Amounts": (
+        lambda value: isinstance(value, tuple) and all(map(is_amount, value)),
+        "a 'tuple' of unsigned 256-bit 'int'",
+    ),
+}  # type: Dict[str, Tuple[Callable[[Any], bool], str]]
+
+_HEADERS = ("dialogue_reference", "message_id", "performative", "target")
+_CONTENT_SLOTS = tuple(
+    name for name in RaidenMessage._SlotsCls.__slots__ if name not in _HEADERS
+)
+
+
+def _compile_validator(contents: Tuple[Tuple[str, str], ...]) -> Validator:
+    """
+    Build the validator of a speech act from its contents in the spec.
+
+    The validator checks the type of every content and that no other content
+    is set in one pass over the slots, and returns the error or None.
+    """
+    content_checks = []
+    for name, type_name in contents:
+        optional = type_name.startswith("pt:optional[")
+        if optional:
+            type_name = type_name[len("pt:optional[") : -1]
+        check, expected = _TYPE_CHECKS[type_name]
+        content_checks.append((name, optional, check, expected))
+    checks = tuple(content_checks)
+    names = {name for name, _ in contents}
+    unexpected = tuple(name for name in _CONTENT_SLOTS if name not in names)
+
+    def validate(slots: Any) -> Optional[str]:
+        for name, optional, check, expected in checks:
+            value = getattr(slots, name, _MISSING)
+            if value is _MISSING:
+                if optional:
+                    continue
+                return f"'{name}' content is not set."
+            if not check(value):
+                return f"Invalid content '{name}'. Expected {expected}. Found {value!r}."
+        for name in unexpected:
+            if getattr(slots, name, _MISSING) is not _MISSING:
+                return f"Unexpected content '{name}' for this performative."
+        return None
+
+    return validate
+
+
+def _validate_header(slots: Any) -> Optional[str]:
+    """Check the fields every message carries, return the error or None."""
+    dialogue_reference = getattr(slots, "dialogue_reference", None)
+    if not (
+        isinstance(dialogue_reference, tuple)
+        and len(dialogue_reference) == 2
+        and isinstance(dialogue_reference[0], str)
+        and isinstance(dialogue_reference[1], str)
+    ):
+        return f"Invalid 'dialogue_reference'. Expected a pair of 'str'. Found {dialogue_reference!r}."
+    message_id = getattr(slots, "message_id", None)
+    if type(message_id) is not int:
+        return f"Invalid type for 'message_id'. Expected 'int'. Found '{type(message_id)}'."
+    target = getattr(slots, "target", None)
+    if type(target) is not int:
+        return f"Invalid type for 'target'. Expected 'int'. Found '{type(target)}'."
+    # Light Protocol Rule 2
+    performative = getattr(slots, "performative", None)
+    if not isinstance(performative, RaidenMessage.Performative):
+        return "Invalid 'performative'. Expected either of '{}'. Found '{}'.".format(
+            RaidenMessage._performatives, performative  # pylint: disable=protected-access
+        )
+    # Light Protocol Rule 3
+    if message_id == 1 and target != 0:
+        return f"Invalid 'target'. Expected 0 (because 'message_id' is 1). Found {target}."
+    return None
+
+
+_VALIDATORS = {
+    performative: _compile_validator(contents)
+    for performative, contents in _SPEECH_ACTS.items()
+}  # type: Dict[RaidenMessage.Performative, Validator]
@@ -14,11 +14,23 @@ _sym_db = _symbol_database.Default()
 
 
 DESCRIPTOR = _descriptor_pool.Default().AddSerializedFile(
-    b'\n\x0craiden.proto\x12\x1a\x61\x65\x61.brainbot.raiden.v0_0_1"\x9b\t\n\rRaidenMessage\x12]\n\rclose_channel\x18\x05 \x01(\x0b\x32\x44.aea.brainbot.raiden.v0_0_1.RaidenMessage.Close_Channel_PerformativeH\x00\x12Q\n\x07\x64\x65posit\x18\x06 \x01(\x0b\x32>.aea.brainbot.raiden.v0_0_1.RaidenMessage.Deposit_PerformativeH\x00\x12Q\n\x07\x66\x61ilure\x18\x07 \x01(\x0b\x32>.aea.brainbot.raiden.v0_0_1.RaidenMessage.Failure_PerformativeH\x00\x12[\n\x0copen_channel\x18\x08 \x01(\x0b\x32\x43.aea.brainbot.raiden.v0_0_1.RaidenMessage.Open_Channel_PerformativeH\x00\x12U\n\tstop_node\x18\t \x01(\x0b\x32@.aea.brainbot.raiden.v0_0_1.RaidenMessage.Stop_Node_PerformativeH\x00\x12Q\n\x07success\x18\n \x01(\x0b\x32>.aea.brainbot.raiden.v0_0_1.RaidenMessage.Success_PerformativeH\x00\x12S\n\x08transfer\x18\x0b \x01(\x0b\x32?.aea.brainbot.raiden.v0_0_1.RaidenMessage.Transfer_PerformativeH\x00\x1a\x62\n\x19Open_Channel_Performative\x12\x17\n\x0fpartner_address\x18\x01 \x01(\t\x12\x15\n\rtoken_address\x18\x02 \x01(\t\x12\x15\n\rtotal_deposit\x18\x03 \x01(\t\x1aL\n\x1a\x43lose_Channel_Performative\x12\x17\n\x0fpartner_address\x18\x01 \x01(\t\x12\x15\n\rtoken_address\x18\x02 \x01(\t\x1aV\n\x14\x44\x65posit_Performative\x12\x17\n\x0fpartner_address\x18\x01 \x01(\t\x12\x15\n\rtoken_address\x18\x02 \x01(\t\x12\x0e\n\x06\x61mount\x18\x03 \x01(\t\x1aW\n\x15Transfer_Performative\x12\x17\n\x0fpartner_address\x18\x01 \x01(\t\x12\x15\n\rtoken_address\x18\x02 \x01(\t\x12\x0e\n\x06\x61mount\x18\x03 \x01(\t\x1aM\n\x14Success_Performative\x12\x0e\n\x06\x61\x63tion\x18\x01 \x01(\t\x12\x0e\n\x06\x64\x65tail\x18\x02 \x01(\t\x12\x15\n\rdetail_is_set\x18\x03 \x01(\x08\x1aM\n\x14\x46\x61ilure_Performative\x12\x0e\n\x06\x61\x63tion\x18\x01 \x01(\t\x12\x0e\n\x06\x64\x65tail\x18\x02 \x01(\t\x12\x15\n\rdetail_is_set\x18\x03 \x01(\x08\x1a\x18\n\x16Stop_Node_PerformativeB\x0e\n\x0cperformativeb\x06proto3'
+    b'\n\x0craiden.proto\x12\x1a\x61\x65\x61.brainbot.raiden.v0_2_0"\x93\x18\n\rRaidenMessage\x12]\n\rclose_channel\x18\x05 \x01(\x0b\x32\x44.aea.brainbot.raiden.v0_2_0.RaidenMessage.Close_Channel_PerformativeH\x00\x12Q\n\x07\x64\x65posit\x18\x06 \x01(\x0b\x32>.aea.brainbot.raiden.v0_2_0.RaidenMessage.Deposit_PerformativeH\x00\x12Q\n\x07\x66\x61ilure\x18\x07 \x01(\x0b\x32>.aea.brainbot.raiden.v0_2_0.RaidenMessage.Failure_PerformativeH\x00\x12[\n\x0copen_channel\x18\x08 \x01(\x0b\x32\x43.aea.brainbot.raiden.v0_2_0.RaidenMessage.Open_Channel_PerformativeH\x00\x12U\n\tstop_node\x18\t \x01(\x0b\x32@.aea.brainbot.raiden.v0_2_0.RaidenMessage.Stop_Node_PerformativeH\x00\x12Q\n\x07success\x18\n \x01(\x0b\x32>.aea.brainbot.raiden.v0_2_0.RaidenMessage.Success_PerformativeH\x00\x12S\n\x08transfer\x18\x0b \x01(\x0b\x32?.aea.brainbot.raiden.v0_2_0.RaidenMessage.Transfer_PerformativeH\x00\x12_\n\x0e\x62\x61tch_transfer\x18\x0c \x01(\x0b\x32\x45.aea.brainbot.raiden.v0_2_0.RaidenMessage.Batch_Transfer_PerformativeH\x00\x12\x63\n\x10payment_received\x18\r \x01(\x0b\x32G.aea.brainbot.raiden.v0_2_0.RaidenMessage.Payment_Received_PerformativeH\x00\x1a\x18\n\x07\x41\x64\x64ress\x12\r\n\x05value\x18\x01 \x01(\x0c\x1a\x1b\n\tAddresses\x12\x0e\n\x06values\x18\x01 \x03(\x0c\x1a\x17\n\x06\x41mount\x12\r\n\x05value\x18\x01 \x01(\x0c\x1a\x19\n\x07\x41mounts\x12\x0e\n\x06values\x18\x01 \x03(\x0c\x1a\xd6\x02\n\x19Open_Channel_Performative\x12\x1e\n\x16legacy_partner_address\x18\x01 \x01(\t\x12\x1c\n\x14legacy_token_address\x18\x02 \x01(\t\x12\x1c\n\x14legacy_total_deposit\x18\x03 \x01(\t\x12G\n\rtotal_deposit\x18\x04 \x01(\x0b\x32\x30.aea.brainbot.raiden.v0_2_0.RaidenMessage.Amount\x12J\n\x0fpartner_address\x18\x05 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x12H\n\rtoken_address\x18\x06 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x1a\xf0\x01\n\x1a\x43lose_Channel_Performative\x12\x1e\n\x16legacy_partner_address\x18\x01 \x01(\t\x12\x1c\n\x14legacy_token_address\x18\x02 \x01(\t\x12J\n\x0fpartner_address\x18\x03 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x12H\n\rtoken_address\x18\x04 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x1a\xc3\x02\n\x14\x44\x65posit_Performative\x12\x1e\n\x16legacy_partner_address\x18\x01 \x01(\t\x12\x1c\n\x14legacy_token_address\x18\x02 \x01(\t\x12\x15\n\rlegacy_amount\x18\x03 \x01(\t\x12@\n\x06\x61mount\x18\x04 \x01(\x0b\x32\x30.aea.brainbot.raiden.v0_2_0.RaidenMessage.Amount\x12J\n\x0fpartner_address\x18\x05 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x12H\n\rtoken_address\x18\x06 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x1a\xc4\x02\n\x15Transfer_Performative\x12\x1e\n\x16legacy_partner_address\x18\x01 \x01(\t\x12\x1c\n\x14legacy_token_address\x18\x02 \x01(\t\x12\x15\n\rlegacy_amount\x18\x03 \x01(\t\x12@\n\x06\x61mount\x18\x04 \x01(\x0b\x32\x30.aea.brainbot.raiden.v0_2_0.RaidenMessage.Amount\x12J\n\x0fpartner_address\x18\x05 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x12H\n\rtoken_address\x18\x06 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x1a\xd9\x02\n\x1b\x42\x61tch_Transfer_Performative\x12 \n\x18legacy_partner_addresses\x18\x01 \x03(\t\x12\x1e\n\x16legacy_token_addresses\x18\x02 \x03(\t\x12\x16\n\x0elegacy_amounts\x18\x03 \x03(\t\x12\x42\n\x07\x61mounts\x18\x04 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Amounts\x12N\n\x11partner_addresses\x18\x05 \x01(\x0b\x32\x33.aea.brainbot.raiden.v0_2_0.RaidenMessage.Addresses\x12L\n\x0ftoken_addresses\x18\x06 \x01(\x0b\x32\x33.aea.brainbot.raiden.v0_2_0.RaidenMessage.Addresses\x1a\xf2\x02\n\x1dPayment_Received_Performative\x12\x1e\n\x16legacy_partner_address\x18\x01 \x01(\t\x12\x1c\n\x14legacy_token_address\x18\x02 \x01(\t\x12\x15\n\rlegacy_amount\x18\x03 \x01(\t\x12\x12\n\nidentifier\x18\x04 \x01(\t\x12\x10\n\x08log_time\x18\x05 \x01(\t\x12@\n\x06\x61mount\x18\x06 \x01(\x0b\x32\x30.aea.brainbot.raiden.v0_2_0.RaidenMessage.Amount\x12J\n\x0fpartner_address\x18\x07 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x12H\n\rtoken_address\x18\x08 \x01(\x0b\x32\x31.aea.brainbot.raiden.v0_2_0.RaidenMessage.Address\x1aM\n\x14Success_Performative\x12\x0e\n\x06\x61\x63tion\x18\x01 \x01(\t\x12\x0e\n\x06\x64\x65tail\x18\x02 \x01(\t\x12\x15\n\rdetail_is_set\x18\x03 \x01(\x08\x1aM\n\x14\x46\x61ilure_Performative\x12\x0e\n\x06\x61\x63tion\x18\x01 \x01(\t\x12\x0e\n\x06\x64\x65tail\x18\x02 \x01(\t\x12\x15\n\rdetail_is_set\x18\x03 \x01(\x08\x1a\x18\n\x16Stop_Node_PerformativeB\x0e\n\x0cperformativeb\x06proto3'
 )
 
 
 _RAIDENMESSAGE = DESCRIPTOR.message_types_by_name["RaidenMessage"]
+_RAIDENMESSAGE_ADDRESS = _RAIDENMESSAGE.nested_types_by_name[
+    "Address"
+]
+_RAIDENMESSAGE_ADDRESSES = _RAIDENMESSAGE.nested_types_by_name[
+    "Addresses"
+]
+_RAIDENMESSAGE_AMOUNT = _RAIDENMESSAGE.nested_types_by_name[
+    "Amount"
+]
+_RAIDENMESSAGE_AMOUNTS = _RAIDENMESSAGE.nested_types_by_name[
+    "Amounts"
+]
 _RAIDENMESSAGE_OPEN_CHANNEL_PERFORMATIVE = _RAIDENMESSAGE.nested_types_by_name[
     "Open_Channel_Performative"
 ]
@@ -31,6 +43,12 @@ _RAIDENMESSAGE_DEPOSIT_PERFORMATIVE = _RAIDENMESSAGE.nested_types_by_name[
 _RAIDENMESSAGE_TRANSFER_PERFORMATIVE = _RAIDENMESSAGE.nested_types_by_name[
     "Transfer_Performative"
 ]
+_RAIDENMESSAGE_BATCH_TRANSFER_PERFORMATIVE = _RAIDENMESSAGE.nested_types_by_name[
+    "Batch_Transfer_Performative"
+]
+_RAIDENMESSAGE_PAYMENT_RECEIVED_PERFORMATIVE = _RAIDENMESSAGE.nested_types_by_name[
+    "Payment_Received_Performative"
+]
 _RAIDENMESSAGE_SUCCESS_PERFORMATIVE = _RAIDENMESSAGE.nested_types_by_name[
     "Success_Performative"
 ]
@@ -44,13 +62,49 @@ RaidenMessage = _reflection.GeneratedProtocolMessageType(
     "RaidenMessage",
     (_message.Message,),
     {
+        "Address": _reflection.GeneratedProtocolMessageType(
+            "Address",
+            (_message.Message,),
+            {
+                "DESCRIPTOR": _RAIDENMESSAGE_ADDRESS,
+                "__module__": "raiden_pb2"
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Address)
+            },
+        ),
+        "Addresses": _reflection.GeneratedProtocolMessageType(
+            "Addresses",
+            (_message.Message,),
+            {
+                "DESCRIPTOR": _RAIDENMESSAGE_ADDRESSES,
+                "__module__": "raiden_pb2"
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Addresses)
+            },
+        ),
+        "Amount": _reflection.GeneratedProtocolMessageType(
+            "Amount",
+            (_message.Message,),
+            {
+                "DESCRIPTOR": _RAIDENMESSAGE_AMOUNT,
+                "__module__": "raiden_pb2"
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Amount)
+            },
+        ),
+        "Amounts": _reflection.GeneratedProtocolMessageType(
+            "Amounts",
+            (_message.Message,),
+            {
+                "DESCRIPTOR": _RAIDENMESSAGE_AMOUNTS,
+                "__module__": "raiden_pb2"
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Amounts)
+            },
+        ),
         "Open_Channel_Performative": _reflection.GeneratedProtocolMessageType(
             "Open_Channel_Performative",
             (_message.Message,),
             {
                 "DESCRIPTOR": _RAIDENMESSAGE_OPEN_CHANNEL_PERFORMATIVE,
                 "__module__": "raiden_pb2"
-                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_0_1.RaidenMessage.Open_Channel_Performative)
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Open_Channel_Performative)
             },
         ),
         "Close_Channel_Performative": _reflection.GeneratedProtocolMessageType(
@@ -59,7 +113,7 @@ RaidenMessage = _reflection.GeneratedProtocolMessageType(
             {
                 "DESCRIPTOR": _RAIDENMESSAGE_CLOSE_CHANNEL_PERFORMATIVE,
                 "__module__": "raiden_pb2"
-                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_0_1.RaidenMessage.Close_Channel_Performative)
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Close_Channel_Performative)
             },
         ),
         "Deposit_Performative": _reflection.GeneratedProtocolMessageType(
@@ -68,7 +122,7 @@ RaidenMessage = _reflection.GeneratedProtocolMessageType(
             {
                 "DESCRIPTOR": _RAIDENMESSAGE_DEPOSIT_PERFORMATIVE,
                 "__module__": "raiden_pb2"
-                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_0_1.RaidenMessage.Deposit_Performative)
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Deposit_Performative)
             },
         ),
         "Transfer_Performative": _reflection.GeneratedProtocolMessageType(
@@ -77,7 +131,25 @@ RaidenMessage = _reflection.GeneratedProtocolMessageType(
             {
                 "DESCRIPTOR": _RAIDENMESSAGE_TRANSFER_PERFORMATIVE,
                 "__module__": "raiden_pb2"
-                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_0_1.RaidenMessage.Transfer_Performative)
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Transfer_Performative)
+            },
+        ),
+        "Batch_Transfer_Performative": _reflection.GeneratedProtocolMessageType(
+            "Batch_Transfer_Performative",
+            (_message.Message,),
+            {
+                "DESCRIPTOR": _RAIDENMESSAGE_BATCH_TRANSFER_PERFORMATIVE,
+                "__module__": "raiden_pb2"
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Batch_Transfer_Performative)
+            },
+        ),
+        "Payment_Received_Performative": _reflection.GeneratedProtocolMessageType(
+            "Payment_Received_Performative",
+            (_message.Message,),
+            {
+                "DESCRIPTOR": _RAIDENMESSAGE_PAYMENT_RECEIVED_PERFORMATIVE,
+                "__module__": "raiden_pb2"
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Payment_Received_Performative)
             },
         ),
         "Success_Performative": _reflection.GeneratedProtocolMessageType(
@@ -86,7 +158,7 @@ RaidenMessage = _reflection.GeneratedProtocolMessageType(
             {
                 "DESCRIPTOR": _RAIDENMESSAGE_SUCCESS_PERFORMATIVE,
                 "__module__": "raiden_pb2"
-                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_0_1.RaidenMessage.Success_Performative)
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Success_Performative)
             },
         ),
         "Failure_Performative": _reflection.GeneratedProtocolMessageType(
@@ -95,7 +167,7 @@ RaidenMessage = _reflection.GeneratedProtocolMessageType(
             {
                 "DESCRIPTOR": _RAIDENMESSAGE_FAILURE_PERFORMATIVE,
                 "__module__": "raiden_pb2"
-                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_0_1.RaidenMessage.Failure_Performative)
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Failure_Performative)
             },
         ),
         "Stop_Node_Performative": _reflection.GeneratedProtocolMessageType(
@@ -104,19 +176,25 @@ RaidenMessage = _reflection.GeneratedProtocolMessageType(
             {
                 "DESCRIPTOR": _RAIDENMESSAGE_STOP_NODE_PERFORMATIVE,
                 "__module__": "raiden_pb2"
-                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_0_1.RaidenMessage.Stop_Node_Performative)
+                # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage.Stop_Node_Performative)
             },
         ),
         "DESCRIPTOR": _RAIDENMESSAGE,
         "__module__": "raiden_pb2"
-        # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_0_1.RaidenMessage)
+        # @@protoc_insertion_point(class_scope:aea.brainbot.raiden.v0_2_0.RaidenMessage)
     },
 )
 _sym_db.RegisterMessage(RaidenMessage)
+_sym_db.RegisterMessage(RaidenMessage.Address)
+_sym_db.RegisterMessage(RaidenMessage.Addresses)
+_sym_db.RegisterMessage(RaidenMessage.Amount)
+_sym_db.RegisterMessage(RaidenMessage.Amounts)
 _sym_db.RegisterMessage(RaidenMessage.Open_Channel_Performative)
 _sym_db.RegisterMessage(RaidenMessage.Close_Channel_Performative)
 _sym_db.RegisterMessage(RaidenMessage.Deposit_Performative)
 _sym_db.RegisterMessage(RaidenMessage.Transfer_Performative)
+_sym_db.RegisterMessage(RaidenMessage.Batch_Transfer_Performative)
+_sym_db.RegisterMessage(RaidenMessage.Payment_Received_Performative)
 _sym_db.RegisterMessage(RaidenMessage.Success_Performative)
 _sym_db.RegisterMessage(RaidenMessage.Failure_Performative)
 _sym_db.RegisterMessage(RaidenMessage.Stop_Node_Performative)
@@ -125,19 +203,31 @@ if _descriptor._USE_C_DESCRIPTORS == False:
 
     DESCRIPTOR._options = None
     _RAIDENMESSAGE._serialized_start = 45
-    _RAIDENMESSAGE._serialized_end = 1224
-    _RAIDENMESSAGE_OPEN_CHANNEL_PERFORMATIVE._serialized_start = 671
-    _RAIDENMESSAGE_OPEN_CHANNEL_PERFORMATIVE._serialized_end = 769
-    _RAIDENMESSAGE_CLOSE_CHANNEL_PERFORMATIVE._serialized_start = 771
-    _RAIDENMESSAGE_CLOSE_CHANNEL_PERFORMATIVE._serialized_end = 847
-    _RAIDENMESSAGE_DEPOSIT_PERFORMATIVE._serialized_start = 849
-    _RAIDENMESSAGE_DEPOSIT_PERFORMATIVE._serialized_end = 935
-    _RAIDENMESSAGE_TRANSFER_PERFORMATIVE._serialized_start = 937
-    _RAIDENMESSAGE_TRANSFER_PERFORMATIVE._serialized_end = 1024
-    _RAIDENMESSAGE_SUCCESS_PERFORMATIVE._serialized_start = 1026
-    _RAIDENMESSAGE_SUCCESS_PERFORMATIVE._serialized_end = 1103
-    _RAIDENMESSAGE_FAILURE_PERFORMATIVE._serialized_start = 1105
-    _RAIDENMESSAGE_FAILURE_PERFORMATIVE._serialized_end = 1182
-    _RAIDENMESSAGE_STOP_NODE_PERFORMATIVE._serialized_start = 1184
-    _RAIDENMESSAGE_STOP_NODE_PERFORMATIVE._serialized_end = 1208
+    _RAIDENMESSAGE._serialized_end = 3136
+    _RAIDENMESSAGE_ADDRESS._serialized_start = 869
+    _RAIDENMESSAGE_ADDRESS._serialized_end = 893
+    _RAIDENMESSAGE_ADDRESSES._serialized_start = 895
+    _RAIDENMESSAGE_ADDRESSES._serialized_end = 922
+    _RAIDENMESSAGE_AMOUNT._serialized_start = 924
+    _RAIDENMESSAGE_AMOUNT._serialized_end = 947
+    _RAIDENMESSAGE_AMOUNTS._serialized_start = 949
+    _RAIDENMESSAGE_AMOUNTS._serialized_end = 974
+    _RAIDENMESSAGE_OPEN_CHANNEL_PERFORMATIVE._serialized_start = 977
+    _RAIDENMESSAGE_OPEN_CHANNEL_PERFORMATIVE._serialized_end = 1319
+    _RAIDENMESSAGE_CLOSE_CHANNEL_PERFORMATIVE._serialized_start = 1322
+    _RAIDENMESSAGE_CLOSE_CHANNEL_PERFORMATIVE._serialized_end = 1562
+    _RAIDENMESSAGE_DEPOSIT_PERFORMATIVE._serialized_start = 1565
+    _RAIDENMESSAGE_DEPOSIT_PERFORMATIVE._serialized_end = 1888
+    _RAIDENMESSAGE_TRANSFER_PERFORMATIVE._serialized_start = 1891
+    _RAIDENMESSAGE_TRANSFER_PERFORMATIVE._serialized_end = 2215
+    _RAIDENMESSAGE_BATCH_TRANSFER_PERFORMATIVE._serialized_start = 2218
+    _RAIDENMESSAGE_BATCH_TRANSFER_PERFORMATIVE._serialized_end = 2563
+    _RAIDENMESSAGE_PAYMENT_RECEIVED_PERFORMATIVE._serialized_start = 2566
+    _RAIDENMESSAGE_PAYMENT_RECEIVED_PERFORMATIVE._serialized_end = 2936
+    _RAIDENMESSAGE_SUCCESS_PERFORMATIVE._serialized_start = 2938
+    _RAIDENMESSAGE_SUCCESS_PERFORMATIVE._serialized_end = 3015
+    _RAIDENMESSAGE_FAILURE_PERFORMATIVE._serialized_start = 3017
+    _RAIDENMESSAGE_FAILURE_PERFORMATIVE._serialized_end = 3094
+    _RAIDENMESSAGE_STOP_NODE_PERFORMATIVE._serialized_start = 3096
+    _RAIDENMESSAGE_STOP_NODE_PERFORMATIVE._serialized_end = 3120
 # @@protoc_insertion_point(module_scope)
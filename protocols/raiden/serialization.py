@@ -3,16 +3,83 @@
 """Serialization module for raiden protocol."""
 
 # pylint: disable=too-many-statements,too-many-locals,no-member,too-few-public-methods,redefined-builtin
-from typing import Any, Dict, cast
+from typing import Any, Dict, Tuple, cast
 
-from aea.mail.base_pb2 import DialogueMessage
 from aea.mail.base_pb2 import Message as ProtobufMessage
 from aea.protocols.base import Message, Serializer
 
 from packages.brainbot.protocols.raiden import raiden_pb2
+from packages.brainbot.protocols.raiden.custom_types import (
+    Address,
+    Addresses,
+    Amount,
+    Amounts,
+)
 from packages.brainbot.protocols.raiden.message import RaidenMessage
 
 
+_SCALAR = 0
+_REPEATED = 1
+_OPTIONAL = 2
+_CUSTOM = 3
+
+_CUSTOM_TYPES = {
+    "Address": Address,
+    "Addresses": Addresses,
+    "Amount": Amount,
+    "Amounts": Amounts,
+}
+_LEGACY_PREFIX = "legacy_"
+
+FieldTable = Dict[
+    RaidenMessage.Performative, Tuple[str, Tuple[Tuple[str, int, str, Any], ...]]
+]
+
+
+def _build_field_table() -> FieldTable:
+    """
+    Map every performative to its oneof field and the content fields of its message.
+
+    The table is read from the descriptor of raiden.proto, so encode and
+    decode share one mapping that cannot drift from the schema. Optional
+    contents are the fields with a companion `<name>_is_set` flag, which is
+    stored as the third item of their entry. Custom type contents store
+    their class as the fourth item and, as the third, the `legacy_<name>`
+    field of protocol versions 0.0.1 and 0.1.0 they are decoded from
+    when unset.
+    """
+    table = {}  # type: FieldTable
+    oneof = raiden_pb2.RaidenMessage.DESCRIPTOR.oneofs_by_name["performative"]
+    for performative_field in oneof.fields:
+        field_names = {field.name for field in performative_field.message_type.fields}
+        fields = []
+        for field in performative_field.message_type.fields:
+            if field.name.endswith("_is_set") or field.name.startswith(_LEGACY_PREFIX):
+                continue
+            flag = f"{field.name}_is_set"
+            custom_type = None
+            if field.message_type is not None:
+                kind = _CUSTOM
+                custom_type = _CUSTOM_TYPES[field.message_type.name]
+                legacy = f"{_LEGACY_PREFIX}{field.name}"
+                flag = legacy if legacy in field_names else ""
+            elif flag in field_names:
+                kind = _OPTIONAL
+            elif field.label == field.LABEL_REPEATED:
+                kind = _REPEATED
+            else:
+                kind = _SCALAR
+            fields.append((field.name, kind, flag, custom_type))
+        table[RaidenMessage.Performative(performative_field.name)] = (
+            performative_field.name,
+            tuple(fields),
+        )
+    return table
+
+
+_FIELD_TABLE = _build_field_table()
+
+
 class RaidenSerializer(Serializer):
     """Serialization for the 'raiden' protocol."""
 
@@ -21,151 +88,99 @@ class RaidenSerializer(Serializer):
         """
         Encode a 'Raiden' message into bytes.
 
+        The performative content is filled in place in its oneof field and
+        the envelope fields are set directly on the outer message, so nothing
+        is copied between protobuf objects.
+
         :param msg: the message object.
         :return: the bytes.
         """
         msg = cast(RaidenMessage, msg)
         message_pb = ProtobufMessage()
-        dialogue_message_pb = DialogueMessage()
+        dialogue_message_pb = message_pb.dialogue_message
         raiden_msg = raiden_pb2.RaidenMessage()
 
-        dialogue_message_pb.message_id = msg.message_id
-        dialogue_reference = msg.dialogue_reference
+        get = msg.get
+        dialogue_message_pb.message_id = get("message_id")
+        dialogue_reference = get("dialogue_reference")
         dialogue_message_pb.dialogue_starter_reference = dialogue_reference[0]
         dialogue_message_pb.dialogue_responder_reference = dialogue_reference[1]
-        dialogue_message_pb.target = msg.target
-
-        performative_id = msg.performative
-        if performative_id == RaidenMessage.Performative.OPEN_CHANNEL:
-            performative = raiden_pb2.RaidenMessage.Open_Channel_Performative()  # type: ignore
-            partner_address = msg.partner_address
-            performative.partner_address = partner_address
-            token_address = msg.token_address
-            performative.token_address = token_address
-            total_deposit = msg.total_deposit
-            performative.total_deposit = total_deposit
-            raiden_msg.open_channel.CopyFrom(performative)
-        elif performative_id == RaidenMessage.Performative.CLOSE_CHANNEL:
-            performative = raiden_pb2.RaidenMessage.Close_Channel_Performative()  # type: ignore
-            partner_address = msg.partner_address
-            performative.partner_address = partner_address
-            token_address = msg.token_address
-            performative.token_address = token_address
-            raiden_msg.close_channel.CopyFrom(performative)
-        elif performative_id == RaidenMessage.Performative.DEPOSIT:
-            performative = raiden_pb2.RaidenMessage.Deposit_Performative()  # type: ignore
-            partner_address = msg.partner_address
-            performative.partner_address = partner_address
-            token_address = msg.token_address
-            performative.token_address = token_address
-            amount = msg.amount
-            performative.amount = amount
-            raiden_msg.deposit.CopyFrom(performative)
-        elif performative_id == RaidenMessage.Performative.TRANSFER:
-            performative = raiden_pb2.RaidenMessage.Transfer_Performative()  # type: ignore
-            partner_address = msg.partner_address
-            performative.partner_address = partner_address
-            token_address = msg.token_address
-            performative.token_address = token_address
-            amount = msg.amount
-            performative.amount = amount
-            raiden_msg.transfer.CopyFrom(performative)
-        elif performative_id == RaidenMessage.Performative.SUCCESS:
-            performative = raiden_pb2.RaidenMessage.Success_Performative()  # type: ignore
-            action = msg.action
-            performative.action = action
-            if msg.is_set("detail"):
-                performative.detail_is_set = True
-                detail = msg.detail
-                performative.detail = detail
-            raiden_msg.success.CopyFrom(performative)
-        elif performative_id == RaidenMessage.Performative.FAILURE:
-            performative = raiden_pb2.RaidenMessage.Failure_Performative()  # type: ignore
-            action = msg.action
-            performative.action = action
-            if msg.is_set("detail"):
-                performative.detail_is_set = True
-                detail = msg.detail
-                performative.detail = detail
-            raiden_msg.failure.CopyFrom(performative)
-        elif performative_id == RaidenMessage.Performative.STOP_NODE:
-            performative = raiden_pb2.RaidenMessage.Stop_Node_Performative()  # type: ignore
-            raiden_msg.stop_node.CopyFrom(performative)
-        else:
+        dialogue_message_pb.target = get("target")
+
+        performative_id = get("performative")
+        entry = _FIELD_TABLE.get(performative_id)
+        if entry is None:
             raise ValueError("Performative not valid: {}".format(performative_id))
+        oneof_name, fields = entry
+        performative = getattr(raiden_msg, oneof_name)
+        performative.SetInParent()
+        for name, kind, flag, custom_type in fields:
+            value = get(name)
+            if kind == _SCALAR:
+                setattr(performative, name, value)
+            elif kind == _REPEATED:
+                getattr(performative, name).extend(value)
+            elif kind == _CUSTOM:
+                custom_type.encode(getattr(performative, name), value)
+            elif value is not None:
+                setattr(performative, name, value)
+                setattr(performative, flag, True)
 
         dialogue_message_pb.content = raiden_msg.SerializeToString()
-
-        message_pb.dialogue_message.CopyFrom(dialogue_message_pb)
-        message_bytes = message_pb.SerializeToString()
-        return message_bytes
+        return message_pb.SerializeToString()
 
     @staticmethod
-    def decode(obj: bytes) -> Message:
+    def decode(obj: bytes, trusted: bool = False) -> Message:
         """
         Decode bytes into a 'Raiden' message.
 
+        Addresses and amounts of messages encoded by protocol versions 0.0.1
+        and 0.1.0 are parsed from their hex and decimal strings, so peers can
+        migrate while the agent reads both. A `trusted` message is not
+        validated again, the field table and the custom types already
+        guarantee its content names and types. The agent decodes envelopes
+        without it; only a caller decoding bytes it encoded itself should
+        pass it.
+
         :param obj: the bytes object.
+        :param trusted: whether to build the message without validating it.
         :return: the 'Raiden' message.
         """
         message_pb = ProtobufMessage()
         raiden_pb = raiden_pb2.RaidenMessage()
         message_pb.ParseFromString(obj)
-        message_id = message_pb.dialogue_message.message_id
+        dialogue_message_pb = message_pb.dialogue_message
+        message_id = dialogue_message_pb.message_id
         dialogue_reference = (
-            message_pb.dialogue_message.dialogue_starter_reference,
-            message_pb.dialogue_message.dialogue_responder_reference,
+            dialogue_message_pb.dialogue_starter_reference,
+            dialogue_message_pb.dialogue_responder_reference,
         )
-        target = message_pb.dialogue_message.target
+        target = dialogue_message_pb.target
 
-        raiden_pb.ParseFromString(message_pb.dialogue_message.content)
+        raiden_pb.ParseFromString(dialogue_message_pb.content)
         performative = raiden_pb.WhichOneof("performative")
         performative_id = RaidenMessage.Performative(str(performative))
-        performative_content = dict()  # type: Dict[str, Any]
-        if performative_id == RaidenMessage.Performative.OPEN_CHANNEL:
-            partner_address = raiden_pb.open_channel.partner_address
-            performative_content["partner_address"] = partner_address
-            token_address = raiden_pb.open_channel.token_address
-            performative_content["token_address"] = token_address
-            total_deposit = raiden_pb.open_channel.total_deposit
-            performative_content["total_deposit"] = total_deposit
-        elif performative_id == RaidenMessage.Performative.CLOSE_CHANNEL:
-            partner_address = raiden_pb.close_channel.partner_address
-            performative_content["partner_address"] = partner_address
-            token_address = raiden_pb.close_channel.token_address
-            performative_content["token_address"] = token_address
-        elif performative_id == RaidenMessage.Performative.DEPOSIT:
-            partner_address = raiden_pb.deposit.partner_address
-            performative_content["partner_address"] = partner_address
-            token_address = raiden_pb.deposit.token_address
-            performative_content["token_address"] = token_address
-            amount = raiden_pb.deposit.amount
-            performative_content["amount"] = amount
-        elif performative_id == RaidenMessage.Performative.TRANSFER:
-            partner_address = raiden_pb.transfer.partner_address
-            performative_content["partner_address"] = partner_address
-            token_address = raiden_pb.transfer.token_address
-            performative_content["token_address"] = token_address
-            amount = raiden_pb.transfer.amount
-            performative_content["amount"] = amount
-        elif performative_id == RaidenMessage.Performative.SUCCESS:
-            action = raiden_pb.success.action
-            performative_content["action"] = action
-            if raiden_pb.success.detail_is_set:
-                detail = raiden_pb.success.detail
-                performative_content["detail"] = detail
-        elif performative_id == RaidenMessage.Performative.FAILURE:
-            action = raiden_pb.failure.action
-            performative_content["action"] = action
-            if raiden_pb.failure.detail_is_set:
-                detail = raiden_pb.failure.detail
-                performative_content["detail"] = detail
-        elif performative_id == RaidenMessage.Performative.STOP_NODE:
-            pass
-        else:
+        entry = _FIELD_TABLE.get(performative_id)
+        if entry is None:
             raise ValueError("Performative not valid: {}.".format(performative_id))
-
-        return RaidenMessage(
+        oneof_name, fields = entry
+        content = getattr(raiden_pb, oneof_name)
+        performative_content = dict()  # type: Dict[str, Any]
+        for name, kind, flag, custom_type in fields:
+            if kind == _SCALAR:
+                performative_content[name] = getattr(content, name)
+            elif kind == _REPEATED:
+                performative_content[name] = tuple(getattr(content, name))
+            elif kind == _CUSTOM:
+                if content.HasField(name) or not flag:
+                    performative_content[name] = custom_type.decode(getattr(content, name))
+                else:
+                    performative_content[name] = custom_type(getattr(content, flag))
+            elif getattr(content, flag):
+                performative_content[name] = getattr(content, name)
+
+        build = RaidenMessage.trusted if trusted else RaidenMessage
+        return build(
             message_id=message_id,
             dialogue_reference=dialogue_reference,
             target=target,
@@ -0,0 +1,248 @@
+"""This module contains the creation of the Raiden node accounts and the pool of pre-generated ones."""
+
+import json
+import logging
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Dict, List, Optional
+
+from eth_keyfile import create_keyfile_json
+
+from packages.brainbot.protocols.raiden.custom_types import to_checksum_address
+
+
+DEFAULT_ACCOUNT_POOL_DIR = "/usr/lib/raiden/account_pool"
+DEFAULT_ACCOUNT_POOL_SIZE = 2
+DEFAULT_KEYSTORE_WORKERS = 2
+# the scrypt parameters of geth's standard keystore
+SCRYPT_N = 262144
+SECP256K1_ORDER = 0xFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFFEBAAEDCE6AF48A03BBFD25E8CD0364141
+POOLED_ACCOUNT_SUFFIX = ".json"
+CLAIMED_ACCOUNT_SUFFIX = ".claimed"
+# a take holds its claim for a file read, an older claim is left by a process that died
+STALE_CLAIM_AGE = 60.0  # time in seconds
+
+
+def generate_account(scrypt_n: int = SCRYPT_N) -> Dict[str, Any]:
+    """
+    Create a new account with a random password and its scrypt encrypted keystore.
+
+    The key derivation takes about a second of CPU and 256 MB of memory at
+    geth's parameters, so it runs in a worker process.
+
+    :param scrypt_n: the scrypt cost parameter
+    :return: the account as `address`, `password` and the V3 `keyfile`
+    """
+    while True:
+        private_key = secrets.token_bytes(32)
+        if 0 < int.from_bytes(private_key, "big") < SECP256K1_ORDER:
+            break
+    password = secrets.token_hex(32)
+    keyfile = create_keyfile_json(
+        private_key, password.encode("utf-8"), kdf="scrypt", iterations=scrypt_n
+    )
+    address = to_checksum_address(bytes.fromhex(keyfile["address"][-40:]))
+    return {"address": address, "password": password, "keyfile": keyfile}
+
+
+def _write_file(path: str, content: str) -> None:
+    """Atomically write a file only its owner can read."""
+    tmp_path = f"{path}.tmp"
+    fd = os.open(tmp_path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, "w") as f:
+        f.write(content)
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, path)
+
+
+def install_account(
+    account: Dict[str, Any], keystore_path: str, password_file: str, address_file: str
+) -> None:
+    """
+    Put an account where a Raiden node reads it from.
+
+    The keystore file is named as geth names it, so the node finds it by address.
+
+    :param account: the account, as generated by generate_account
+    :param keystore_path: the keystore directory of the node
+    :param password_file: the password file of the node
+    :param address_file: the file of the node's address
+    """
+    os.makedirs(keystore_path, exist_ok=True)
+    created_at = time.strftime("%Y-%m-%dT%H-%M-%S.000000000Z", time.gmtime())
+    keyfile_name = f"UTC--{created_at}--{account['address'][2:].lower()}"
+    _write_file(os.path.join(keystore_path, keyfile_name), json.dumps(account["keyfile"]))
+    _write_file(password_file, account["password"])
+    _write_file(address_file, account["address"])
+
+
+class AccountPool:
+    """
+    A directory of pre-generated accounts, so a new node does not wait for key derivation.
+
+    Accounts are generated in the background on an executor, meant to be a
+    process pool, until `size` of them are ready. A node takes one at once if
+    there is one, otherwise it waits for one generated for it alone. The pool
+    is refilled as accounts are taken and when a generation fails.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        executor: Executor,
+        size: int = DEFAULT_ACCOUNT_POOL_SIZE,
+        scrypt_n: int = SCRYPT_N,
+        logger: Optional[logging.Logger] = None,
+    ) -> None:
+        """
+        Initialize the pool.
+
+        :param path: the directory of the pooled accounts
+        :param executor: the executor the accounts are generated on
+        :param size: the number of accounts kept ready
+        :param scrypt_n: the scrypt cost parameter of the keystores
+        :param logger: the logger of failed generations
+        """
+        self.path = path
+        self.size = size
+        self.scrypt_n = scrypt_n
+        self.generated = 0
+        self.taken = 0
+        self._executor = executor
+        self._logger = logger or logging.getLogger(__name__)
+        # reentrant, a generation done already adds itself from within fill
+        self._lock = threading.RLock()
+        self._pending = []  # type: List[Future]
+
+    def _pooled(self) -> List[str]:
+        """Get the files of the pooled accounts, oldest first, after returning stale claims to the pool."""
+        try:
+            names = os.listdir(self.path)
+        except FileNotFoundError:
+            return []
+        for name in names:
+            if name.endswith(CLAIMED_ACCOUNT_SUFFIX):
+                self._release_stale_claim(name)
+        try:
+            names = [name for name in os.listdir(self.path) if name.endswith(POOLED_ACCOUNT_SUFFIX)]
+        except FileNotFoundError:
+            return []
+        pooled = []
+        for name in names:
+            path = os.path.join(self.path, name)
+            try:
+                pooled.append((os.path.getmtime(path), path))
+            except FileNotFoundError:
+                # taken meanwhile
+                continue
+        return [path for _, path in sorted(pooled)]
+
+    def _release_stale_claim(self, name: str) -> None:
+        """
+        Put an account claimed by a process that died during take back into the pool.
+
+        The claim is removed before take returns, so the account never reached a node.
+        """
+        claimed_path = os.path.join(self.path, name)
+        try:
+            # the rename of the claim sets the change time
+            claimed_for = time.time() - os.stat(claimed_path).st_ctime
+        except FileNotFoundError:
+            return
+        if claimed_for < STALE_CLAIM_AGE:
+            return
+        # <address>.json.<pid>.claimed
+        path = os.path.join(self.path, name.rsplit(".", 2)[0])
+        try:
+            os.rename(claimed_path, path)
+        except FileNotFoundError:
+            # released by another agent sharing the pool
+            return
+        self._logger.warning(f"Returned the stale claim {name} to the account pool")
+
+    @property
+    def ready(self) -> int:
+        """Get the number of pooled accounts."""
+        return len(self._pooled())
+
+    def take(self) -> Optional[Dict[str, Any]]:
+        """
+        Take a pooled account out of the pool.
+
+        :return: the account, or None if the pool is empty
+        """
+        for path in self._pooled():
+            claimed_path = f"{path}.{os.getpid()}{CLAIMED_ACCOUNT_SUFFIX}"
+            try:
+                # the rename claims the account, also against another agent sharing the pool
+                os.rename(path, claimed_path)
+            except FileNotFoundError:
+                continue
+            try:
+                with open(claimed_path, "r") as f:
+                    account = json.load(f)
+            finally:
+                os.remove(claimed_path)
+            self.taken += 1
+            self.fill()
+            return account
+        return None
+
+    def provision(self) -> Future:
+        """
+        Get an account, a pooled one if there is one.
+
+        :return: a future of the account
+        """
+        account = self.take()
+        if account is not None:
+            future = Future()  # type: Future
+            future.set_result(account)
+            return future
+        # ahead of the generations that refill the pool
+        future = self._executor.submit(generate_account, self.scrypt_n)
+        self.fill()
+        return future
+
+    def fill(self) -> None:
+        """Generate accounts in the background until the pool holds `size` of them."""
+        with self._lock:
+            # counted again per generation, one done already may have refilled the pool
+            while self.size - self.ready - len(self._pending) > 0:
+                future = self._executor.submit(generate_account, self.scrypt_n)
+                self._pending.append(future)
+                future.add_done_callback(self._add)
+
+    def _add(self, future: Future) -> None:
+        """Put a generated account into the pool, or generate another one if it failed."""
+        with self._lock:
+            if future in self._pending:
+                self._pending.remove(future)
+        if future.cancelled():
+            return
+        try:
+            account = future.result()
+            os.makedirs(self.path, mode=0o700, exist_ok=True)
+            _write_file(
+                os.path.join(self.path, f"{account['address']}{POOLED_ACCOUNT_SUFFIX}"),
+                json.dumps(account),
+            )
+            self.generated += 1
+        except Exception as e:  # pylint: disable=broad-except
+            self._logger.error(f"Could not add a generated account to the pool: {e!r}")
+            try:
+                self.fill()
+            except RuntimeError as refill_error:
+                # the executor shut down, or its worker processes died
+                self._logger.error(f"Could not refill the account pool: {refill_error!r}")
+
+    def cancel(self) -> None:
+        """Cancel the generations that did not start yet."""
+        with self._lock:
+            for future in self._pending:
+                future.cancel()
+            self._pending = []
@@ -0,0 +1,114 @@
+"""This module contains the admission control of the requests of the channel manager."""
+
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, Optional
+
+
+DEFAULT_RATE_LIMIT = 100.0  # requests per second and sender
+DEFAULT_RATE_LIMIT_BURST = 200
+DEFAULT_MAX_IN_FLIGHT = 1000
+DEFAULT_OVERLOAD_RETRY_AFTER = 100  # time in milliseconds
+DEFAULT_MAX_SENDERS = 10000
+OVERLOADED_DETAIL = "overloaded, retry after {} ms"
+
+
+class TokenBucket:
+    """A token bucket refilled at `rate` tokens per second up to `burst` tokens."""
+
+    __slots__ = ("rate", "burst", "tokens", "updated_at")
+
+    def __init__(self, rate: float, burst: float, now: float) -> None:
+        """Initialize a full bucket."""
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated_at = now
+
+    def take(self, now: float) -> float:
+        """
+        Take a token if there is one.
+
+        :param now: the current monotonic time
+        :return: 0 if a token was taken, otherwise the time in seconds until there is one
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+        if self.tokens >= 1:
+            self.tokens -= 1
+            return 0.0
+        return (1 - self.tokens) / self.rate
+
+
+class AdmissionControl:
+    """
+    Per-sender rate limits and a global cap on the requests in flight.
+
+    Each sender has a token bucket of `burst` requests refilled at `rate`
+    requests per second, a request without a token is refused until the next
+    one. At most `max_in_flight` admitted requests may wait for their reply at
+    a time. A refusal tells how long to back off, so the agent answers an
+    overload at once instead of queueing it. A limit of 0 disables it.
+    """
+
+    def __init__(
+        self,
+        rate: float = DEFAULT_RATE_LIMIT,
+        burst: float = DEFAULT_RATE_LIMIT_BURST,
+        max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+        retry_after: int = DEFAULT_OVERLOAD_RETRY_AFTER,
+        max_senders: int = DEFAULT_MAX_SENDERS,
+    ) -> None:
+        """
+        Initialize the admission control.
+
+        :param rate: the requests per second of a sender
+        :param burst: the requests a sender may send at once
+        :param max_in_flight: the most requests in flight
+        :param retry_after: the back off in milliseconds when too many requests are in flight
+        :param max_senders: the most senders whose buckets are kept, the least recent are dropped
+        """
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.max_in_flight = max_in_flight
+        self.retry_after = retry_after
+        self.max_senders = max_senders
+        self.in_flight = 0
+        self.rate_limited = 0
+        self.overloaded = 0
+        self._lock = threading.Lock()
+        self._buckets = OrderedDict()  # type: OrderedDict[Hashable, TokenBucket]
+
+    def admit(self, sender: Hashable) -> Optional[int]:
+        """
+        Admit a request of `sender`, it is in flight until released.
+
+        :param sender: the sender of the request
+        :return: None if the request is admitted, otherwise the milliseconds to retry after
+        """
+        with self._lock:
+            if self.max_in_flight and self.in_flight >= self.max_in_flight:
+                self.overloaded += 1
+                return self.retry_after
+            if self.rate:
+                now = time.monotonic()
+                bucket = self._buckets.get(sender)
+                if bucket is None:
+                    bucket = self._buckets[sender] = TokenBucket(self.rate, self.burst, now)
+                    if len(self._buckets) > self.max_senders:
+                        self._buckets.popitem(last=False)
+                else:
+                    self._buckets.move_to_end(sender)
+                wait = bucket.take(now)
+                if wait:
+                    self.rate_limited += 1
+                    return max(1, math.ceil(wait * 1000))
+            self.in_flight += 1
+            return None
+
+    def release(self) -> None:
+        """Release an admitted request once it got its reply."""
+        with self._lock:
+            self.in_flight -= 1
@@ -1,21 +1,145 @@
-import subprocess
-import secrets
-from os.path import exists
-from time import sleep
-from typing import cast
+import multiprocessing
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from enum import Enum
+from functools import partial
+from os.path import exists, expanduser, getsize, splitext
+from typing import Any, Deque, Dict, List, Optional, Tuple, cast
 from aea.skills.behaviours import TickerBehaviour
-import raiden_api_client
-
-raiden = raiden_api_client.RaidenAPIWrapper(ip="127.0.0.1", port="5001")
+from packages.brainbot.skills.channel_manager.accounts import (
+    DEFAULT_ACCOUNT_POOL_DIR,
+    DEFAULT_ACCOUNT_POOL_SIZE,
+    DEFAULT_KEYSTORE_WORKERS,
+    AccountPool,
+    install_account,
+)
+from packages.brainbot.skills.channel_manager.channel_state import ChannelStateStore
+from packages.brainbot.protocols.raiden.message import RaidenMessage
+from packages.brainbot.skills.channel_manager.node_process import RaidenNodeProcess
+from packages.brainbot.skills.channel_manager.payments import (
+    DEFAULT_PAGE_SIZE,
+    PaymentCursor,
+    fetch_payments,
+)
+from packages.brainbot.skills.channel_manager.raiden_client import (
+    RaidenClient,
+    RaidenNodeClient,
+)
+from packages.brainbot.skills.channel_manager.raiden_log import (
+    EVENT_CHANNEL_CLOSED,
+    EVENT_CHANNEL_OPENED,
+    EVENT_ERROR,
+    EVENT_PAYMENT_RECEIVED,
+    JsonLogTailer,
+    parse_events,
+)
 
 CHANNEL_CHECK_INTERVAL = 60.0  # time in seconds
+CHANNEL_STATE_REFRESH_INTERVAL = 5.0  # time in seconds
+LOG_POLL_INTERVAL = 1.0  # time in seconds
+PAYMENT_POLL_INTERVAL = 5.0  # time in seconds
+DEFAULT_PAYMENT_CURSOR_FILE = "/usr/lib/raiden/payments.cursor"
+DEFAULT_MAX_RECENT_EVENTS = 1000
 DEFAULT_NETWORK = "5"
 DEFAULT_KEYSTORE = "/usr/lib/raiden/keystore"
 DEFAULT_KEYSTORE_PASSWORD = "/usr/lib/raiden/password"
+DEFAULT_LOG_FILE = "/var/log/raiden.log"
+DEFAULT_PID_FILE = "/usr/lib/raiden/raiden.pid"
+DEFAULT_DATADIR = ""
+RAIDEN_DATADIR = "~/.raiden"
+DEFAULT_STARTUP_TIMEOUT = 300.0  # time in seconds
+DEFAULT_SHUTDOWN_TIMEOUT = 30.0  # time in seconds
+DEFAULT_MAX_HEALTH_FAILURES = 3
+DEFAULT_RESTART_MIN_BACKOFF = 5.0  # time in seconds
+DEFAULT_RESTART_MAX_BACKOFF = 300.0  # time in seconds
+READINESS_PROBE_TIMEOUT = 1.0  # time in seconds
+READINESS_MIN_BACKOFF = 0.1  # time in seconds
+READINESS_MAX_BACKOFF = 5.0  # time in seconds
+
+
+class NodeStatus(Enum):
+    """The lifecycle states of a supervised Raiden node."""
+
+    STOPPED = "stopped"
+    STARTING = "starting"
+    READY = "ready"
+    FAILED = "failed"
+
+
+def node_path(path: str, index: int) -> str:
+    """Get the path of a file of the node of `index`, the first node uses `path` itself."""
+    if index == 0:
+        return path
+    root, ext = splitext(path)
+    return f"{root}-{index}{ext}"
+
+
+class SupervisedNode:
+    """The files, process and supervision state of one Raiden node."""
+
+    def __init__(
+        self,
+        index: int,
+        client: RaidenNodeClient,
+        keystore_path: str,
+        password_file: str,
+        address_file: str,
+        log_file: str,
+        pid_file: str,
+        datadir: str,
+    ) -> None:
+        """
+        Initialize the node.
+
+        :param index: the index of the node, its files are named after it
+        :param client: the REST client of the node
+        :param keystore_path: the keystore of the node's account
+        :param password_file: the password file of the keystore
+        :param address_file: the file of the address of the node's account
+        :param log_file: the JSON log of the node
+        :param pid_file: the pid file of the node
+        :param datadir: the data directory of the node, empty for Raiden's default
+        """
+        self.index = index
+        self.client = client
+        self.keystore_path = keystore_path
+        self.password_file = password_file
+        self.address_file = address_file
+        self.log_file = log_file
+        self.pid_file = pid_file
+        self.datadir = datadir
+        self.address = ""
+        self.process = None  # type: Optional[RaidenNodeProcess]
+        self.status = NodeStatus.STOPPED
+        self.restarts = 0
+        self.health_failures = 0
+        self.restart_backoff = 0.0
+        self.next_restart_at = 0.0
+        self.readiness_thread = None  # type: Optional[threading.Thread]
+        self.stop_readiness = threading.Event()
+        self.restart_thread = None  # type: Optional[threading.Thread]
+
+    @property
+    def api_address(self) -> str:
+        """Get the host:port the node's API listens on."""
+        return f"{self.client.host}:{self.client.port}"
 
 
 class ChannelMonitorBehaviour(TickerBehaviour):
-    """This class spins up a Raiden Node and monitors channels."""
+    """
+    This class spins up the Raiden nodes and monitors channels.
+
+    There is one node per client of the raiden_client model, each with its own
+    account, API port, data directory, log and pid file. The files of node
+    `i > 0` are those of the first node suffixed with `-i`. Every node is
+    health checked and restarted on its own, so a failing node only holds up
+    the channels it has. A restart stops and respawns the node on a thread of
+    its own, the node counts as starting meanwhile, so a node slow to stop
+    does not hold up the agent's loop. A node without an account takes one
+    from the account pool, the keystores are encrypted in worker processes.
+    """
     account_address_path = "/usr/lib/raiden/address"
 
     def __init__(self, **kwargs):
@@ -26,10 +150,31 @@ class ChannelMonitorBehaviour(TickerBehaviour):
 
         self.keystore_path = kwargs.pop("keystore_path", DEFAULT_KEYSTORE)
         self.password_file = kwargs.pop("password_file", DEFAULT_KEYSTORE_PASSWORD)
-        if not exists(self.password_file) or not exists(self.keystore_path):
-            self.__create_account()
-        else:
-            self.address = open(self.account_address_path, "r").read()
+        self.account_pool_dir = kwargs.pop("account_pool_dir", DEFAULT_ACCOUNT_POOL_DIR)
+        self.account_pool_size = int(
+            kwargs.pop("account_pool_size", DEFAULT_ACCOUNT_POOL_SIZE)
+        )
+        self.keystore_workers = int(kwargs.pop("keystore_workers", DEFAULT_KEYSTORE_WORKERS))
+        self.datadir = kwargs.pop("datadir", DEFAULT_DATADIR) or ""
+        self.log_file = kwargs.pop("log_file", DEFAULT_LOG_FILE)
+        self.startup_timeout = float(kwargs.pop("startup_timeout", DEFAULT_STARTUP_TIMEOUT))
+        self.pid_file = kwargs.pop("pid_file", DEFAULT_PID_FILE)
+        self.shutdown_timeout = float(kwargs.pop("shutdown_timeout", DEFAULT_SHUTDOWN_TIMEOUT))
+        self.keep_node_on_exit = bool(kwargs.pop("keep_node_on_exit", False))
+        self.max_health_failures = int(
+            kwargs.pop("max_health_failures", DEFAULT_MAX_HEALTH_FAILURES)
+        )
+        self.restart_min_backoff = float(
+            kwargs.pop("restart_min_backoff", DEFAULT_RESTART_MIN_BACKOFF)
+        )
+        self.restart_max_backoff = float(
+            kwargs.pop("restart_max_backoff", DEFAULT_RESTART_MAX_BACKOFF)
+        )
+        self.nodes = []  # type: List[SupervisedNode]
+        # a node is only started while it is starting, checked and started under this lock
+        self._start_lock = threading.Lock()
+        self._keystore_executor = None  # type: Optional[ProcessPoolExecutor]
+        self.accounts = None  # type: Optional[AccountPool]
 
         self.network_id = kwargs.pop("network_id", DEFAULT_NETWORK)
         self.rpc_endpoint = self.__parse_rpc_endpoint(kwargs.pop("rpc_endpoint", ""), kwargs.pop("infura_id", ""))
@@ -58,65 +203,484 @@ class ChannelMonitorBehaviour(TickerBehaviour):
             raise RuntimeError(f"Unsupported network id {self.network_id}")
         return f"https://{network}.infura.io/v3"
 
-    def __create_account(self) -> None:
-        password_file = open(self.password_file, "w")
-        password = secrets.token_hex(32)
-        password_file.write(password)
-        password_file.close()
-
-        geth_result = subprocess.run(["geth", "--keystore", self.keystore_path, "--password", self.password_file, "account", "new"], capture_output=True)
-        if geth_result.returncode != 0:
-            raise RuntimeError(f"Failed to create account {geth_result.stderr}")
-        
-        self.address = geth_result.stdout.decode("utf-8").split("\n")[3].split(" ")[-1]
-        open(self.account_address_path, "w+").write(self.address)
+    def __provision(self, node: SupervisedNode) -> None:
+        """Install an account for the node and start it once the account is there."""
+        self.context.logger.info(f"Creating the account of Raiden node {node.index}")
+        node.status = NodeStatus.STARTING
+        future = cast(AccountPool, self.accounts).provision()
+        future.add_done_callback(partial(self.__on_account, node))
 
+    def __on_account(self, node: SupervisedNode, future: Future) -> None:
+        """Install the account the node got and start the node."""
+        if node.status != NodeStatus.STARTING:
+            # stopped meanwhile
+            return
+        try:
+            account = future.result()
+            install_account(account, node.keystore_path, node.password_file, node.address_file)
+        except Exception as e:  # pylint: disable=broad-except
+            self.context.logger.error(f"Failed to create the account of Raiden node {node.index}: {e}")
+            node.status = NodeStatus.FAILED
+            return
+        node.address = account["address"]
+        self.context.logger.info(f"Created account {node.address} of Raiden node {node.index}")
+        with self._start_lock:
+            if node.status == NodeStatus.STARTING:
+                self.__start_node(node)
 
     def setup(self) -> None:
         """Implement the setup."""
-        self.raiden_instance = subprocess.Popen(
-            [
-                "raiden",
-                "--accept-disclaimer",
-                "--gas-price", "fast",
-                "--sync-check",
-                "--log-json",
-                "--log-file", "/var/log/raiden.log",
-                "--development-environment", "unstable",
-                "--environment-type", "development",
-                "--network-id", self.network_id,
-                "--eth-rpc-endpoint", self.rpc_endpoint,
-                "--keystore-path", self.keystore_path,
-                "--password-file", self.password_file,
-                "--address", self.address,
-            ]
+        raiden_client = cast(RaidenClient, self.context.raiden_client)
+        for index, client in enumerate(raiden_client.nodes):
+            datadir = self.datadir
+            if index and not datadir:
+                datadir = expanduser(RAIDEN_DATADIR)
+            node = SupervisedNode(
+                index,
+                client,
+                node_path(self.keystore_path, index),
+                node_path(self.password_file, index),
+                node_path(self.account_address_path, index),
+                node_path(self.log_file, index),
+                node_path(self.pid_file, index),
+                node_path(datadir, index) if datadir else "",
+            )
+            node.restart_backoff = self.restart_min_backoff
+            self.nodes.append(node)
+        # the skill's modules are only importable in processes forked from the agent
+        self._keystore_executor = ProcessPoolExecutor(
+            max_workers=self.keystore_workers, mp_context=multiprocessing.get_context("fork")
+        )
+        self.accounts = AccountPool(
+            self.account_pool_dir,
+            self._keystore_executor,
+            self.account_pool_size,
+            logger=self.context.logger,
         )
-        response = {}
-        tries = 0
-        max_tries = 10
-        while response.get("status") != "ready" and tries < max_tries:
+        for node in self.nodes:
+            if exists(node.password_file) and exists(node.keystore_path):
+                node.address = open(node.address_file, "r").read()
+                self.__start_node(node)
+            else:
+                self.__provision(node)
+        self.accounts.fill()
+
+    def __start_node(self, node: SupervisedNode) -> None:
+        """Reattach to the node of the pid file if it still runs, spawn one otherwise."""
+        api_address = node.api_address
+        node.health_failures = 0
+        node.process = RaidenNodeProcess.attach(api_address, node.pid_file)
+        if node.process is not None:
+            self.context.logger.info(
+                f"Reattached to Raiden node {node.index} with pid {node.process.pid}"
+            )
+            self.__start_readiness_watch(node)
+            return
+        command = [
+            "raiden",
+            "--accept-disclaimer",
+            "--gas-price", "fast",
+            "--sync-check",
+            "--log-json",
+            "--log-file", node.log_file,
+            "--development-environment", "unstable",
+            "--environment-type", "development",
+            "--network-id", self.network_id,
+            "--eth-rpc-endpoint", self.rpc_endpoint,
+            "--keystore-path", node.keystore_path,
+            "--password-file", node.password_file,
+            "--address", node.address,
+            "--api-address", api_address,
+        ]
+        if node.datadir:
+            command.extend(["--datadir", node.datadir])
+        node.process = RaidenNodeProcess.spawn(command, api_address, node.pid_file)
+        self.context.logger.info(f"Started Raiden node {node.index} with pid {node.process.pid}")
+        self.__start_readiness_watch(node)
+
+    @property
+    def is_node_ready(self) -> bool:
+        """Check whether any node reported ready."""
+        return any(node.status == NodeStatus.READY for node in self.nodes)
+
+    def is_ready(self, index: int) -> bool:
+        """Check whether the node of `index` reported ready."""
+        return index < len(self.nodes) and self.nodes[index].status == NodeStatus.READY
+
+    @property
+    def node_status(self) -> NodeStatus:
+        """Get the status of the most available node."""
+        statuses = {node.status for node in self.nodes}
+        for status in (NodeStatus.READY, NodeStatus.STARTING, NodeStatus.FAILED):
+            if status in statuses:
+                return status
+        return NodeStatus.STOPPED
+
+    @property
+    def restarts(self) -> int:
+        """Get the number of restarts of all nodes."""
+        return sum(node.restarts for node in self.nodes)
+
+    def __start_readiness_watch(self, node: SupervisedNode) -> None:
+        """Wait for the node to become ready in the background."""
+        node.status = NodeStatus.STARTING
+        node.stop_readiness = threading.Event()
+        node.readiness_thread = threading.Thread(
+            target=self.__watch_readiness,
+            args=(node, node.stop_readiness),
+            name=f"raiden_readiness_{node.index}",
+            daemon=True,
+        )
+        node.readiness_thread.start()
+
+    def __watch_readiness(self, node: SupervisedNode, stop: threading.Event) -> None:
+        """
+        Probe the node until it reports ready, the startup times out or the node dies.
+
+        Probes back off exponentially while the node is quiet; new output in
+        the node's JSON log resets the backoff, so readiness is seen promptly.
+        """
+        deadline = time.monotonic() + self.startup_timeout
+        backoff = READINESS_MIN_BACKOFF
+        log_size = self.__log_size(node)
+        while not stop.is_set():
             try:
-                response = raiden.get_node_status()
-                self.context.logger.info(response)
-            except Exception as e:
+                response = node.client.get_node_status(timeout=READINESS_PROBE_TIMEOUT)
+                if response.get("status") == NodeStatus.READY.value:
+                    self.context.logger.info(f"Raiden node {node.index} is ready: {response}")
+                    node.status = NodeStatus.READY
+                    node.restart_backoff = self.restart_min_backoff
+                    self.context.handlers.channel_handler.on_node_ready(node.index)
+                    return
+            except Exception:  # pylint: disable=broad-except
                 pass
-            tries += 1
-            sleep(5)
-        if tries == max_tries:
-            raise RuntimeError("Failed to start Raiden")
+            process = cast(RaidenNodeProcess, node.process)
+            if not process.is_alive():
+                self.context.logger.error(
+                    f"Raiden node {node.index} exited with code {process.returncode} during startup"
+                )
+                node.status = NodeStatus.FAILED
+                return
+            if time.monotonic() > deadline:
+                self.context.logger.error(f"Failed to start Raiden node {node.index}")
+                node.status = NodeStatus.FAILED
+                return
+
+            new_log_size = self.__log_size(node)
+            if new_log_size != log_size:
+                log_size = new_log_size
+                backoff = READINESS_MIN_BACKOFF
+            stop.wait(backoff)
+            backoff = min(backoff * 2, READINESS_MAX_BACKOFF)
+
+    @staticmethod
+    def __log_size(node: SupervisedNode) -> int:
+        """Get the size of the node's log file, 0 while it does not exist."""
+        try:
+            return getsize(node.log_file)
+        except OSError:
+            return 0
 
     def act(self) -> None:
-        """Implement the act."""
+        """Check the health of every node and restart those that died or stopped responding."""
+        for node in self.nodes:
+            self.__check_node(node)
+        if self.is_node_ready:
+            self.__log_hot_lanes()
+
+    def __check_node(self, node: SupervisedNode) -> None:
+        """Check the node's health and restart it once it died or stopped responding."""
+        if node.status in (NodeStatus.STARTING, NodeStatus.STOPPED):
+            return
+        process = cast(RaidenNodeProcess, node.process)
+        if node.status == NodeStatus.FAILED or not process.is_alive():
+            self.__restart(node)
+            return
         try:
-            response = raiden.get_node_status()
-            self.context.logger.info(response)
+            response = node.client.get_node_status()
+            self.context.logger.info(f"Raiden node {node.index}: {response}")
+            node.health_failures = 0
         except Exception as e:
-            self.context.logger.error(e)
-            self.teardown()
-            self.context.logger.info("Restarting Raiden")
-            self.setup()
+            node.health_failures += 1
+            self.context.logger.warning(
+                f"Raiden node {node.index} health check failed "
+                f"({node.health_failures}/{self.max_health_failures}): {e}"
+            )
+            if node.health_failures >= self.max_health_failures:
+                # stop routing to the node while it restarts
+                node.status = NodeStatus.FAILED
+                self.__restart(node)
+
+    def __restart(self, node: SupervisedNode) -> None:
+        """Restart the node, backing off exponentially between attempts."""
+        now = time.monotonic()
+        if now < node.next_restart_at:
+            return
+        node.next_restart_at = now + node.restart_backoff
+        node.restart_backoff = min(node.restart_backoff * 2, self.restart_max_backoff)
+        node.restarts += 1
+        self.context.logger.info(f"Restarting Raiden node {node.index}, attempt {node.restarts}")
+        # the health check skips the node until the restart settles it as ready or failed
+        node.status = NodeStatus.STARTING
+        node.restart_thread = threading.Thread(
+            target=self.__respawn,
+            args=(node,),
+            name=f"raiden_restart_{node.index}",
+            daemon=True,
+        )
+        node.restart_thread.start()
+
+    def __respawn(self, node: SupervisedNode) -> None:
+        """Stop the node, waiting for it to exit, and start it again unless it was stopped meanwhile."""
+        try:
+            self.__stop_readiness_watch(node)
+            with self._start_lock:
+                if node.status != NodeStatus.STARTING:
+                    # stopped meanwhile
+                    return
+                if not node.address:
+                    self.__provision(node)
+                    return
+            if node.process is not None:
+                node.process.stop(self.shutdown_timeout)
+            with self._start_lock:
+                if node.status == NodeStatus.STARTING:
+                    self.__start_node(node)
+        except Exception as e:  # pylint: disable=broad-except
+            self.context.logger.error(f"Failed to restart Raiden node {node.index}: {e}")
+            node.status = NodeStatus.FAILED
+
+    def __log_hot_lanes(self) -> None:
+        """Log the channels with the deepest execution lanes."""
+        lanes = self.context.handlers.channel_handler.lanes
+        if lanes is None:
+            return
+        for (partner, token), stats in lanes.hottest_lanes(limit=3):
+            if stats["depth"]:
+                self.context.logger.info(f"Lane {partner}/{token}: {stats}")
+
+    def __stop_supervision(self, node: SupervisedNode) -> None:
+        """Mark the node stopped and wait for its restart and readiness watch to end."""
+        with self._start_lock:
+            node.status = NodeStatus.STOPPED
+        restart_thread = node.restart_thread
+        if restart_thread is not None and restart_thread is not threading.current_thread():
+            restart_thread.join()
+        node.restart_thread = None
+        self.__stop_readiness_watch(node)
+        node.status = NodeStatus.STOPPED
+
+    @staticmethod
+    def __stop_readiness_watch(node: SupervisedNode) -> None:
+        """Stop waiting for the node to become ready."""
+        node.stop_readiness.set()
+        if node.readiness_thread is not None and node.readiness_thread is not threading.current_thread():
+            node.readiness_thread.join()
+        node.readiness_thread = None
+
+    def stop_node(self) -> str:
+        """
+        Stop the nodes gracefully, they are not restarted until the agent restarts.
+
+        :return: the node status afterwards
+        """
+        for node in self.nodes:
+            self.__stop_supervision(node)
+        for node in self.nodes:
+            if node.process is not None:
+                self.context.logger.info(
+                    f"Stopping Raiden node {node.index} with pid {node.process.pid}"
+                )
+                node.process.stop(self.shutdown_timeout)
+        return self.node_status.value
+
+    def teardown(self) -> None:
+        """Implement the task teardown."""
+        if self.keep_node_on_exit:
+            for node in self.nodes:
+                self.__stop_supervision(node)
+            self.context.logger.info("Leaving the Raiden nodes running for the next start")
+        else:
+            self.stop_node()
+        if self.accounts is not None:
+            self.accounts.cancel()
+        if self._keystore_executor is not None:
+            self._keystore_executor.shutdown(wait=False)
+            self._keystore_executor = None
+        self.context.logger.info("Channel monitor behaviour teardown")
+
+
+class ChannelStateRefreshBehaviour(TickerBehaviour):
+    """This class reloads the channel state store in the background once it expires."""
+
+    def __init__(self, **kwargs):
+        """Initialize the refresh behaviour."""
+        refresh_interval = cast(
+            float, kwargs.pop("refresh_interval", CHANNEL_STATE_REFRESH_INTERVAL)
+        )
+        super().__init__(tick_interval=refresh_interval, **kwargs)
+        self._task_id = None  # type: Optional[int]
+        self._refreshed_nodes = []  # type: List[int]
+
+    def setup(self) -> None:
+        """Implement the setup."""
+
+    def act(self) -> None:
+        """Enqueue a reload of the channel state store when it went stale."""
+        if self._task_id is not None:
+            result = self.context.task_manager.get_task_result(self._task_id)
+            if not result.ready():
+                return
+            self._task_id = None
+            try:
+                node_channels = result.get()
+            except Exception as e:
+                self.context.logger.warning(f"Failed to refresh channel state: {e}")
+            else:
+                self.__learn_owners(node_channels)
+
+        channel_monitor = self.context.behaviours.channel_monitor
+        raiden_client = cast(RaidenClient, self.context.raiden_client)
+        ready = [
+            index for index in range(len(raiden_client.nodes)) if channel_monitor.is_ready(index)
+        ]
+        if not ready:
+            return
+        channel_state = cast(ChannelStateStore, self.context.channel_state)
+        if channel_state.is_stale:
+            self._refreshed_nodes = ready
+            self._task_id = self.context.task_manager.enqueue_task(
+                channel_state.refresh,
+                args=tuple(raiden_client.nodes[index] for index in ready),
+            )
+
+    def __learn_owners(self, node_channels: Optional[List[List[Dict[str, Any]]]]) -> None:
+        """Let the router know which node has which of the refreshed channels."""
+        router = self.context.handlers.channel_handler.router
+        if node_channels is None or router is None:
+            return
+        for index, channels in zip(self._refreshed_nodes, node_channels):
+            router.learn(index, channels)
+
+    def teardown(self) -> None:
+        """Implement the task teardown."""
+
+
+class RaidenLogBehaviour(TickerBehaviour):
+    """This class follows the JSON logs of the nodes and counts the events in them."""
+
+    def __init__(self, **kwargs):
+        """Initialize the log behaviour."""
+        poll_interval = cast(float, kwargs.pop("poll_interval", LOG_POLL_INTERVAL))
+        self.log_file = kwargs.pop("log_file", DEFAULT_LOG_FILE)
+        max_recent_events = int(kwargs.pop("max_recent_events", DEFAULT_MAX_RECENT_EVENTS))
+        super().__init__(tick_interval=poll_interval, **kwargs)
+        self.counters = {}  # type: Dict[str, int]
+        self.recent_events = deque(
+            maxlen=max_recent_events
+        )  # type: Deque[Tuple[str, Dict[str, Any]]]
+        self._tailers = []  # type: List[JsonLogTailer]
+
+    def setup(self) -> None:
+        """Start following the log of every node from its current end."""
+        node_count = len(cast(RaidenClient, self.context.raiden_client).nodes)
+        self._tailers = [
+            JsonLogTailer(node_path(self.log_file, index)) for index in range(node_count)
+        ]
+
+    def act(self) -> None:
+        """Process the lines appended to the logs since the last tick."""
+        expire_channels = False
+        lines = (line for tailer in self._tailers for line in tailer.read_lines())
+        for line in lines:
+            for kind, data in parse_events(line):
+                self.counters[kind] = self.counters.get(kind, 0) + 1
+                self.recent_events.append((kind, data))
+                if kind in (EVENT_CHANNEL_OPENED, EVENT_CHANNEL_CLOSED, EVENT_PAYMENT_RECEIVED):
+                    expire_channels = True
+                elif kind == EVENT_ERROR:
+                    self.context.logger.warning(f"Raiden error: {data.get('event')}")
+        if expire_channels:
+            cast(ChannelStateStore, self.context.channel_state).expire()
+
+    def teardown(self) -> None:
+        """Implement the task teardown."""
+        for tailer in self._tailers:
+            tailer.close()
+        self._tailers = []
+
+
+class PaymentNotificationBehaviour(TickerBehaviour):
+    """This class pushes the payments the nodes received to the subscribed agents."""
+
+    def __init__(self, **kwargs):
+        """Initialize the payment notification behaviour."""
+        poll_interval = cast(float, kwargs.pop("poll_interval", PAYMENT_POLL_INTERVAL))
+        self.cursor_file = kwargs.pop("cursor_file", DEFAULT_PAYMENT_CURSOR_FILE)
+        self.page_size = int(kwargs.pop("page_size", DEFAULT_PAGE_SIZE))
+        self.subscribers = list(kwargs.pop("subscribers", []))  # type: List[str]
+        super().__init__(tick_interval=poll_interval, **kwargs)
+        self._cursors = []  # type: List[PaymentCursor]
+        self._task_ids = {}  # type: Dict[int, int]
+
+    def setup(self) -> None:
+        """Load the cursor of every node of the last run."""
+        node_count = len(cast(RaidenClient, self.context.raiden_client).nodes)
+        self._cursors = [
+            PaymentCursor(node_path(self.cursor_file, index)) for index in range(node_count)
+        ]
+        for index, cursor in enumerate(self._cursors):
+            if cursor.load() is None:
+                self.context.logger.info(
+                    f"No payment cursor of node {index}, skipping its payment history"
+                )
+
+    def act(self) -> None:
+        """Notify the subscribers of the payments fetched last tick and fetch the next ones, per node."""
+        raiden_client = cast(RaidenClient, self.context.raiden_client)
+        channel_monitor = self.context.behaviours.channel_monitor
+        for index, cursor in enumerate(self._cursors):
+            task_id = self._task_ids.get(index)
+            if task_id is not None:
+                result = self.context.task_manager.get_task_result(task_id)
+                if not result.ready():
+                    continue
+                del self._task_ids[index]
+                try:
+                    offset, payments = result.get()
+                except Exception as e:
+                    self.context.logger.warning(f"Failed to fetch payments of node {index}: {e}")
+                else:
+                    if cursor.offset is not None:
+                        self.__notify(payments)
+                    cursor.save(offset)
+
+            if not self.subscribers or not channel_monitor.is_ready(index):
+                continue
+            self._task_ids[index] = self.context.task_manager.enqueue_task(
+                fetch_payments,
+                args=(raiden_client.nodes[index], cursor.offset or 0, self.page_size),
+            )
+
+    def __notify(self, payments: List[Dict[str, Any]]) -> None:
+        """Send a payment_received message per payment to every subscriber."""
+        channel_handler = self.context.handlers.channel_handler
+        for payment in payments:
+            try:
+                content = {
+                    "partner_address": RaidenMessage.Address(str(payment.get("initiator", ""))),
+                    "token_address": RaidenMessage.Address(str(payment.get("token_address", ""))),
+                    "amount": RaidenMessage.Amount(payment.get("amount", 0)),
+                    "identifier": str(payment.get("identifier", "")),
+                    "log_time": str(payment.get("log_time", "")),
+                }
+            except ValueError as e:
+                self.context.logger.warning(f"Skipping payment {payment}: {e}")
+                continue
+            for subscriber in self.subscribers:
+                channel_handler.notify(
+                    subscriber, RaidenMessage.Performative.PAYMENT_RECEIVED, **content
+                )
 
     def teardown(self) -> None:
         """Implement the task teardown."""
-        self.raiden_instance.kill()
-        print("Channel monitor behaviour teardown")
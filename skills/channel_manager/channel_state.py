@@ -0,0 +1,260 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2019 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the channel state cache of the channel manager."""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple, Union
+
+from aea.skills.base import Model
+from packages.brainbot.protocols.raiden.custom_types import to_address_bytes
+
+
+DEFAULT_CHANNEL_STATE_TTL = 30.0  # time in seconds
+
+AddressLike = Union[bytes, str]
+ChannelKey = Tuple[bytes, bytes]
+
+
+def channel_key(partner_address: AddressLike, token_address: AddressLike) -> ChannelKey:
+    """
+    Get the cache key of the channel with a partner in a token network.
+
+    Keys are the 20-byte addresses, so the addresses of raiden messages are
+    used as they are and the hex of the node's API is parsed once per address.
+    """
+    return to_address_bytes(partner_address), to_address_bytes(token_address)
+
+
+class ChannelStateStore(Model):
+    """This class caches the state of our channels as reported by the Raiden nodes."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the channel state store."""
+        self.ttl = float(kwargs.pop("ttl", DEFAULT_CHANNEL_STATE_TTL))
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._channels = {}  # type: Dict[ChannelKey, Dict[str, Any]]
+        self._updated_at = {}  # type: Dict[ChannelKey, float]
+        # a cached channel gets a new version whenever the node's state replaces it
+        self._versions = {}  # type: Dict[ChannelKey, int]
+        self._version = 0
+        self._loaded_at = None  # type: Optional[float]
+        self._in_flight = {}  # type: Dict[ChannelKey, int]
+        self._pending_deposits = {}  # type: Dict[ChannelKey, int]
+        self._refreshing = False
+
+    @property
+    def is_stale(self) -> bool:
+        """Check whether the store has not been fully loaded within the TTL."""
+        loaded_at = self._loaded_at
+        return loaded_at is None or time.monotonic() - loaded_at > self.ttl
+
+    def get(self, partner_address: AddressLike, token_address: AddressLike) -> Optional[Dict[str, Any]]:
+        """
+        Get the cached state of a channel.
+
+        :param partner_address: the address of the channel partner
+        :param token_address: the address of the channel token
+        :return: a copy of the channel state, or None if unknown or expired
+        """
+        channel = self._fresh_channel(channel_key(partner_address, token_address))
+        return dict(channel) if channel is not None else None
+
+    def _fresh_channel(self, key: ChannelKey) -> Optional[Dict[str, Any]]:
+        """Get the cached channel of a key unless it expired."""
+        updated_at = self._updated_at.get(key)
+        if updated_at is None or time.monotonic() - updated_at > self.ttl:
+            return None
+        return self._channels.get(key)
+
+    def in_flight(self, partner_address: AddressLike, token_address: AddressLike) -> int:
+        """Get the amount reserved by transfers in flight on a channel."""
+        return self._in_flight.get(channel_key(partner_address, token_address), 0)
+
+    def balance(self, partner_address: AddressLike, token_address: AddressLike) -> Optional[int]:
+        """Get our cached balance in a channel, or None if unknown or expired."""
+        channel = self.get(partner_address, token_address)
+        if channel is None or channel.get("balance") is None:
+            return None
+        return int(channel["balance"])
+
+    def channels(self) -> List[Dict[str, Any]]:
+        """Get copies of all cached channels, expired ones included."""
+        with self._lock:
+            return [dict(channel) for channel in self._channels.values()]
+
+    def invalidate(self, partner_address: AddressLike, token_address: AddressLike) -> None:
+        """Drop the cached state of a channel."""
+        key = channel_key(partner_address, token_address)
+        with self._lock:
+            self._channels.pop(key, None)
+            self._updated_at.pop(key, None)
+            self._versions.pop(key, None)
+
+    def expire(self) -> None:
+        """Mark the store stale so it is reloaded on the next refresh."""
+        self._loaded_at = None
+
+    def load(self, channels: List[Dict[str, Any]]) -> None:
+        """
+        Replace the cache with the full channel list of the nodes.
+
+        :param channels: the channels as returned by the node's channels endpoint
+        """
+        now = time.monotonic()
+        loaded = {
+            channel_key(channel["partner_address"], channel["token_address"]): dict(channel)
+            for channel in channels
+        }
+        with self._lock:
+            self._version += 1
+            self._channels = loaded
+            self._updated_at = dict.fromkeys(loaded, now)
+            self._versions = dict.fromkeys(loaded, self._version)
+            self._loaded_at = now
+
+    def refresh(self, *raidens: Any) -> Optional[List[List[Dict[str, Any]]]]:
+        """
+        Reload all channels from the nodes, unless a refresh is already running.
+
+        :param raidens: the Raiden API clients of the nodes
+        :return: the channels of each node, or None if a refresh was already running
+        """
+        with self._lock:
+            if self._refreshing:
+                return None
+            self._refreshing = True
+        try:
+            node_channels = [raiden.get_channels() for raiden in raidens]
+            self.load([channel for channels in node_channels for channel in channels])
+            return node_channels
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def update_channel(self, channel: Dict[str, Any]) -> None:
+        """Store the channel state returned by a channel endpoint of the node."""
+        key = channel_key(channel["partner_address"], channel["token_address"])
+        with self._lock:
+            self._version += 1
+            self._channels[key] = dict(channel)
+            self._updated_at[key] = time.monotonic()
+            self._versions[key] = self._version
+
+    def reserve_transfer(
+        self, partner_address: AddressLike, token_address: AddressLike, amount: int
+    ) -> Tuple[Optional[str], Optional[int]]:
+        """
+        Reserve the amount of a transfer if our side of the channel can cover it.
+
+        Channels that are not cached are not checked, the node decides for those.
+
+        :param partner_address: the address of the channel partner
+        :param token_address: the address of the channel token
+        :param amount: the amount to transfer
+        :return: the reason the transfer cannot succeed, or None once reserved,
+            and the version of the cached channel the reservation saw
+        """
+        key = channel_key(partner_address, token_address)
+        with self._lock:
+            in_flight = self._in_flight.get(key, 0)
+            channel = self._fresh_channel(key)
+            if channel is not None:
+                state = channel.get("state", "opened")
+                if state != "opened":
+                    return f"Channel is {state}", None
+                balance = channel.get("balance")
+                if balance is not None and int(balance) - in_flight < amount:
+                    return (
+                        f"Insufficient capacity: balance {balance}, "
+                        f"in flight {in_flight}, requested {amount}"
+                    ), None
+            self._in_flight[key] = in_flight + amount
+            return None, self._versions.get(key) if channel is not None else None
+
+    def complete_transfer(
+        self,
+        partner_address: AddressLike,
+        token_address: AddressLike,
+        amount: int,
+        succeeded: bool,
+        version: Optional[int] = None,
+    ) -> None:
+        """
+        Release the reservation of a transfer and debit our balance if it succeeded.
+
+        The balance is only debited if the cached channel is still the one the
+        reservation saw; a channel reloaded meanwhile may already reflect the
+        transfer.
+
+        :param partner_address: the address of the channel partner
+        :param token_address: the address of the channel token
+        :param amount: the amount of the transfer
+        :param succeeded: whether the node made the transfer
+        :param version: the version of the cached channel returned by reserve_transfer
+        """
+        key = channel_key(partner_address, token_address)
+        with self._lock:
+            in_flight = self._in_flight.get(key, 0) - amount
+            if in_flight > 0:
+                self._in_flight[key] = in_flight
+            else:
+                self._in_flight.pop(key, None)
+            channel = self._channels.get(key)
+            if not succeeded or channel is None or channel.get("balance") is None:
+                return
+            if version is None or self._versions.get(key) != version:
+                return
+            channel["balance"] = str(int(channel["balance"]) - amount)
+
+    def reserve_deposit(
+        self, partner_address: AddressLike, token_address: AddressLike, total_deposit: int
+    ) -> Optional[str]:
+        """
+        Reserve a deposit if it raises the total deposit of an open channel.
+
+        :param partner_address: the address of the channel partner
+        :param token_address: the address of the channel token
+        :param total_deposit: the requested new total deposit
+        :return: the reason the deposit cannot succeed, or None once reserved
+        """
+        key = channel_key(partner_address, token_address)
+        with self._lock:
+            pending = self._pending_deposits.get(key, 0)
+            channel = self._fresh_channel(key)
+            if channel is not None:
+                state = channel.get("state", "opened")
+                if state != "opened":
+                    return f"Channel is {state}"
+                current = max(int(channel.get("total_deposit") or 0), pending)
+                if total_deposit <= current:
+                    return f"Total deposit {total_deposit} does not exceed {current}"
+            self._pending_deposits[key] = max(pending, total_deposit)
+        return None
+
+    def complete_deposit(
+        self, partner_address: AddressLike, token_address: AddressLike, total_deposit: int
+    ) -> None:
+        """Release the reservation of a deposit."""
+        key = channel_key(partner_address, token_address)
+        with self._lock:
+            if self._pending_deposits.get(key, 0) <= total_deposit:
+                self._pending_deposits.pop(key, None)
@@ -0,0 +1,91 @@
+"""This module contains the cache of replies that answers retransmitted requests."""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Hashable, List, Optional, Tuple
+
+from aea.protocols.base import Message
+
+
+DEFAULT_DEDUPE_WINDOW = 600.0  # time in seconds
+DEFAULT_MAX_DEDUPE_ENTRIES = 10000
+
+
+class ReplyCache:
+    """
+    The replies to recent requests, by sender, dialogue reference and message id.
+
+    Peers retransmit a request until they see its reply, so one request can
+    arrive several times. A copy arriving within `window` seconds of the
+    request, or of its reply, is a duplicate: it gets the cached reply, or is
+    absorbed while the request is in flight, whose reply then answers it. At
+    most `max_entries` requests are remembered, the oldest are forgotten first.
+    """
+
+    def __init__(
+        self,
+        window: float = DEFAULT_DEDUPE_WINDOW,
+        max_entries: int = DEFAULT_MAX_DEDUPE_ENTRIES,
+    ) -> None:
+        """
+        Initialize the cache.
+
+        :param window: the time in seconds a request or its reply is remembered
+        :param max_entries: the most requests remembered
+        """
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1")
+        self.window = window
+        self.max_entries = max_entries
+        self.duplicates = 0
+        self._lock = threading.Lock()
+        # key -> [monotonic time of the request or its reply, the reply if any]
+        self._entries = OrderedDict()  # type: OrderedDict[Hashable, List]
+
+    def __len__(self) -> int:
+        """Get the number of requests remembered."""
+        return len(self._entries)
+
+    def seen(self, key: Hashable) -> Tuple[bool, Optional[Message]]:
+        """
+        Check a request against the cache, remembering it as in flight if it is new.
+
+        :param key: the key of the request
+        :return: whether it is a duplicate and, if so, the reply to its first copy if there is one yet
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and now - entry[0] <= self.window:
+                self.duplicates += 1
+                return True, entry[1]
+            self._evict(now)
+            self._entries[key] = [now, None]
+            self._entries.move_to_end(key)
+            return False, None
+
+    def store(self, key: Hashable, reply: Message) -> None:
+        """Remember the reply to a request, its window starts over."""
+        with self._lock:
+            if key in self._entries:
+                self._entries[key] = [time.monotonic(), reply]
+                self._entries.move_to_end(key)
+
+    def discard(self, key: Hashable) -> None:
+        """Forget a request that was not handled."""
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def _evict(self, now: float) -> None:
+        """Forget the oldest requests beyond the bounds. Must be called with the lock held."""
+        entries = self._entries
+        expired_before = now - self.window
+        while entries:
+            key, (seen_at, reply) = next(iter(entries.items()))
+            if len(entries) < self.max_entries and (
+                seen_at >= expired_before or reply is None
+            ):
+                # a request in flight is kept until its reply, within the size bound
+                break
+            del entries[key]
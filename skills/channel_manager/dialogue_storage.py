@@ -0,0 +1,318 @@
+"""This module contains the bounded storage of raiden dialogues and its SQLite archive."""
+
+import json
+import queue
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+from aea.protocols.dialogue.base import (
+    BasicDialoguesStorage,
+    Dialogue,
+    DialogueLabel,
+    Dialogues,
+    PersistDialoguesStorageWithOffloading,
+)
+
+
+DEFAULT_MAX_TERMINAL_DIALOGUES = 10000
+DEFAULT_TERMINAL_DIALOGUE_TTL = 3600.0  # time in seconds
+DEFAULT_ARCHIVE_BATCH_SIZE = 100
+DEFAULT_ARCHIVE_FLUSH_INTERVAL = 1.0  # time in seconds
+DEFAULT_QUERY_LIMIT = 100
+
+_SCHEMA = (
+    """
+    CREATE TABLE IF NOT EXISTS dialogues (
+        dialogue_label TEXT PRIMARY KEY,
+        counterparty TEXT NOT NULL,
+        performative TEXT NOT NULL,
+        end_performative TEXT NOT NULL,
+        terminal_at REAL NOT NULL,
+        dialogue TEXT NOT NULL
+    )
+    """,
+    "CREATE INDEX IF NOT EXISTS dialogues_counterparty ON dialogues (counterparty, terminal_at)",
+    "CREATE INDEX IF NOT EXISTS dialogues_terminal_at ON dialogues (terminal_at)",
+)
+_INSERT = "INSERT OR REPLACE INTO dialogues VALUES (?, ?, ?, ?, ?, ?)"
+_STOP = None
+
+
+class DialogueArchive:
+    """
+    An append-only SQLite archive of evicted terminal dialogues, for audit queries.
+
+    Dialogues are queued by the evicting thread and serialized and written by a
+    writer thread in batches, one transaction per batch, so archiving never
+    blocks the dialogue lookups and replies of the agent.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        batch_size: int = DEFAULT_ARCHIVE_BATCH_SIZE,
+        flush_interval: float = DEFAULT_ARCHIVE_FLUSH_INTERVAL,
+    ) -> None:
+        """
+        Initialize the archive.
+
+        :param path: the SQLite database file
+        :param batch_size: the most dialogues written in one transaction
+        :param flush_interval: the longest time a queued dialogue waits for its batch
+        """
+        self.path = path
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.archived = 0
+        self._queue = queue.Queue()  # type: queue.Queue
+        self._writer = None  # type: Optional[threading.Thread]
+
+    def start(self) -> None:
+        """Create the schema and start the writer thread."""
+        if self._writer is not None:
+            return
+        with sqlite3.connect(self.path) as connection:
+            for statement in _SCHEMA:
+                connection.execute(statement)
+        self._writer = threading.Thread(
+            target=self._write_loop, name="dialogue_archive", daemon=True
+        )
+        self._writer.start()
+
+    def put(self, dialogue: Dialogue, terminal_at: float) -> None:
+        """
+        Queue a terminal dialogue for archiving.
+
+        :param dialogue: the dialogue, it must not change anymore
+        :param terminal_at: the unix time the dialogue reached its terminal state
+        """
+        self._queue.put((dialogue, terminal_at))
+
+    def stop(self) -> None:
+        """Write the queued dialogues and stop the writer thread."""
+        if self._writer is None:
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._writer = None
+
+    def _write_loop(self) -> None:
+        """Write queued dialogues in batches until stopped."""
+        connection = sqlite3.connect(self.path)
+        try:
+            stopping = False
+            while not stopping:
+                batch = []  # type: List[Tuple[Any, ...]]
+                item = self._queue.get()
+                deadline = time.monotonic() + self.flush_interval
+                while True:
+                    if item is _STOP:
+                        stopping = True
+                        break
+                    batch.append(self._row(*item))
+                    if len(batch) >= self.batch_size:
+                        break
+                    try:
+                        item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                    except queue.Empty:
+                        break
+                if batch:
+                    with connection:
+                        connection.executemany(_INSERT, batch)
+                    self.archived += len(batch)
+        finally:
+            connection.close()
+
+    @staticmethod
+    def _row(dialogue: Dialogue, terminal_at: float) -> Tuple[Any, ...]:
+        """Get the archive row of a dialogue."""
+        label = dialogue.dialogue_label
+        first_message = dialogue.get_message_by_id(1)
+        last_message = dialogue.last_message
+        return (
+            str(label),
+            label.dialogue_opponent_addr,
+            first_message.performative.value if first_message is not None else "",
+            last_message.performative.value if last_message is not None else "",
+            terminal_at,
+            json.dumps(dialogue.json()),
+        )
+
+    def query(
+        self,
+        counterparty: Optional[str] = None,
+        since: Optional[float] = None,
+        until: Optional[float] = None,
+        limit: int = DEFAULT_QUERY_LIMIT,
+    ) -> List[Dict[str, Any]]:
+        """
+        Get archived dialogues, latest first.
+
+        :param counterparty: only dialogues with this counterparty
+        :param since: only dialogues that reached their terminal state at or after this unix time
+        :param until: only dialogues that reached their terminal state before this unix time
+        :param limit: the most dialogues returned
+        :return: the dialogues, `dialogue` holds their Dialogue.json()
+        """
+        conditions = []
+        parameters = []  # type: List[Any]
+        if counterparty is not None:
+            conditions.append("counterparty = ?")
+            parameters.append(counterparty)
+        if since is not None:
+            conditions.append("terminal_at >= ?")
+            parameters.append(since)
+        if until is not None:
+            conditions.append("terminal_at < ?")
+            parameters.append(until)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        connection = sqlite3.connect(self.path)
+        try:
+            rows = connection.execute(
+                f"SELECT dialogue_label, counterparty, performative, end_performative, "
+                f"terminal_at, dialogue FROM dialogues {where} "
+                f"ORDER BY terminal_at DESC LIMIT ?",
+                parameters + [limit],
+            ).fetchall()
+        finally:
+            connection.close()
+        return [
+            {
+                "dialogue_label": row[0],
+                "counterparty": row[1],
+                "performative": row[2],
+                "end_performative": row[3],
+                "terminal_at": row[4],
+                "dialogue": json.loads(row[5]),
+            }
+            for row in rows
+        ]
+
+
+class BoundedDialoguesStorage(PersistDialoguesStorageWithOffloading):
+    """
+    Dialogues storage that bounds the terminal dialogues kept in memory.
+
+    Without a generic storage the terminal dialogues of RaidenDialogues stay
+    in memory for good. This storage keeps them in least recently used order
+    and evicts the oldest beyond `max_terminal_dialogues` or unused for
+    `terminal_dialogue_ttl` seconds, handing them to the archive if there is
+    one. Eviction runs when dialogues are added or terminate and only looks
+    at the head of the order, so dialogue lookups only pay for marking a
+    terminal dialogue used. Dialogues offloaded to a generic storage are
+    only dropped from memory, the generic storage keeps them.
+    """
+
+    def __init__(
+        self,
+        dialogues: Dialogues,
+        max_terminal_dialogues: int = DEFAULT_MAX_TERMINAL_DIALOGUES,
+        terminal_dialogue_ttl: float = DEFAULT_TERMINAL_DIALOGUE_TTL,
+        archive: Optional[DialogueArchive] = None,
+    ) -> None:
+        """
+        Initialize the storage.
+
+        :param dialogues: the dialogues of the storage
+        :param max_terminal_dialogues: the most terminal dialogues kept in memory
+        :param terminal_dialogue_ttl: the time in seconds an unused terminal dialogue is kept, 0 for no limit
+        :param archive: the archive of evicted dialogues, if any
+        """
+        super().__init__(dialogues)
+        if max_terminal_dialogues < 0:
+            raise ValueError("max_terminal_dialogues must not be negative")
+        self.max_terminal_dialogues = max_terminal_dialogues
+        self.terminal_dialogue_ttl = terminal_dialogue_ttl
+        self.archive = archive
+        self.evicted = 0
+        # label -> (monotonic time of last use, unix time it became terminal)
+        self._terminal_lru = OrderedDict()  # type: OrderedDict[DialogueLabel, Tuple[float, float]]
+
+    @property
+    def terminal_dialogues(self) -> int:
+        """Get the number of terminal dialogues kept in memory."""
+        return len(self._terminal_lru)
+
+    def setup(self) -> None:
+        """Set up dialogue storage."""
+        if self.archive is not None and self._terminal_dialogues_collection:
+            # the generic storage keeps the terminal dialogues already
+            self.archive = None
+        if self.archive is not None:
+            self.archive.start()
+        super().setup()
+
+    def teardown(self) -> None:
+        """Tear down dialogue storage."""
+        super().teardown()
+        if self.archive is not None:
+            self.archive.stop()
+
+    def add(self, dialogue: Dialogue) -> None:
+        """Add dialogue to storage."""
+        super().add(dialogue)
+        self.evict()
+
+    def dialogue_terminal_state_callback(self, dialogue: Dialogue) -> None:
+        """Track the dialogue if it is kept in memory in its terminal state."""
+        super().dialogue_terminal_state_callback(dialogue)
+        label = dialogue.dialogue_label
+        if label in self._terminal_state_dialogues_labels:
+            self._terminal_lru[label] = (time.monotonic(), time.time())
+            self.evict()
+
+    def _add_terminal_state_dialogue(self, dialogue: Dialogue) -> None:
+        """Add terminal state dialogue to storage."""
+        super()._add_terminal_state_dialogue(dialogue)
+        self._terminal_lru[dialogue.dialogue_label] = (time.monotonic(), time.time())
+        self.evict()
+
+    def get(self, dialogue_label: DialogueLabel) -> Optional[Dialogue]:
+        """Get dialogue stored by its label, marking a terminal one used."""
+        dialogue = super().get(dialogue_label)
+        used = self._terminal_lru.get(dialogue_label)
+        if used is not None:
+            self._terminal_lru[dialogue_label] = (time.monotonic(), used[1])
+            self._terminal_lru.move_to_end(dialogue_label)
+        return dialogue
+
+    def remove(self, dialogue_label: DialogueLabel) -> None:
+        """Remove dialogue from storage by its label."""
+        super().remove(dialogue_label)
+        self._terminal_lru.pop(dialogue_label, None)
+
+    def evict(self) -> int:
+        """
+        Evict the least recently used terminal dialogues beyond the bounds.
+
+        :return: the number of evicted dialogues
+        """
+        evicted = 0
+        lru = self._terminal_lru
+        archive = self.archive
+        expired_before = (
+            time.monotonic() - self.terminal_dialogue_ttl
+            if self.terminal_dialogue_ttl > 0
+            else None
+        )
+        while lru:
+            label, (used_at, terminal_at) = next(iter(lru.items()))
+            if len(lru) <= self.max_terminal_dialogues and (
+                expired_before is None or used_at >= expired_before
+            ):
+                break
+            del lru[label]
+            dialogue = self._dialogues_by_dialogue_label.get(label)
+            BasicDialoguesStorage.remove(self, label)
+            # the mapping of the label the counterparty started the dialogue with
+            self._incomplete_to_complete_dialogue_labels.pop(
+                label.get_incomplete_version(), None
+            )
+            if archive is not None and dialogue is not None:
+                archive.put(dialogue, terminal_at)
+            evicted += 1
+        self.evicted += evicted
+        return evicted
@@ -0,0 +1,124 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2019 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the classes required for dialogue management."""
+
+from typing import Any, Dict, Optional, cast
+
+from aea.common import Address
+from aea.protocols.base import Message
+from aea.protocols.dialogue.base import Dialogue as BaseDialogue
+from aea.skills.base import Model
+
+from packages.brainbot.protocols.raiden.dialogues import RaidenDialogue
+from packages.brainbot.protocols.raiden.dialogues import (
+    RaidenDialogues as BaseRaidenDialogues,
+)
+from packages.brainbot.protocols.raiden.message import RaidenMessage
+from packages.brainbot.skills.channel_manager.dialogue_storage import (
+    DEFAULT_MAX_TERMINAL_DIALOGUES,
+    DEFAULT_TERMINAL_DIALOGUE_TTL,
+    BoundedDialoguesStorage,
+    DialogueArchive,
+)
+
+
+class RaidenDialogues(Model, BaseRaidenDialogues):
+    """The dialogues class keeps track of all raiden dialogues."""
+
+    def __init__(self, **kwargs: Any) -> None:
+        """
+        Initialize dialogues.
+
+        :param kwargs: keyword arguments
+        """
+        archive_file = kwargs.pop("archive_file", None)  # type: Optional[str]
+        max_terminal_dialogues = kwargs.pop(
+            "max_terminal_dialogues", DEFAULT_MAX_TERMINAL_DIALOGUES
+        )
+        terminal_dialogue_ttl = kwargs.pop(
+            "terminal_dialogue_ttl", DEFAULT_TERMINAL_DIALOGUE_TTL
+        )
+        Model.__init__(self, **kwargs)
+
+        def role_from_first_message(  # pylint: disable=unused-argument
+            message: Message, receiver_address: Address
+        ) -> BaseDialogue.Role:
+            """Infer the role of the agent from an incoming/outgoing first message
+
+            :param message: an incoming/outgoing first message
+            :param receiver_address: the address of the receiving agent
+            :return: The role of the agent
+            """
+            return RaidenDialogue.Role.NODE
+
+        BaseRaidenDialogues.__init__(
+            self,
+            self_address=self.context.agent_address,
+            role_from_first_message=role_from_first_message,
+        )
+        # terminal dialogues are kept for lookups, but only so many and so long
+        self._dialogues_storage = BoundedDialoguesStorage(
+            self,
+            max_terminal_dialogues=int(max_terminal_dialogues),
+            terminal_dialogue_ttl=float(terminal_dialogue_ttl),
+            archive=DialogueArchive(archive_file) if archive_file else None,
+        )
+
+    @property
+    def terminal_dialogues(self) -> int:
+        """Get the number of terminal dialogues kept in memory."""
+        return self._dialogues_storage.terminal_dialogues
+
+    @property
+    def evicted_dialogues(self) -> int:
+        """Get the number of terminal dialogues evicted from memory."""
+        return self._dialogues_storage.evicted
+
+    @property
+    def archive(self) -> Optional[DialogueArchive]:
+        """Get the archive of evicted dialogues, if any."""
+        return self._dialogues_storage.archive
+
+    def restore(self, dialogue_data: Dict[str, Any]) -> Optional[RaidenMessage]:
+        """
+        Restore a dialogue from its json, e.g. as journaled before the agent stopped.
+
+        :param dialogue_data: the Dialogue.json() of the dialogue
+        :return: the request to reply to, None if the dialogue got its reply already
+        """
+        label_data = dict(dialogue_data["dialogue_label"])
+        if label_data["dialogue_starter_addr"] == label_data["dialogue_opponent_addr"]:
+            # Dialogue.is_self_initiated compares the addresses by identity
+            label_data["dialogue_starter_addr"] = label_data["dialogue_opponent_addr"]
+        dialogue = self._dialogue_class.from_json(
+            self._message_class, dict(dialogue_data, dialogue_label=label_data)
+        )
+        stored = self._dialogues_storage.get(dialogue.dialogue_label)
+        if stored is None:
+            label = dialogue.dialogue_label
+            self._dialogues_storage.add(dialogue)
+            self._dialogues_storage.set_incomplete_dialogue(
+                label.get_incomplete_version(), label
+            )
+            stored = dialogue
+        last_message = cast(RaidenMessage, stored.last_message)
+        if last_message is not stored.last_incoming_message:
+            return None
+        return last_message
@@ -1,12 +1,116 @@
-from typing import Optional, cast
+import hashlib
+import json
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Deque, Dict, List, Optional, Set, Tuple, cast
 
 from aea.configurations.base import PublicId
+from aea.exceptions import AEAEnforceError
 from aea.protocols.base import Message
 from aea.skills.base import Handler
+from packages.brainbot.protocols.raiden.custom_types import to_checksum_address
+from packages.brainbot.protocols.raiden.dialogues import RaidenDialogue
 from packages.brainbot.protocols.raiden.message import RaidenMessage
-import raiden_api_client
+from packages.brainbot.skills.channel_manager.channel_state import ChannelStateStore
+from packages.brainbot.skills.channel_manager.admission import (
+    DEFAULT_MAX_IN_FLIGHT,
+    DEFAULT_OVERLOAD_RETRY_AFTER,
+    DEFAULT_RATE_LIMIT,
+    DEFAULT_RATE_LIMIT_BURST,
+    OVERLOADED_DETAIL,
+    AdmissionControl,
+)
+from packages.brainbot.skills.channel_manager.dedupe import (
+    DEFAULT_DEDUPE_WINDOW,
+    DEFAULT_MAX_DEDUPE_ENTRIES,
+    ReplyCache,
+)
+from packages.brainbot.skills.channel_manager.dialogues import RaidenDialogues
+from packages.brainbot.skills.channel_manager.journal import (
+    DEFAULT_SYNC_DELAY,
+    RequestJournal,
+    reconcile_call,
+)
+from packages.brainbot.skills.channel_manager.lanes import (
+    DEFAULT_PRIORITY,
+    DEFAULT_PRIORITY_AGING,
+    ChannelLaneScheduler,
+)
+from packages.brainbot.skills.channel_manager.metrics import SkillMetrics
+from packages.brainbot.skills.channel_manager.raiden_client import (
+    DEFAULT_SETTLE_TIMEOUT,
+    RaidenClient,
+)
+from packages.brainbot.skills.channel_manager.routing import (
+    DEFAULT_ROUTING_POLICY,
+    ROUTING_POLICIES,
+    NodeRouter,
+)
 
-raiden = raiden_api_client.RaidenAPIWrapper(ip="127.0.0.1", port="5001")
+EXECUTION_MODE_SYNC = "sync"
+EXECUTION_MODE_POOL = "pool"
+DEFAULT_EXECUTION_MODE = EXECUTION_MODE_POOL
+DEFAULT_MAX_WORKERS = 4
+NOT_READY_REJECT = "reject"
+NOT_READY_QUEUE = "queue"
+DEFAULT_NOT_READY_POLICY = NOT_READY_REJECT
+DEFAULT_MAX_QUEUED_UNTIL_READY = 1000
+RECONCILE_RETRY_INTERVAL = 5.0  # time in seconds
+PAYMENT_IDENTIFIER_BYTES = 8
+# lower is more urgent, calls of a less urgent performative go ahead after
+# waiting `priority_aging` seconds more per level
+DEFAULT_PRIORITIES = {
+    RaidenMessage.Performative.CLOSE_CHANNEL.value: 0,
+    RaidenMessage.Performative.OPEN_CHANNEL.value: 1,
+    RaidenMessage.Performative.DEPOSIT.value: 1,
+    RaidenMessage.Performative.TRANSFER.value: 2,
+    RaidenMessage.Performative.BATCH_TRANSFER.value: 2,
+}
+JOURNALED_PERFORMATIVES = frozenset(
+    (
+        RaidenMessage.Performative.OPEN_CHANNEL,
+        RaidenMessage.Performative.CLOSE_CHANNEL,
+        RaidenMessage.Performative.DEPOSIT,
+        RaidenMessage.Performative.TRANSFER,
+        RaidenMessage.Performative.BATCH_TRANSFER,
+    )
+)
+
+
+def parse_amount(amount: int) -> int:
+    """
+    Check a token amount of a message, the protocol ensures it fits into 256 bits.
+
+    :raises ValueError: if the amount is not a positive integer
+    """
+    try:
+        value = int(amount)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid amount {amount!r}")
+    if value <= 0:
+        raise ValueError(f"Amount must be positive, got {value}")
+    return value
+
+
+def payment_identifier(message: RaidenMessage, index: int = 0) -> int:
+    """
+    Derive the Raiden payment identifier of a transfer from the message requesting it.
+
+    The identifier is known before the transfer is sent, so the node's payment
+    events tell whether it was sent, also after a restart of the agent.
+
+    :param message: the transfer or batch transfer message
+    :param index: the index of the transfer in a batch
+    :return: a non-zero unsigned 64-bit identifier
+    """
+    digest = hashlib.blake2b(
+        f"{message.sender}/{message.dialogue_reference[0]}/{index}".encode("utf-8"),
+        digest_size=PAYMENT_IDENTIFIER_BYTES,
+    ).digest()
+    return int.from_bytes(digest, "big") or 1
 
 
 class ChannelHandler(Handler):
@@ -14,8 +118,106 @@ class ChannelHandler(Handler):
 
     SUPPORTED_PROTOCOL = RaidenMessage.protocol_id  # type: Optional[PublicId]
 
+    def __init__(self, **kwargs):
+        """Initialize the channel handler."""
+        self.execution_mode = kwargs.pop("execution_mode", DEFAULT_EXECUTION_MODE)
+        if self.execution_mode not in (EXECUTION_MODE_SYNC, EXECUTION_MODE_POOL):
+            raise ValueError(f"Unsupported execution mode {self.execution_mode}")
+        self.max_workers = int(kwargs.pop("max_workers", DEFAULT_MAX_WORKERS))
+        if self.max_workers < 1:
+            raise ValueError("max_workers must be at least 1")
+        self.max_active_lanes = int(kwargs.pop("max_active_lanes", self.max_workers))
+        priorities = dict(kwargs.pop("priorities", None) or {})
+        unknown = set(priorities) - set(DEFAULT_PRIORITIES)
+        if unknown:
+            raise ValueError(f"No priorities for performatives {sorted(unknown)}")
+        self.priorities = {
+            RaidenMessage.Performative(performative): int(priority)
+            for performative, priority in dict(DEFAULT_PRIORITIES, **priorities).items()
+        }
+        self.priority_aging = float(kwargs.pop("priority_aging", DEFAULT_PRIORITY_AGING))
+        self.not_ready_policy = kwargs.pop("not_ready_policy", DEFAULT_NOT_READY_POLICY)
+        if self.not_ready_policy not in (NOT_READY_REJECT, NOT_READY_QUEUE):
+            raise ValueError(f"Unsupported not ready policy {self.not_ready_policy}")
+        self.max_queued_until_ready = int(
+            kwargs.pop("max_queued_until_ready", DEFAULT_MAX_QUEUED_UNTIL_READY)
+        )
+        self.journal_file = kwargs.pop("journal_file", None)  # type: Optional[str]
+        self.journal_sync_delay = float(
+            kwargs.pop("journal_sync_delay", DEFAULT_SYNC_DELAY)
+        )
+        self.dedupe_window = float(kwargs.pop("dedupe_window", DEFAULT_DEDUPE_WINDOW))
+        self.max_dedupe_entries = int(
+            kwargs.pop("max_dedupe_entries", DEFAULT_MAX_DEDUPE_ENTRIES)
+        )
+        self.rate_limit = float(kwargs.pop("rate_limit", DEFAULT_RATE_LIMIT))
+        self.rate_limit_burst = float(
+            kwargs.pop("rate_limit_burst", DEFAULT_RATE_LIMIT_BURST)
+        )
+        self.max_in_flight = int(kwargs.pop("max_in_flight", DEFAULT_MAX_IN_FLIGHT))
+        self.overload_retry_after = int(
+            kwargs.pop("overload_retry_after", DEFAULT_OVERLOAD_RETRY_AFTER)
+        )
+        self.routing_policy = kwargs.pop("routing_policy", DEFAULT_ROUTING_POLICY)
+        if self.routing_policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unsupported routing policy {self.routing_policy}")
+
+        super().__init__(**kwargs)
+        self._executor = None  # type: Optional[ThreadPoolExecutor]
+        self.lanes = None  # type: Optional[ChannelLaneScheduler]
+        self.router = None  # type: Optional[NodeRouter]
+        # dialogues are not thread safe, replies are built from the worker threads
+        self._dialogues_lock = threading.Lock()
+        self._queued_until_ready = deque()  # type: Deque[RaidenMessage]
+        self._queued_until_ready_lock = threading.Lock()
+        self._arrivals = {}  # type: Dict[int, float]
+        self.journal = None  # type: Optional[RequestJournal]
+        self._journal_ids = {}  # type: Dict[int, int]
+        self._unfinished = []  # type: List[Dict[str, Any]]
+        self._reconcile_lock = threading.Lock()
+        self._reconcile_timer = None  # type: Optional[threading.Timer]
+        self._ready_at = {}  # type: Dict[int, float]
+        self.reply_cache = (
+            ReplyCache(self.dedupe_window, self.max_dedupe_entries)
+            if self.dedupe_window > 0
+            else None
+        )  # type: Optional[ReplyCache]
+        self.admission = (
+            AdmissionControl(
+                self.rate_limit,
+                self.rate_limit_burst,
+                self.max_in_flight,
+                self.overload_retry_after,
+            )
+            if self.rate_limit > 0 or self.max_in_flight > 0
+            else None
+        )  # type: Optional[AdmissionControl]
+        self._admitted = set()  # type: Set[int]
+
     def setup(self) -> None:
         """Implement the setup."""
+        self.router = NodeRouter(
+            len(cast(RaidenClient, self.context.raiden_client).nodes),
+            self.context.behaviours.channel_monitor.is_ready,
+            self.routing_policy,
+        )
+        if self.execution_mode == EXECUTION_MODE_POOL:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix="raiden_api"
+            )
+            self.lanes = ChannelLaneScheduler(
+                self._executor, self.max_active_lanes, self.priority_aging
+            )
+        if self.journal_file:
+            self.journal = RequestJournal(self.journal_file, self.journal_sync_delay)
+            self._unfinished = self.journal.open()
+            if self._unfinished:
+                self.context.logger.warning(
+                    f"{len(self._unfinished)} requests were unfinished when the agent stopped, "
+                    "reconciling them with the node once it is ready"
+                )
+                if self.context.behaviours.channel_monitor.is_node_ready:
+                    self._schedule_reconcile(0)
 
     def handle(self, message: Message) -> None:
         """
@@ -23,55 +225,604 @@ class ChannelHandler(Handler):
 
         :param message: the message
         """
+        message = cast(RaidenMessage, message)
+        arrived_at = time.perf_counter()
+        if self.reply_cache is not None and not self._is_new_request(message):
+            return
+        raiden_dialogues = cast(RaidenDialogues, self.context.raiden_dialogues)
+        try:
+            with self._dialogues_lock:
+                raiden_dialogue = raiden_dialogues.update(message)
+        except AEAEnforceError:
+            # a copy of a request older than the reply cache remembers
+            raiden_dialogue = None
+        if raiden_dialogue is None:
+            if self.reply_cache is not None:
+                self.reply_cache.discard(self._request_key(message))
+            self.context.logger.info(
+                f"received invalid raiden message={message}, unidentified dialogue."
+            )
+            return
+
+        self._arrivals[id(message)] = arrived_at
+        if message.performative != RaidenMessage.Performative.STOP_NODE:
+            if not self._admit(message) or not self._accept_before_ready(message):
+                return
+        self._dispatch(message)
+
+    def _admit(self, message: RaidenMessage) -> bool:
+        """
+        Admit the message within the sender's rate limit and the in-flight cap, otherwise reply at once.
+
+        :return: whether the message is admitted
+        """
+        if self.admission is None:
+            return True
+        retry_after = self.admission.admit(message.sender)
+        if retry_after is None:
+            self._admitted.add(id(message))
+            return True
+        self._reply(
+            message.performative.value,
+            message,
+            RaidenMessage.Performative.FAILURE,
+            OVERLOADED_DETAIL.format(retry_after),
+        )
+        return False
+
+    @staticmethod
+    def _request_key(message: RaidenMessage) -> Tuple[str, str, int]:
+        """Get the key of a request in the reply cache."""
+        return message.sender, message.dialogue_reference[0], message.message_id
+
+    def _is_new_request(self, message: RaidenMessage) -> bool:
+        """
+        Check a request against the reply cache, a duplicate is answered there.
+
+        :return: whether the request was not seen within the dedupe window
+        """
+        duplicate, reply = cast(ReplyCache, self.reply_cache).seen(self._request_key(message))
+        if not duplicate:
+            return True
+        if reply is None:
+            self.context.logger.info(
+                f"duplicate of request in flight={message}, its reply answers it."
+            )
+        else:
+            self.context.logger.info(f"duplicate of request={message}, replying again.")
+            self.context.outbox.put_message(reply)
+        return False
+
+    def _dispatch(self, message: RaidenMessage) -> None:
+        """Run the handler of the message performative."""
         handlers = {
             RaidenMessage.Performative.STOP_NODE: self.stop_node,
             RaidenMessage.Performative.OPEN_CHANNEL: self.open_channel,
             RaidenMessage.Performative.CLOSE_CHANNEL: self.close_channel,
             RaidenMessage.Performative.TRANSFER: self.transfer,
+            RaidenMessage.Performative.BATCH_TRANSFER: self.batch_transfer,
             RaidenMessage.Performative.DEPOSIT: self.deposit
         }
         raiden_message_type = message.performative
         handler = handlers.get(raiden_message_type)
         if not handler:
-            raise NotImplemented(f"No handler for message type {raiden_message_type}")
-        message = cast(RaidenMessage, message)
+            self.context.logger.warning(f"No handler for message type {raiden_message_type}")
+            self._release(message)
+            self._arrivals.pop(id(message), None)
+            if self.reply_cache is not None:
+                self.reply_cache.discard(self._request_key(message))
+            return
+        if self.journal is not None and raiden_message_type in JOURNALED_PERFORMATIVES:
+            self._journal_and_run(handler, message)
+            return
+        handler(message)
+
+    def _journal_and_run(self, handler: Callable[[RaidenMessage], None], message: RaidenMessage) -> None:
+        """Run the handler of a message once the message is in the journal."""
+        calls = self._journal_calls(message)
+        if not calls:
+            # nothing reaches the node
+            handler(message)
+            return
+        raiden_dialogues = cast(RaidenDialogues, self.context.raiden_dialogues)
+        with self._dialogues_lock:
+            raiden_dialogue = cast(RaidenDialogue, raiden_dialogues.get_dialogue(message))
+            dialogue = raiden_dialogue.json()
+        request_id, durable = cast(RequestJournal, self.journal).begin(
+            {"dialogue": dialogue, "calls": calls}
+        )
+        self._journal_ids[id(message)] = request_id
+        if self._executor is None:
+            self._run_journaled(handler, message, durable)
+        else:
+            durable.add_done_callback(partial(self._run_journaled, handler, message))
+
+    def _run_journaled(
+        self, handler: Callable[[RaidenMessage], None], message: RaidenMessage, durable: Future
+    ) -> None:
+        """Run the handler of a message, unless its journal write failed."""
+        error = durable.exception()
+        if error is not None:
+            self._reply(
+                message.performative.value,
+                message,
+                RaidenMessage.Performative.FAILURE,
+                f"Request journal unavailable: {error}",
+            )
+            return
         handler(message)
 
-    def stop_node(self, **kwargs) -> None:
+    def _journal_calls(self, message: RaidenMessage) -> List[Dict[str, Any]]:
+        """Get the Raiden calls of a message as they are journaled."""
+        performative = message.performative
+        if performative == RaidenMessage.Performative.BATCH_TRANSFER:
+            if not len(message.partner_addresses) == len(message.token_addresses) == len(message.amounts):
+                return []
+            entries = zip(message.partner_addresses, message.token_addresses, message.amounts)
+            return [
+                {
+                    "method": "transfer",
+                    "partner": to_checksum_address(partner_address),
+                    "token": to_checksum_address(token_address),
+                    "amount": str(amount),
+                    "identifier": payment_identifier(message, index),
+                }
+                for index, (partner_address, token_address, amount) in enumerate(entries)
+            ]
+        call = {
+            "partner": to_checksum_address(message.partner_address),
+            "token": to_checksum_address(message.token_address),
+        }  # type: Dict[str, Any]
+        if performative == RaidenMessage.Performative.OPEN_CHANNEL:
+            # a channel there before the request is not the one it opened
+            channel = cast(ChannelStateStore, self.context.channel_state).get(
+                message.partner_address, message.token_address
+            )
+            call.update(
+                method="open_channel",
+                amount=str(message.total_deposit),
+                settle_timeout=DEFAULT_SETTLE_TIMEOUT,
+                prior_channel=channel.get("channel_identifier") if channel is not None else None,
+            )
+        elif performative == RaidenMessage.Performative.CLOSE_CHANNEL:
+            call.update(method="close_channel")
+        elif performative == RaidenMessage.Performative.DEPOSIT:
+            call.update(method="fund_channel", amount=str(message.amount))
+        else:
+            call.update(
+                method="transfer",
+                amount=str(message.amount),
+                identifier=payment_identifier(message),
+            )
+        return [call]
+
+    def _release(self, message: RaidenMessage) -> None:
+        """Take an admitted message out of flight."""
+        try:
+            self._admitted.remove(id(message))
+        except KeyError:
+            return
+        cast(AdmissionControl, self.admission).release()
+
+    def _accept_before_ready(self, message: RaidenMessage) -> bool:
+        """
+        Let the message through if the node is ready, otherwise queue or reject it.
+
+        :return: whether the message should be dispatched now
+        """
+        channel_monitor = self.context.behaviours.channel_monitor
+        if channel_monitor.is_node_ready:
+            return True
+        if self.not_ready_policy == NOT_READY_QUEUE:
+            with self._queued_until_ready_lock:
+                # re-check under the lock, the node may have become ready meanwhile
+                if channel_monitor.is_node_ready:
+                    return True
+                if len(self._queued_until_ready) < self.max_queued_until_ready:
+                    self._queued_until_ready.append(message)
+                    return False
+        self._reply(
+            message.performative.value,
+            message,
+            RaidenMessage.Performative.FAILURE,
+            f"Raiden node is {channel_monitor.node_status.value}, retry later",
+        )
+        return False
+
+    @property
+    def queued_until_ready(self) -> int:
+        """Get the number of messages waiting for the node to become ready."""
+        return len(self._queued_until_ready)
+
+    def on_node_ready(self, index: int = 0) -> None:
+        """
+        Learn the channels of a node that became ready and catch up on the requests held back.
+
+        The unfinished requests are reconciled and the messages queued while
+        no node was ready are dispatched.
+
+        :param index: the index of the node
+        """
+        self._ready_at[index] = time.monotonic()
+        router = self.router
+        if router is not None and router.node_count > 1:
+            try:
+                client = cast(RaidenClient, self.context.raiden_client).nodes[index]
+                router.learn(index, client.get_channels())
+            except Exception as e:  # pylint: disable=broad-except
+                self.context.logger.warning(f"Failed to get the channels of Raiden node {index}: {e}")
+        if self._unfinished:
+            self._reconcile()
+        with self._queued_until_ready_lock:
+            queued = list(self._queued_until_ready)
+            self._queued_until_ready.clear()
+        if queued:
+            self.context.logger.info(f"Raiden node ready, dispatching {len(queued)} queued messages")
+        for message in queued:
+            self._dispatch(message)
+
+    def _schedule_reconcile(self, delay: float) -> None:
+        """Reconcile the unfinished requests in the background after `delay` seconds."""
+        timer = threading.Timer(delay, self._reconcile)
+        timer.daemon = True
+        self._reconcile_timer = timer
+        timer.start()
+
+    def _reconcile(self) -> None:
+        """
+        Reply to the requests the agent stopped during, with their outcome as the node tells it.
+
+        Requests the node still works on, or cannot tell about right now, are
+        retried every RECONCILE_RETRY_INTERVAL seconds.
+        """
+        with self._reconcile_lock:
+            unfinished, self._unfinished = self._unfinished, []
+            for record in unfinished:
+                try:
+                    outcomes = [self._reconcile_call(call) for call in record["calls"]]
+                except Exception as e:  # pylint: disable=broad-except
+                    self.context.logger.warning(f"Cannot reconcile request {record['id']} yet: {e}")
+                    self._unfinished.append(record)
+                    continue
+                self._reply_reconciled(record, outcomes)
+            if self._unfinished and self.journal is not None:
+                self._schedule_reconcile(RECONCILE_RETRY_INTERVAL)
+
+    def _reconcile_call(self, call: Dict[str, Any]) -> Tuple[bool, Any]:
+        """
+        Reconcile a journaled call with the node that has its channel.
+
+        :raises NodeUnavailable: if the node is not ready
+        :raises PendingOutcome: if the outcome is not known yet
+        """
+        node = cast(NodeRouter, self.router).route(call["partner"], call["token"])
+        now = time.monotonic()
+        # a node ready before the handler was set up counts from the setup
+        ready_for = now - self._ready_at.setdefault(node, now)
+        return reconcile_call(
+            cast(RaidenClient, self.context.raiden_client).nodes[node], call, ready_for
+        )
+
+    def _reply_reconciled(self, record: Dict[str, Any], outcomes: List[Tuple[bool, Any]]) -> None:
+        """Reply to a journaled request in its restored dialogue."""
+        journal = cast(RequestJournal, self.journal)
+        raiden_dialogues = cast(RaidenDialogues, self.context.raiden_dialogues)
+        with self._dialogues_lock:
+            message = raiden_dialogues.restore(record["dialogue"])
+        if message is None:
+            # the reply went out, only its end record was lost
+            journal.end(record["id"], "", "")
+            return
+        method = message.performative.value
+        self.context.logger.info(f"Reconciled request {record['id']} ({method}): {outcomes}")
+        self._journal_ids[id(message)] = record["id"]
+        if message.performative == RaidenMessage.Performative.BATCH_TRANSFER:
+            results = [
+                self._batch_result(call["partner"], call["token"], int(call["amount"]), succeeded, detail)
+                for call, (succeeded, detail) in zip(record["calls"], outcomes)
+            ]
+            performative, detail = self._batch_reply(results)
+            self._reply(method, message, performative, detail)
+            return
+        succeeded, result = outcomes[0]
+        if succeeded:
+            self._reply(method, message, RaidenMessage.Performative.SUCCESS, self._format_detail(result))
+        else:
+            self._reply(method, message, RaidenMessage.Performative.FAILURE, str(result))
+
+    def stop_node(self, message: RaidenMessage) -> None:
+        """Stop the node gracefully off the agent loop, it may take up to the shutdown timeout."""
         self.context.logger.info(f"Received message stop_node")
-        self.teardown()
+        future = self._run(self.context.behaviours.channel_monitor.stop_node)
+        future.add_done_callback(lambda done: self._on_call_done("stop_node", message, done))
 
     def open_channel(self, message: RaidenMessage) -> None:
-        self.send_raiden_message("open_channel", message, message.partner_address, message.token_address, message.amount)
-        
+        self.send_raiden_message("open_channel", message, message.total_deposit)
+
     def close_channel(self, message: RaidenMessage) -> None:
-        self.send_raiden_message("close_channel", message, message.partner_address, message.token_address)
-        
+        self.send_raiden_message("close_channel", message)
+
     def transfer(self, message: RaidenMessage) -> None:
-        self.send_raiden_message("transfer", message, message.partner_address, message.token_address, message.amount)
-        
+        self.send_raiden_message(
+            "transfer", message, message.amount, identifier=payment_identifier(message)
+        )
+
 
     def deposit(self, message: RaidenMessage) -> None:
-        self.send_raiden_message("fund_channel", message, message.partner_address, message.token_address, message.amount)
+        self.send_raiden_message("fund_channel", message, message.amount)
+
+    def send_raiden_message(self, method, message, *args, **kwargs) -> Future:
+        """
+        Call the Raiden node on the message's channel and reply with the outcome.
+
+        In pool mode the call is queued on the lane of the message's channel
+        at the priority of the message's performative and the reply is put on
+        the outbox once it completes, so calls on one channel keep their
+        arrival order; in sync mode it runs inline.
+
+        :return: the future of the Raiden call
+        """
+        lane = (message.partner_address, message.token_address)
+        future = self._call_raiden(
+            method, lane, *args, priority=self.priorities[message.performative], **kwargs
+        )
+        future.add_done_callback(lambda done: self._on_call_done(method, message, done))
+        return future
+
+    def batch_transfer(self, message: RaidenMessage) -> None:
+        """Fan the entries of a batch out as transfers and reply once with all results."""
+        if not len(message.partner_addresses) == len(message.token_addresses) == len(message.amounts):
+            self._reply(
+                "batch_transfer",
+                message,
+                RaidenMessage.Performative.FAILURE,
+                "partner_addresses, token_addresses and amounts differ in length",
+            )
+            return
+        entries = list(zip(message.partner_addresses, message.token_addresses, message.amounts))
+        if not entries:
+            self._reply("batch_transfer", message, RaidenMessage.Performative.SUCCESS, "[]")
+            return
+
+        results = [None] * len(entries)  # type: List[Optional[Dict[str, Any]]]
+        remaining = [len(entries)]
+        results_lock = threading.Lock()
+
+        def on_entry_done(index: int, future: Future) -> None:
+            partner_address, token_address, amount = entries[index]
+            try:
+                succeeded, detail = True, future.result()
+            except Exception as e:
+                succeeded, detail = False, str(e)
+            result = self._batch_result(
+                to_checksum_address(partner_address),
+                to_checksum_address(token_address),
+                amount,
+                succeeded,
+                detail,
+            )
+            with results_lock:
+                results[index] = result
+                remaining[0] -= 1
+                if remaining[0]:
+                    return
+            performative, detail = self._batch_reply(cast(List[Dict[str, Any]], results))
+            self._reply("batch_transfer", message, performative, detail)
 
-    def send_raiden_message(self, method, message, *args, **kwargs):
+        for index, (partner_address, token_address, amount) in enumerate(entries):
+            future = self._call_raiden(
+                "transfer",
+                (partner_address, token_address),
+                amount,
+                priority=self.priorities[message.performative],
+                identifier=payment_identifier(message, index),
+            )
+            future.add_done_callback(partial(on_entry_done, index))
+
+    @staticmethod
+    def _batch_result(
+        partner_address: str, token_address: str, amount: int, succeeded: bool, detail: Any
+    ) -> Dict[str, Any]:
+        """Get the result of one transfer of a batch."""
+        return {
+            "partner_address": partner_address,
+            "token_address": token_address,
+            "amount": amount,
+            "detail": detail,
+            "status": (
+                RaidenMessage.Performative.SUCCESS.value
+                if succeeded
+                else RaidenMessage.Performative.FAILURE.value
+            ),
+        }
+
+    def _batch_reply(
+        self, results: List[Dict[str, Any]]
+    ) -> Tuple[RaidenMessage.Performative, str]:
+        """Get the reply to a batch, it succeeds if all its transfers did."""
+        all_succeeded = all(
+            entry["status"] == RaidenMessage.Performative.SUCCESS.value for entry in results
+        )
+        performative = (
+            RaidenMessage.Performative.SUCCESS
+            if all_succeeded
+            else RaidenMessage.Performative.FAILURE
+        )
+        return performative, self._format_detail(results)
+
+    def _call_raiden(
+        self,
+        method: str,
+        lane: Tuple[bytes, bytes],
+        *args,
+        priority: int = DEFAULT_PRIORITY,
+        **kwargs
+    ) -> Future:
+        """
+        Run a Raiden API call on the lane of its channel, or inline in sync mode.
+
+        The lane is the (partner_address, token_address) pair of the channel as
+        20-byte addresses, the call gets them as checksummed hex ahead of `args`.
+        Calls on one lane run in order, a more urgent `priority` gets the lane
+        a free slot ahead of the others.
+        The call goes to the node that has the channel, see NodeRouter.
+        """
+        future = Future()  # type: Future
+        router = cast(NodeRouter, self.router)
+        try:
+            node = router.route(*lane, new_channel=method == "open_channel")
+            version = self._preflight(method, lane, args)
+        except ValueError as e:
+            future.set_exception(e)
+            return future
+
+        call = getattr(cast(RaidenClient, self.context.raiden_client).nodes[node], method)
+        partner_address, token_address = lane
+        args = (to_checksum_address(partner_address), to_checksum_address(token_address)) + args
+        router.acquire(node)
+        if self.lanes is not None:
+            future = self.lanes.submit(lane, call, *args, priority=priority, **kwargs)
+        else:
+            future = self._run(call, *args, **kwargs)
+        future.add_done_callback(lambda _: router.release(node))
+        future.add_done_callback(
+            partial(self._update_channel_state, method, lane, args[2:], version)
+        )
+        return future
+
+    def _run(self, fn, *args, **kwargs) -> Future:
+        """Run a call on the worker pool, or inline in sync mode."""
+        if self._executor is not None:
+            return self._executor.submit(fn, *args, **kwargs)
+        future = Future()  # type: Future
         try:
-            response = getattr(raiden, method)(*args, **kwargs)
-            response = message.reply(
-                performative=RaidenMessage.Performative.SUCCESS,
-                action=message.performative,
-                detail=response,
+            future.set_result(fn(*args, **kwargs))
+        except Exception as e:
+            future.set_exception(e)
+        return future
+
+    def _preflight(self, method: str, lane: Tuple[bytes, bytes], args: Tuple) -> Optional[int]:
+        """
+        Reject a transfer or deposit the channel cannot take and reserve it otherwise.
+
+        :return: the version of the cached channel a transfer reserved on
+        :raises ValueError: if the call cannot succeed
+        """
+        if method not in ("transfer", "fund_channel"):
+            return None
+        partner_address, token_address = lane
+        amount = parse_amount(args[0])
+        channel_state = cast(ChannelStateStore, self.context.channel_state)
+        version = None
+        if method == "transfer":
+            reason, version = channel_state.reserve_transfer(partner_address, token_address, amount)
+        else:
+            reason = channel_state.reserve_deposit(partner_address, token_address, amount)
+        if reason is not None:
+            raise ValueError(reason)
+        return version
+
+    def _update_channel_state(
+        self,
+        method: str,
+        lane: Tuple[bytes, bytes],
+        args: Tuple,
+        version: Optional[int],
+        future: Future,
+    ) -> None:
+        """Apply the outcome of a Raiden call to the channel state store."""
+        channel_state = cast(ChannelStateStore, self.context.channel_state)
+        succeeded = future.exception() is None
+        if succeeded:
+            result = future.result()
+            if isinstance(result, dict) and "partner_address" in result and "token_address" in result:
+                channel_state.update_channel(result)
+        partner_address, token_address = lane
+        if method == "transfer":
+            channel_state.complete_transfer(
+                partner_address, token_address, int(args[0]), succeeded, version
             )
+        elif method == "fund_channel":
+            channel_state.complete_deposit(partner_address, token_address, int(args[0]))
+
+    def _on_call_done(self, method: str, message: RaidenMessage, future: Future) -> None:
+        """Reply to the message once the Raiden call has completed."""
+        try:
+            result = future.result()
         except Exception as e:
-            response = message.reply(
-                performative=RaidenMessage.Performative.FAILURE,
-                action=message.performative,
-                detail=str(e),
+            self._reply(method, message, RaidenMessage.Performative.FAILURE, str(e))
+        else:
+            self._reply(method, message, RaidenMessage.Performative.SUCCESS, self._format_detail(result))
+
+    def notify(
+        self, counterparty: str, performative: RaidenMessage.Performative, **kwargs: Any
+    ) -> None:
+        """Start a dialogue with a counterparty and put its first message on the outbox."""
+        raiden_dialogues = cast(RaidenDialogues, self.context.raiden_dialogues)
+        with self._dialogues_lock:
+            message, _ = raiden_dialogues.create(
+                counterparty=counterparty, performative=performative, **kwargs
             )
-        self.context.logger.info(f"{method}: {response}")
-        self.context.outbox.put_message(response)
-        return response
+        self.context.outbox.put_message(message)
 
-    def teardown(self) -> None:
-        pass
+    def _reply(
+        self,
+        method: str,
+        message: RaidenMessage,
+        performative: RaidenMessage.Performative,
+        detail: str,
+    ) -> None:
+        """Build the reply in the message dialogue and put it on the outbox."""
+        self._release(message)
+        request_id = self._journal_ids.pop(id(message), None)
+        arrived_at = self._arrivals.pop(id(message), None)
+        try:
+            raiden_dialogues = cast(RaidenDialogues, self.context.raiden_dialogues)
+            with self._dialogues_lock:
+                raiden_dialogue = cast(
+                    Optional[RaidenDialogue], raiden_dialogues.get_dialogue(message)
+                )
+                if raiden_dialogue is None:
+                    self.context.logger.error(f"{method}: no dialogue for message={message}")
+                    if self.reply_cache is not None:
+                        self.reply_cache.discard(self._request_key(message))
+                    return
+                response = raiden_dialogue.reply(
+                    performative=performative,
+                    target_message=message,
+                    action=message.performative.value,
+                    detail=detail,
+                )
+            self.context.logger.info(f"{method}: {response}")
+            self.context.outbox.put_message(response)
+            if self.reply_cache is not None:
+                self.reply_cache.store(self._request_key(message), response)
+            if arrived_at is not None:
+                cast(SkillMetrics, self.context.metrics).observe_request(
+                    message.performative.value,
+                    performative.value,
+                    time.perf_counter() - arrived_at,
+                )
+        finally:
+            # the outcome is known, a restart must not reconcile the request again
+            if request_id is not None and self.journal is not None:
+                self.journal.end(request_id, performative.value, detail)
+
+    @staticmethod
+    def _format_detail(result: Any) -> str:
+        """Render a Raiden API response as the reply detail."""
+        if isinstance(result, (dict, list)):
+            return json.dumps(result)
+        return str(result)
 
+    def teardown(self) -> None:
+        if self._reconcile_timer is not None:
+            self._reconcile_timer.cancel()
+            self._reconcile_timer = None
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+            self.lanes = None
+        if self.journal is not None:
+            self.journal.close()
+            self.journal = None
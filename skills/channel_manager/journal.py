@@ -0,0 +1,313 @@
+"""This module contains the write-ahead journal of the requests sent to the Raiden node."""
+
+import json
+import os
+import queue
+import threading
+import time
+from concurrent.futures import Future
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_SYNC_DELAY = 0.0  # time in seconds
+DEFAULT_MAX_JOURNAL_SIZE = 16 * 1024 * 1024  # size in bytes
+DEFAULT_PAGE_SIZE = 100
+# the time a node has to be ready before a call it shows no trace of is taken as never sent:
+# a payment shows up as pending within a read timeout, an on-chain call once mined
+TRANSFER_GRACE_PERIOD = 30.0  # time in seconds
+TRANSACTION_GRACE_PERIOD = 600.0  # time in seconds
+EVENT_PAYMENT_SENT_SUCCESS = "EventPaymentSentSuccess"
+EVENT_PAYMENT_SENT_FAILED = "EventPaymentSentFailed"
+
+RECORD_BEGIN = "begin"
+RECORD_END = "end"
+_STOP = None
+
+
+class PendingOutcome(Exception):
+    """The outcome of a call is not known yet, the node still works on it."""
+
+
+class RequestJournal:
+    """
+    A write-ahead journal of the requests that change channels on chain or off chain.
+
+    A request is appended before it is dispatched to the node and ended once
+    its reply is on the outbox. A writer thread appends everything queued
+    meanwhile with a single fsync and only then lets the requests of the batch
+    go, so concurrent requests share the cost of a disk flush. The requests
+    still unfinished when the journal is opened are the ones the agent stopped
+    during, the node has to tell what became of them.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        sync_delay: float = DEFAULT_SYNC_DELAY,
+        max_size: int = DEFAULT_MAX_JOURNAL_SIZE,
+    ) -> None:
+        """
+        Initialize the journal.
+
+        :param path: the journal file
+        :param sync_delay: the time in seconds a batch waits for more records before its fsync
+        :param max_size: the size in bytes beyond which the journal is rewritten with the unfinished requests only
+        """
+        self.path = path
+        self.sync_delay = sync_delay
+        self.max_size = max_size
+        self.syncs = 0
+        self.records = 0
+        self._lock = threading.Lock()
+        self._next_id = 1
+        self._unfinished = {}  # type: Dict[int, Dict[str, Any]]
+        self._queue = queue.Queue()  # type: queue.Queue
+        self._file = None  # type: Optional[Any]
+        self._writer = None  # type: Optional[threading.Thread]
+
+    def open(self) -> List[Dict[str, Any]]:
+        """
+        Load the journal, compact it and start appending to it.
+
+        :return: the unfinished requests, in the order they began
+        """
+        records = {}  # type: Dict[int, Dict[str, Any]]
+        last_id = 0
+        try:
+            with open(self.path, "r") as f:
+                for line in f:
+                    try:
+                        record = json.loads(line)
+                    except ValueError:
+                        # the tail of a write the agent stopped during
+                        continue
+                    request_id = int(record["id"])
+                    last_id = max(last_id, request_id)
+                    if record["op"] == RECORD_BEGIN:
+                        records[request_id] = record
+                    else:
+                        records.pop(request_id, None)
+        except FileNotFoundError:
+            pass
+        self._next_id = last_id + 1
+        self._unfinished = records
+        self._rewrite()
+        self._writer = threading.Thread(
+            target=self._write_loop, name="request_journal", daemon=True
+        )
+        self._writer.start()
+        return [records[request_id] for request_id in sorted(records)]
+
+    def begin(self, request: Dict[str, Any]) -> Tuple[int, Future]:
+        """
+        Append a request ahead of its dispatch.
+
+        :param request: the request, it must be JSON serializable
+        :return: the id of the request and a future done once the request is on disk
+        """
+        durable = Future()  # type: Future
+        with self._lock:
+            request_id = self._next_id
+            self._next_id += 1
+            record = dict(request, op=RECORD_BEGIN, id=request_id)
+            self._unfinished[request_id] = record
+        self._queue.put((record, durable))
+        return request_id, durable
+
+    def end(self, request_id: int, outcome: str, detail: str) -> None:
+        """
+        Append the outcome of a request, it does not wait for the disk.
+
+        A request whose end is lost is reconciled with the node again.
+
+        :param request_id: the id of the request
+        :param outcome: the performative of the reply
+        :param detail: the detail of the reply
+        """
+        with self._lock:
+            self._unfinished.pop(request_id, None)
+        record = {"op": RECORD_END, "id": request_id, "outcome": outcome, "detail": detail}
+        self._queue.put((record, None))
+
+    @property
+    def unfinished(self) -> int:
+        """Get the number of requests that began and did not end yet."""
+        return len(self._unfinished)
+
+    def close(self) -> None:
+        """Write the queued records and stop appending."""
+        if self._writer is None:
+            return
+        self._queue.put(_STOP)
+        self._writer.join()
+        self._writer = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _write_loop(self) -> None:
+        """Append queued records in batches, one fsync per batch."""
+        stopping = False
+        while not stopping:
+            batch = [self._queue.get()]
+            if self.sync_delay > 0 and batch[0] is not _STOP:
+                time.sleep(self.sync_delay)
+            while True:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            if _STOP in batch:
+                stopping = True
+                batch = [item for item in batch if item is not _STOP]
+            if not batch:
+                continue
+            error = None  # type: Optional[Exception]
+            try:
+                self._append(record for record, _ in batch)
+            except OSError as e:
+                error = e
+            for _, durable in batch:
+                if durable is None:
+                    continue
+                if error is None:
+                    durable.set_result(None)
+                else:
+                    durable.set_exception(error)
+            if error is None and self._file is not None and self._file.tell() > self.max_size:
+                self._rewrite()
+
+    def _append(self, records: Any) -> None:
+        """Write records and flush them to disk."""
+        f = self._file
+        if f is None:
+            raise OSError(f"Request journal {self.path} is not open")
+        count = 0
+        for record in records:
+            f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            count += 1
+        f.flush()
+        os.fsync(f.fileno())
+        self.syncs += 1
+        self.records += count
+
+    def _rewrite(self) -> None:
+        """Atomically replace the journal with the unfinished requests and reopen it."""
+        with self._lock:
+            records = [self._unfinished[request_id] for request_id in sorted(self._unfinished)]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            for record in records:
+                f.write(json.dumps(record, separators=(",", ":")) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        if self._file is not None:
+            self._file.close()
+        os.replace(tmp_path, self.path)
+        self._file = open(self.path, "a")
+
+
+def _channel(raiden: Any, partner: str, token: str) -> Optional[Dict[str, Any]]:
+    """Get the channel with `partner` in the token network of `token`, if there is one."""
+    for channel in raiden.get_channels(token=token):
+        if channel.get("partner_address", "").lower() == partner.lower():
+            return channel
+    return None
+
+
+def _sent_payment(raiden: Any, partner: str, token: str, identifier: int) -> Optional[Dict[str, Any]]:
+    """Get the event of the payment with `identifier` to `partner`, if the node made it."""
+    offset = 0
+    while True:
+        page = raiden.get_payments(
+            partner=partner, token=token, limit=DEFAULT_PAGE_SIZE, offset=offset
+        )
+        offset += len(page)
+        for event in page:
+            if event.get("event") in (
+                EVENT_PAYMENT_SENT_SUCCESS,
+                EVENT_PAYMENT_SENT_FAILED,
+            ) and str(event.get("identifier")) == str(identifier):
+                return event
+        if len(page) < DEFAULT_PAGE_SIZE:
+            return None
+
+
+def reconcile_call(raiden: Any, call: Dict[str, Any], ready_for: float) -> Tuple[bool, Any]:
+    """
+    Find out from the node what became of a journaled call.
+
+    A node reattached to may still be working on a call the agent sent
+    before it stopped, before the call leaves any trace. So a call the node
+    shows no trace of only counts as never sent, and safe to send again,
+    once the node has been ready for the grace period of the call and has
+    no other payment pending on the channel.
+
+    :param raiden: the Raiden API client
+    :param call: the journaled call, with `method`, `partner`, `token` and, as the method has them,
+        `amount`, `identifier`, `settle_timeout` and the `prior_channel` identifier
+    :param ready_for: the time in seconds the node has been ready
+    :return: whether the call succeeded and its result or the reason it failed
+    :raises PendingOutcome: if the node still works on the call, or may still
+    """
+    method, partner, token = call["method"], call["partner"], call["token"]
+    if method == "transfer":
+        event = _sent_payment(raiden, partner, token, call["identifier"])
+        if event is not None:
+            succeeded = event["event"] == EVENT_PAYMENT_SENT_SUCCESS
+            return succeeded, event if succeeded else event.get("reason", "Payment failed")
+        pending = raiden.get_pending_transfer(token=token, partner=partner)
+        for transfer in pending:
+            if str(transfer.get("payment_identifier")) == str(call["identifier"]):
+                raise PendingOutcome(f"Payment {call['identifier']} is pending")
+        if pending:
+            raise PendingOutcome(
+                f"Payments to {partner} are pending, payment {call['identifier']} may follow"
+            )
+        _settle(ready_for, TRANSFER_GRACE_PERIOD, f"Payment {call['identifier']}")
+        return False, "Payment was not sent before the agent stopped"
+
+    channel = _channel(raiden, partner, token)
+    if method == "open_channel":
+        if channel is not None and _opened_by(channel, call):
+            return True, channel
+        _settle(ready_for, TRANSACTION_GRACE_PERIOD, "Channel opening")
+        if channel is not None:
+            return False, "Channel was open already, not by this request"
+        return False, "Channel was not opened before the agent stopped"
+    if method == "close_channel":
+        if channel is not None and channel.get("state") != "opened":
+            return True, channel
+        _settle(ready_for, TRANSACTION_GRACE_PERIOD, "Channel closing")
+        return False, "Channel was not closed before the agent stopped"
+    if method == "fund_channel":
+        if channel is not None and int(channel.get("total_deposit", 0)) >= int(call["amount"]):
+            return True, channel
+        _settle(ready_for, TRANSACTION_GRACE_PERIOD, "Deposit")
+        return False, "Deposit was not made before the agent stopped"
+    raise ValueError(f"Cannot reconcile {method}")
+
+
+def _opened_by(channel: Dict[str, Any], call: Dict[str, Any]) -> bool:
+    """Check that an open channel is the one an open_channel call asked for, not one there before it."""
+    if channel.get("state") != "opened":
+        return False
+    prior_channel = call.get("prior_channel")
+    if prior_channel is not None and str(channel.get("channel_identifier")) == str(prior_channel):
+        return False
+    settle_timeout = call.get("settle_timeout")
+    if settle_timeout is not None and int(channel.get("settle_timeout", 0)) != int(settle_timeout):
+        return False
+    return int(channel.get("total_deposit", 0)) >= int(call["amount"])
+
+
+def _settle(ready_for: float, grace_period: float, what: str) -> None:
+    """
+    Make sure the node had time to show a call it was still working on.
+
+    :raises PendingOutcome: if the node has not been ready for the grace period
+    """
+    if ready_for < grace_period:
+        raise PendingOutcome(
+            f"{what} left no trace yet, waiting {grace_period - ready_for:.0f}s for the node"
+        )
@@ -0,0 +1,250 @@
+"""This module contains the per-channel execution lanes of the channel manager."""
+
+import heapq
+import itertools
+import threading
+import time
+from collections import deque
+from concurrent.futures import Executor, Future
+from typing import Any, Callable, Deque, Dict, Hashable, List, Optional, Set, Tuple
+
+DEFAULT_MAX_ACTIVE_LANES = 4
+DEFAULT_PRIORITY = 0
+DEFAULT_PRIORITY_AGING = 1.0  # time in seconds per priority level
+
+
+class LaneStats:
+    """Depth and queue-wait statistics of a single lane or priority class."""
+
+    __slots__ = ("depth", "started", "total_wait", "max_wait", "last_wait")
+
+    def __init__(self) -> None:
+        """Initialize the statistics."""
+        self.depth = 0
+        self.started = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.last_wait = 0.0
+
+    def record_wait(self, wait: float) -> None:
+        """Record the queue wait of a call that just started."""
+        self.started += 1
+        self.total_wait += wait
+        self.last_wait = wait
+        if wait > self.max_wait:
+            self.max_wait = wait
+
+    def as_dict(self) -> Dict[str, float]:
+        """Get the statistics as a dictionary."""
+        return {
+            "depth": self.depth,
+            "started": self.started,
+            "total_wait": self.total_wait,
+            "avg_wait": self.total_wait / self.started if self.started else 0.0,
+            "max_wait": self.max_wait,
+            "last_wait": self.last_wait,
+        }
+
+
+class _LaneTask:
+    """
+    A call waiting in a lane.
+
+    The deadline of a call is the time it was queued plus `aging` seconds per
+    priority level, so a call of a lower priority goes ahead of the calls of a
+    higher one once it waited that much longer.
+    """
+
+    __slots__ = ("fn", "args", "kwargs", "future", "enqueued_at", "priority", "order")
+
+    def __init__(
+        self,
+        fn: Callable,
+        args: Tuple,
+        kwargs: Dict[str, Any],
+        priority: int,
+        aging: float,
+        sequence: int,
+    ) -> None:
+        """
+        Initialize the call.
+
+        :param fn: the callable to run
+        :param args: the positional arguments of the call
+        :param kwargs: the keyword arguments of the call
+        :param priority: the priority of the call, 0 is the most urgent
+        :param aging: the time in seconds per priority level added to the deadline
+        :param sequence: the submission number of the call, it breaks ties
+        """
+        self.fn = fn
+        self.args = args
+        self.kwargs = kwargs
+        self.future = Future()  # type: Future
+        self.enqueued_at = time.monotonic()
+        self.priority = priority
+        self.order = (self.enqueued_at + priority * aging, sequence)
+
+
+class ChannelLaneScheduler:
+    """
+    Run calls on an executor with one FIFO lane per channel.
+
+    Calls sharing a lane key run one at a time, calls on different lanes run
+    in parallel, in the order they were submitted: a call on a channel may
+    depend on the ones before it. At most `max_active_lanes` lanes hold a
+    running call at any time; the others wait for a free slot. Calls have a
+    priority, 0 being the most urgent, that decides which lane gets a free
+    slot: the one holding the call with the earliest deadline, the time it
+    was queued plus `aging` seconds per priority level. Lanes with urgent calls
+    skip ahead of a backlog, and a backlog of less urgent calls still gets its
+    turn, so no lane starves.
+    """
+
+    def __init__(
+        self,
+        executor: Executor,
+        max_active_lanes: int = DEFAULT_MAX_ACTIVE_LANES,
+        aging: float = DEFAULT_PRIORITY_AGING,
+    ) -> None:
+        """
+        Initialize the scheduler.
+
+        :param executor: the executor the calls run on
+        :param max_active_lanes: the maximum number of lanes running concurrently
+        :param aging: the time in seconds a call waits to go ahead of calls one priority level more urgent
+        """
+        if max_active_lanes < 1:
+            raise ValueError("max_active_lanes must be at least 1")
+        self._executor = executor
+        self._max_active_lanes = max_active_lanes
+        self._aging = aging
+        self._sequence = itertools.count()
+        self._lock = threading.Lock()
+        self._lanes = {}  # type: Dict[Hashable, Deque[_LaneTask]]
+        # a heap of the orders of the calls queued on each lane, its head is the
+        # lane's urgency; orders of started calls are dropped once they reach the head
+        self._orders = {}  # type: Dict[Hashable, List[Tuple[float, int]]]
+        self._active = set()  # type: Set[Hashable]
+        # (urgency, lane key) of the lanes waiting for a slot, entries of lanes
+        # that started or got a more urgent call meanwhile are skipped
+        self._ready = []  # type: List[Tuple[Tuple[float, int], Hashable]]
+        # the statistics of the lanes with queued or running calls
+        self._stats = {}  # type: Dict[Hashable, LaneStats]
+        self._priority_stats = {}  # type: Dict[int, LaneStats]
+
+    @property
+    def active_lanes(self) -> int:
+        """Get the number of lanes with a running call."""
+        return len(self._active)
+
+    def submit(
+        self,
+        key: Hashable,
+        fn: Callable,
+        *args: Any,
+        priority: int = DEFAULT_PRIORITY,
+        **kwargs: Any
+    ) -> Future:
+        """
+        Queue a call on the lane of `key`.
+
+        :param key: the lane key, e.g. the (partner_address, token_address) pair
+        :param fn: the callable to run
+        :param priority: the priority of the call, 0 is the most urgent
+        :return: the future of the call
+        """
+        task = _LaneTask(fn, args, kwargs, priority, self._aging, next(self._sequence))
+        with self._lock:
+            lane = self._lanes.setdefault(key, deque())
+            lane.append(task)
+            orders = self._orders.setdefault(key, [])
+            more_urgent = not orders or task.order < orders[0]
+            heapq.heappush(orders, task.order)
+            stats = self._stats.get(key)
+            if stats is None:
+                stats = self._stats[key] = LaneStats()
+            stats.depth += 1
+            priority_stats = self._priority_stats.get(priority)
+            if priority_stats is None:
+                priority_stats = self._priority_stats[priority] = LaneStats()
+            priority_stats.depth += 1
+            if key in self._active:
+                return task.future
+            if len(self._active) < self._max_active_lanes:
+                self._start_next(key)
+            elif more_urgent:
+                heapq.heappush(self._ready, (task.order, key))
+        return task.future
+
+    def _start_next(self, key: Hashable) -> None:
+        """Start the oldest call of the lane. Must be called with the lock held."""
+        lane = self._lanes[key]
+        task = lane.popleft()
+        if lane:
+            # calls start in submission order, so the started ones are those before the head
+            orders = self._orders[key]
+            head = lane[0].order[1]
+            while orders[0][1] < head:
+                heapq.heappop(orders)
+        else:
+            del self._orders[key]
+        self._active.add(key)
+        wait = time.monotonic() - task.enqueued_at
+        self._stats[key].record_wait(wait)
+        self._priority_stats[task.priority].record_wait(wait)
+        self._executor.submit(self._run, key, task)
+
+    def _next_ready(self) -> Optional[Hashable]:
+        """Get the waiting lane with the most urgent call. Must be called with the lock held."""
+        while self._ready:
+            urgency, key = heapq.heappop(self._ready)
+            orders = self._orders.get(key)
+            if key not in self._active and orders and orders[0] == urgency:
+                return key
+        return None
+
+    def _run(self, key: Hashable, task: _LaneTask) -> None:
+        """Run a call and hand its lane slot on."""
+        if task.future.set_running_or_notify_cancel():
+            try:
+                result = task.fn(*task.args, **task.kwargs)
+            except Exception as e:  # pylint: disable=broad-except
+                task.future.set_exception(e)
+            else:
+                task.future.set_result(result)
+
+        with self._lock:
+            self._stats[key].depth -= 1
+            self._priority_stats[task.priority].depth -= 1
+            # hand the slot to the lane with the most urgent call, this one included
+            self._active.discard(key)
+            if self._lanes[key]:
+                heapq.heappush(self._ready, (self._orders[key][0], key))
+            else:
+                del self._lanes[key]
+                del self._stats[key]
+            next_key = self._next_ready()
+            if next_key is not None:
+                self._start_next(next_key)
+
+    def stats(self) -> Dict[Hashable, Dict[str, float]]:
+        """Get depth and wait statistics of every lane with queued or running calls."""
+        with self._lock:
+            return {key: stats.as_dict() for key, stats in self._stats.items()}
+
+    def priority_stats(self) -> Dict[int, Dict[str, float]]:
+        """Get depth and wait statistics of every priority seen so far."""
+        with self._lock:
+            return {
+                priority: stats.as_dict()
+                for priority, stats in sorted(self._priority_stats.items())
+            }
+
+    def hottest_lanes(self, limit: int = 10) -> List[Tuple[Hashable, Dict[str, float]]]:
+        """Get the lanes with the deepest queues, deepest first."""
+        lanes = sorted(
+            self.stats().items(),
+            key=lambda item: (item[1]["depth"], item[1]["max_wait"]),
+            reverse=True,
+        )
+        return lanes[:limit]
@@ -0,0 +1,279 @@
+"""This module contains the metrics of the channel manager and their HTTP endpoint."""
+
+import threading
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+from aea.skills.base import Model
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 9464
+DEFAULT_LATENCY_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 300.0
+)
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+class Histogram:
+    """A cumulative latency histogram in the Prometheus bucket layout."""
+
+    __slots__ = ("buckets", "counts", "sum", "count")
+
+    def __init__(self, buckets: Sequence[float] = DEFAULT_LATENCY_BUCKETS) -> None:
+        """Initialize the histogram."""
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        """Record one observation."""
+        self.counts[bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def render(self, name: str, labels: str) -> List[str]:
+        """Get the exposition lines of the histogram."""
+        lines = []
+        cumulative = 0
+        separator = "," if labels else ""
+        for bound, count in zip(self.buckets, self.counts):
+            cumulative += count
+            lines.append(f'{name}_bucket{{{labels}{separator}le="{bound}"}} {cumulative}')
+        lines.append(f'{name}_bucket{{{labels}{separator}le="+Inf"}} {self.count}')
+        lines.append(f"{name}_sum{{{labels}}} {self.sum}")
+        lines.append(f"{name}_count{{{labels}}} {self.count}")
+        return lines
+
+    def copy(self) -> "Histogram":
+        """Get a snapshot of the histogram."""
+        histogram = Histogram(self.buckets)
+        histogram.counts = list(self.counts)
+        histogram.sum = self.sum
+        histogram.count = self.count
+        return histogram
+
+
+class SkillMetrics(Model):
+    """
+    The request metrics of the channel manager, served in the Prometheus text format.
+
+    The handler only records a count and a latency per reply; everything else
+    is collected from the other components when the endpoint is scraped.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the metrics."""
+        self.enabled = bool(kwargs.pop("enabled", True))
+        self.host = kwargs.pop("host", DEFAULT_HOST)
+        self.port = int(kwargs.pop("port", DEFAULT_PORT))
+        super().__init__(**kwargs)
+        self._lock = threading.Lock()
+        self._requests = {}  # type: Dict[Tuple[str, str], int]
+        self._latency = {}  # type: Dict[str, Histogram]
+        self._server = None  # type: Optional[ThreadingHTTPServer]
+
+    def setup(self) -> None:
+        """Start serving the metrics."""
+        if not self.enabled:
+            return
+        metrics = self
+
+        class _MetricsRequestHandler(BaseHTTPRequestHandler):
+            def do_GET(self) -> None:  # pylint: disable=invalid-name
+                if self.path.split("?", 1)[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = metrics.render().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", CONTENT_TYPE)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format: str, *args: Any) -> None:  # pylint: disable=redefined-builtin
+                pass
+
+        try:
+            self._server = ThreadingHTTPServer((self.host, self.port), _MetricsRequestHandler)
+        except OSError as e:
+            # the endpoint is optional, the skill runs on without it
+            self.context.logger.warning(
+                f"Not serving metrics, cannot listen on {self.host}:{self.port}: {e}"
+            )
+            return
+        self._server.daemon_threads = True
+        threading.Thread(
+            target=self._server.serve_forever, name="metrics_http", daemon=True
+        ).start()
+        self.context.logger.info(f"Serving metrics on http://{self.host}:{self.port}/metrics")
+
+    def teardown(self) -> None:
+        """Stop serving the metrics."""
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+    def observe_request(self, performative: str, outcome: str, seconds: float) -> None:
+        """
+        Record a handled request.
+
+        :param performative: the performative of the request
+        :param outcome: the performative of the reply
+        :param seconds: the time from the request's arrival to its reply
+        """
+        with self._lock:
+            key = (performative, outcome)
+            self._requests[key] = self._requests.get(key, 0) + 1
+            histogram = self._latency.get(performative)
+            if histogram is None:
+                histogram = self._latency[performative] = Histogram()
+            histogram.observe(seconds)
+
+    def render(self) -> str:
+        """Get all metrics in the Prometheus text exposition format."""
+        lines = []  # type: List[str]
+        with self._lock:
+            lines.append("# TYPE channel_manager_requests_total counter")
+            for (performative, outcome), count in sorted(self._requests.items()):
+                lines.append(
+                    f'channel_manager_requests_total{{performative="{performative}",outcome="{outcome}"}} {count}'
+                )
+            lines.append("# TYPE channel_manager_request_latency_seconds histogram")
+            for performative, histogram in sorted(self._latency.items()):
+                lines.extend(
+                    histogram.render(
+                        "channel_manager_request_latency_seconds",
+                        f'performative="{performative}"',
+                    )
+                )
+        lines.extend(self._render_raiden_client())
+        lines.extend(self._render_handler())
+        lines.extend(self._render_node())
+        lines.extend(self._render_dialogues())
+        return "\n".join(lines) + "\n"
+
+    def _render_raiden_client(self) -> List[str]:
+        """Get the Raiden REST call metrics of every node."""
+        stats = [
+            (index, endpoint, latency)
+            for index, client in enumerate(self.context.raiden_client.nodes)
+            for endpoint, latency in sorted(client.latency_stats().items())
+        ]
+        histograms = [
+            (index, endpoint, histogram)
+            for index, client in enumerate(self.context.raiden_client.nodes)
+            for endpoint, histogram in sorted(client.latency_histograms().items())
+        ]
+        families = (
+            ("raiden_api_requests_total", "counter", "calls"),
+            ("raiden_api_errors_total", "counter", "errors"),
+            ("raiden_api_latency_max_seconds", "gauge", "max"),
+        )
+        lines = []  # type: List[str]
+        for name, kind, key in families:
+            lines.append(f"# TYPE {name} {kind}")
+            for index, endpoint, latency in stats:
+                lines.append(f'{name}{{node="{index}",endpoint="{endpoint}"}} {latency[key]}')
+        lines.append("# TYPE raiden_api_latency_seconds histogram")
+        for index, endpoint, histogram in histograms:
+            lines.extend(
+                histogram.render(
+                    "raiden_api_latency_seconds", f'node="{index}",endpoint="{endpoint}"'
+                )
+            )
+        return lines
+
+    def _render_handler(self) -> List[str]:
+        """Get the queue depth and admission metrics of the channel handler."""
+        channel_handler = self.context.handlers.channel_handler
+        lane_depth = 0
+        active_lanes = 0
+        priority_stats = {}  # type: Dict[int, Dict[str, float]]
+        if channel_handler.lanes is not None:
+            lane_depth = sum(
+                int(stats["depth"]) for stats in channel_handler.lanes.stats().values()
+            )
+            active_lanes = channel_handler.lanes.active_lanes
+            priority_stats = channel_handler.lanes.priority_stats()
+        reply_cache = channel_handler.reply_cache
+        duplicates = reply_cache.duplicates if reply_cache is not None else 0
+        admission = channel_handler.admission
+        in_flight = rate_limited = overloaded = 0
+        if admission is not None:
+            in_flight = admission.in_flight
+            rate_limited = admission.rate_limited
+            overloaded = admission.overloaded
+        lines = [
+            "# TYPE channel_manager_lane_queue_depth gauge",
+            f"channel_manager_lane_queue_depth {lane_depth}",
+            "# TYPE channel_manager_active_lanes gauge",
+            f"channel_manager_active_lanes {active_lanes}",
+            "# TYPE channel_manager_queued_until_ready gauge",
+            f"channel_manager_queued_until_ready {channel_handler.queued_until_ready}",
+            "# TYPE channel_manager_duplicate_requests_total counter",
+            f"channel_manager_duplicate_requests_total {duplicates}",
+            "# TYPE channel_manager_in_flight_requests gauge",
+            f"channel_manager_in_flight_requests {in_flight}",
+            "# TYPE channel_manager_rejected_requests_total counter",
+            f'channel_manager_rejected_requests_total{{reason="rate_limited"}} {rate_limited}',
+            f'channel_manager_rejected_requests_total{{reason="overloaded"}} {overloaded}',
+        ]
+        families = (
+            ("channel_manager_priority_queue_depth", "gauge", (("", "depth"),)),
+            (
+                "channel_manager_priority_queue_wait_seconds",
+                "summary",
+                (("_sum", "total_wait"), ("_count", "started")),
+            ),
+            ("channel_manager_priority_queue_wait_max_seconds", "gauge", (("", "max_wait"),)),
+        )
+        for name, kind, samples in families:
+            lines.append(f"# TYPE {name} {kind}")
+            for priority, stats in priority_stats.items():
+                for suffix, key in samples:
+                    lines.append(f'{name}{suffix}{{priority="{priority}"}} {stats[key]}')
+        return lines
+
+    def _render_node(self) -> List[str]:
+        """Get the metrics of the supervised nodes."""
+        channel_monitor = self.context.behaviours.channel_monitor
+        router = self.context.handlers.channel_handler.router
+        routes = router.stats() if router is not None else []
+        families = (
+            ("raiden_node_restarts_total", "counter"),
+            ("raiden_node_ready", "gauge"),
+            ("raiden_node_in_flight_calls", "gauge"),
+            ("raiden_node_calls_total", "counter"),
+            ("raiden_node_channels", "gauge"),
+        )
+        samples = {name: [] for name, _ in families}  # type: Dict[str, List[str]]
+        for node in channel_monitor.nodes:
+            label = f'{{node="{node.index}"}}'
+            samples["raiden_node_restarts_total"].append(f"{label} {node.restarts}")
+            samples["raiden_node_ready"].append(
+                f"{label} {int(channel_monitor.is_ready(node.index))}"
+            )
+            if node.index < len(routes):
+                in_flight, calls, channels = routes[node.index]
+                samples["raiden_node_in_flight_calls"].append(f"{label} {in_flight}")
+                samples["raiden_node_calls_total"].append(f"{label} {calls}")
+                samples["raiden_node_channels"].append(f"{label} {channels}")
+        lines = []  # type: List[str]
+        for name, kind in families:
+            lines.append(f"# TYPE {name} {kind}")
+            lines.extend(f"{name}{sample}" for sample in samples[name])
+        return lines
+
+    def _render_dialogues(self) -> List[str]:
+        """Get the metrics of the terminal raiden dialogues."""
+        raiden_dialogues = self.context.raiden_dialogues
+        return [
+            "# TYPE raiden_terminal_dialogues gauge",
+            f"raiden_terminal_dialogues {raiden_dialogues.terminal_dialogues}",
+            "# TYPE raiden_dialogues_evicted_total counter",
+            f"raiden_dialogues_evicted_total {raiden_dialogues.evicted_dialogues}",
+        ]
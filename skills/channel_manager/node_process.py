@@ -0,0 +1,161 @@
+"""This module contains the process handle of the supervised Raiden node."""
+
+import json
+import os
+import signal
+import subprocess
+import time
+from typing import List, Optional
+
+
+PROCESS_POLL_INTERVAL = 0.1  # time in seconds
+
+
+class RaidenNodeProcess:
+    """
+    A Raiden node process, either spawned by the skill or reattached through its pid file.
+
+    The pid file records the pid and API address of the node we spawned, so a
+    restarted agent can pick up a node that is still running instead of
+    killing it and re-syncing from scratch.
+    """
+
+    def __init__(
+        self,
+        pid: int,
+        api_address: str,
+        pid_file: str,
+        popen: Optional[subprocess.Popen] = None,
+    ) -> None:
+        """
+        Initialize the process handle.
+
+        :param pid: the pid of the node
+        :param api_address: the host:port the node's API listens on
+        :param pid_file: the path of the pid file
+        :param popen: the Popen object if we spawned the node ourselves
+        """
+        self.pid = pid
+        self.api_address = api_address
+        self.pid_file = pid_file
+        self._popen = popen
+
+    @classmethod
+    def spawn(
+        cls, command: List[str], api_address: str, pid_file: str
+    ) -> "RaidenNodeProcess":
+        """
+        Start a node in its own session and record it in the pid file.
+
+        The node does not share the agent's process group, so it survives an
+        agent restart and can be reattached.
+        """
+        popen = subprocess.Popen(command, start_new_session=True)
+        node = cls(popen.pid, api_address, pid_file, popen)
+        node._write_pid_file()
+        return node
+
+    @classmethod
+    def attach(cls, api_address: str, pid_file: str) -> Optional["RaidenNodeProcess"]:
+        """
+        Get the node recorded in the pid file if it still runs on `api_address`.
+
+        :return: the node, or None if there is nothing to reattach to
+        """
+        try:
+            with open(pid_file, "r") as f:
+                recorded = json.load(f)
+            pid = int(recorded["pid"])
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+        if recorded.get("api_address") != api_address:
+            return None
+        node = cls(pid, api_address, pid_file)
+        if not node.is_alive() or not node._is_raiden():
+            return None
+        return node
+
+    @property
+    def returncode(self) -> Optional[int]:
+        """Get the exit code of a node we spawned, None while it runs or if reattached."""
+        return self._popen.returncode if self._popen is not None else None
+
+    def is_alive(self) -> bool:
+        """Check whether the node process is still running."""
+        if self._popen is not None:
+            return self._popen.poll() is None
+        try:
+            os.kill(self.pid, 0)
+        except ProcessLookupError:
+            return False
+        except PermissionError:
+            return True
+        return not self._is_zombie()
+
+    def stop(self, timeout: float) -> None:
+        """
+        Stop the node gracefully so its state database is not corrupted.
+
+        Sends SIGTERM and escalates to SIGKILL only if the node has not exited
+        within `timeout` seconds.
+        """
+        if self.is_alive():
+            self._signal(signal.SIGTERM)
+            if not self._wait(timeout):
+                self._signal(signal.SIGKILL)
+                self._wait(timeout)
+        self._remove_pid_file()
+
+    def _signal(self, signum: int) -> None:
+        """Send a signal to the node."""
+        try:
+            os.kill(self.pid, signum)
+        except ProcessLookupError:
+            pass
+
+    def _wait(self, timeout: float) -> bool:
+        """Wait for the node to exit, return whether it did."""
+        if self._popen is not None:
+            try:
+                self._popen.wait(timeout)
+            except subprocess.TimeoutExpired:
+                return False
+            return True
+        deadline = time.monotonic() + timeout
+        while self.is_alive():
+            if time.monotonic() > deadline:
+                return False
+            time.sleep(PROCESS_POLL_INTERVAL)
+        return True
+
+    def _is_raiden(self) -> bool:
+        """Check that the pid still belongs to a Raiden node and was not reused."""
+        try:
+            with open(f"/proc/{self.pid}/cmdline", "rb") as f:
+                cmdline = f.read()
+        except OSError:
+            # no procfs, trust the pid file
+            return True
+        return b"raiden" in cmdline
+
+    def _is_zombie(self) -> bool:
+        """Check whether the process exited but was not reaped by its parent."""
+        try:
+            with open(f"/proc/{self.pid}/stat", "r") as f:
+                stat = f.read()
+        except OSError:
+            return False
+        # the state follows the parenthesised command name
+        return stat.rsplit(")", 1)[-1].split()[0] == "Z"
+
+    def _write_pid_file(self) -> None:
+        """Record the node in the pid file."""
+        with open(self.pid_file, "w") as f:
+            json.dump({"pid": self.pid, "api_address": self.api_address}, f)
+
+    def _remove_pid_file(self) -> None:
+        """Remove the pid file of the node."""
+        try:
+            os.remove(self.pid_file)
+        except OSError:
+            pass
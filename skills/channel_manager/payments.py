@@ -0,0 +1,69 @@
+"""This module contains the persisted cursor over the node's payment events."""
+
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+DEFAULT_PAGE_SIZE = 100
+EVENT_PAYMENT_RECEIVED_SUCCESS = "EventPaymentReceivedSuccess"
+
+
+class PaymentCursor:
+    """
+    The position up to which the node's payment events were processed.
+
+    The node lists payment events in the order they happened, so the number
+    of events processed so far is the offset of the first new one. The cursor
+    is kept in a file to survive agent restarts.
+    """
+
+    def __init__(self, path: str) -> None:
+        """
+        Initialize the cursor.
+
+        :param path: the file the cursor is persisted in
+        """
+        self.path = path
+        self.offset = None  # type: Optional[int]
+
+    def load(self) -> Optional[int]:
+        """Load the persisted offset, None if there is none yet."""
+        try:
+            with open(self.path, "r") as f:
+                self.offset = int(json.load(f)["offset"])
+        except (OSError, ValueError, KeyError, TypeError):
+            self.offset = None
+        return self.offset
+
+    def save(self, offset: int) -> None:
+        """Persist a new offset, atomically replacing the previous one."""
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"offset": offset}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self.path)
+        self.offset = offset
+
+
+def fetch_payments(
+    raiden: Any, offset: int, page_size: int = DEFAULT_PAGE_SIZE
+) -> Tuple[int, List[Dict[str, Any]]]:
+    """
+    Get the payments received after `offset`, one page at a time.
+
+    :param raiden: the Raiden API client
+    :param offset: the number of payment events already processed
+    :param page_size: the number of events requested per call
+    :return: the offset after the last event and the received payments
+    """
+    received = []  # type: List[Dict[str, Any]]
+    while True:
+        page = raiden.get_payments(limit=page_size, offset=offset)
+        offset += len(page)
+        received.extend(
+            event for event in page if event.get("event") == EVENT_PAYMENT_RECEIVED_SUCCESS
+        )
+        if len(page) < page_size:
+            return offset, received
@@ -0,0 +1,350 @@
+# -*- coding: utf-8 -*-
+# ------------------------------------------------------------------------------
+#
+#   Copyright 2018-2019 Fetch.AI Limited
+#
+#   Licensed under the Apache License, Version 2.0 (the "License");
+#   you may not use this file except in compliance with the License.
+#   You may obtain a copy of the License at
+#
+#       http://www.apache.org/licenses/LICENSE-2.0
+#
+#   Unless required by applicable law or agreed to in writing, software
+#   distributed under the License is distributed on an "AS IS" BASIS,
+#   WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#   See the License for the specific language governing permissions and
+#   limitations under the License.
+#
+# ------------------------------------------------------------------------------
+
+"""This module contains the shared Raiden REST client of the channel manager."""
+
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+import requests
+from aea.skills.base import Model
+from raiden_api_client import RaidenAPIWrapper
+from raiden_api_client.exceptions import InvalidInput
+from requests.adapters import HTTPAdapter
+from packages.brainbot.skills.channel_manager.metrics import Histogram
+
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 5001
+DEFAULT_NODE_COUNT = 1
+DEFAULT_API_VERSION = "v1"
+DEFAULT_POOL_SIZE = 8
+DEFAULT_CONNECT_TIMEOUT = 3.0  # time in seconds
+DEFAULT_READ_TIMEOUT = 30.0  # time in seconds
+DEFAULT_TRANSACTION_TIMEOUT = 600.0  # time in seconds
+DEFAULT_SETTLE_TIMEOUT = 500  # time in blocks
+
+
+class EndpointLatency:
+    """Call count, error count and latency of one Raiden API endpoint."""
+
+    __slots__ = ("calls", "errors", "total", "max", "histogram")
+
+    def __init__(self) -> None:
+        """Initialize the counters."""
+        self.calls = 0
+        self.errors = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.histogram = Histogram()
+
+    def record(self, elapsed: float, failed: bool) -> None:
+        """Record one call."""
+        self.calls += 1
+        self.total += elapsed
+        self.histogram.observe(elapsed)
+        if elapsed > self.max:
+            self.max = elapsed
+        if failed:
+            self.errors += 1
+
+    def as_dict(self) -> Dict[str, float]:
+        """Get the counters as a dictionary."""
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "total": self.total,
+            "avg": self.total / self.calls if self.calls else 0.0,
+            "max": self.max,
+        }
+
+
+class RaidenNodeClient(RaidenAPIWrapper):
+    """
+    The REST client of one Raiden node.
+
+    Requests go through one keep-alive session with a bounded connection pool,
+    every request has a connect and a read timeout, and the latency of each
+    endpoint is counted.
+    """
+
+    def __init__(
+        self,
+        host: str = DEFAULT_HOST,
+        port: int = DEFAULT_PORT,
+        api_version: str = DEFAULT_API_VERSION,
+        pool_size: int = DEFAULT_POOL_SIZE,
+        connect_timeout: float = DEFAULT_CONNECT_TIMEOUT,
+        read_timeout: float = DEFAULT_READ_TIMEOUT,
+        transaction_timeout: float = DEFAULT_TRANSACTION_TIMEOUT,
+    ) -> None:
+        """
+        Initialize the client.
+
+        :param host: the host of the node's API
+        :param port: the port of the node's API
+        :param api_version: the version of the node's API
+        :param pool_size: the most connections kept open to the node
+        :param connect_timeout: the connect timeout in seconds
+        :param read_timeout: the read timeout in seconds of queries
+        :param transaction_timeout: the read timeout in seconds of calls that send transactions
+        """
+        self.host = host
+        self.port = port
+        self.pool_size = pool_size
+        self.connect_timeout = connect_timeout
+        self.read_timeout = read_timeout
+        self.transaction_timeout = transaction_timeout
+        RaidenAPIWrapper.__init__(self, ip=host, port=port, version=api_version)
+
+        self._session = self._new_session()
+        self._latency_lock = threading.Lock()
+        self._latency = {}  # type: Dict[str, EndpointLatency]
+
+    def _new_session(self) -> requests.Session:
+        """Create a keep-alive session with a pool of `pool_size` connections."""
+        session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=self.pool_size)
+        session.mount("http://", adapter)
+        session.mount("https://", adapter)
+        session.headers.update(self.headers)
+        return session
+
+    def close(self) -> None:
+        """Close the pooled connections."""
+        self._session.close()
+
+    def latency_stats(self) -> Dict[str, Dict[str, float]]:
+        """Get the call counters and latency of every endpoint called so far."""
+        with self._latency_lock:
+            return {name: latency.as_dict() for name, latency in self._latency.items()}
+
+    def latency_histograms(self) -> Dict[str, Histogram]:
+        """Get a snapshot of the latency histogram of every endpoint called so far."""
+        with self._latency_lock:
+            return {name: latency.histogram.copy() for name, latency in self._latency.items()}
+
+    def _request(
+        self,
+        endpoint: str,
+        method: str,
+        path: str,
+        timeout: Optional[float] = None,
+        **kwargs: Any,
+    ) -> Any:
+        """
+        Send a request to the node and decode its response.
+
+        :param endpoint: the name the latency is counted under
+        :param method: the HTTP method
+        :param path: the path below the API root
+        :param timeout: the read timeout, defaults to `read_timeout`
+        :return: the decoded response
+        """
+        timeouts = (
+            self.connect_timeout,
+            timeout if timeout is not None else self.read_timeout,
+        )  # type: Tuple[float, float]
+        failed = True
+        start = time.perf_counter()
+        try:
+            response = self._session.request(
+                method, f"{self.api}{path}", timeout=timeouts, **kwargs
+            )
+            result = self._handle_response(response)
+            failed = False
+            return result
+        finally:
+            elapsed = time.perf_counter() - start
+            with self._latency_lock:
+                latency = self._latency.get(endpoint)
+                if latency is None:
+                    latency = self._latency[endpoint] = EndpointLatency()
+                latency.record(elapsed, failed)
+
+    def get_channels(self, token=None, partner=None):  # type: ignore
+        """Get our channels, or the channel with `partner` if both are given."""
+        if token and partner:
+            return self._request("get_channels", "GET", f"channels/{token}/{partner}")
+        if partner:
+            raise InvalidInput
+        if token:
+            return self._request("get_channels", "GET", f"channels/{token}")
+        return self._request("get_channels", "GET", "channels")
+
+    def get_token_network(self, token=None):  # type: ignore
+        """Get the registered tokens, or the token network of `token`."""
+        path = f"tokens/{token}" if token else "tokens"
+        return self._request("get_token_network", "GET", path)
+
+    def get_raiden_version(self):  # type: ignore
+        """Get the version of the node."""
+        return self._request("get_raiden_version", "GET", "version")
+
+    def get_address(self):  # type: ignore
+        """Get the address of the node."""
+        return self._request("get_address", "GET", "address")
+
+    def get_payments(self, partner=None, token=None, limit=None, offset=None):  # type: ignore
+        """Get the payment events of the node, optionally one page of them."""
+        params = {}  # type: Dict[str, int]
+        if limit is not None:
+            params["limit"] = limit
+        if offset is not None:
+            params["offset"] = offset
+        if token and partner:
+            return self._request(
+                "get_payments", "GET", f"payments/{token}/{partner}", params=params
+            )
+        if partner or token:
+            raise InvalidInput
+        return self._request("get_payments", "GET", "payments", params=params)
+
+    def get_pending_transfer(self, token=None, partner=None):  # type: ignore
+        """Get the pending transfers of the node."""
+        if token and partner:
+            path = f"pending_transfers/{token}/{partner}"
+        elif partner:
+            raise InvalidInput
+        elif token:
+            path = f"pending_transfers/{token}"
+        else:
+            path = "pending_transfers"
+        return self._request("get_pending_transfer", "GET", path)
+
+    def get_connections(self):  # type: ignore
+        """Get the token network connections of the node."""
+        return self._request("get_connections", "GET", "connections")
+
+    def get_node_status(self, timeout=None):  # type: ignore
+        """Get the status of the node, optionally with a shorter read timeout."""
+        return self._request("get_node_status", "GET", "status", timeout=timeout)
+
+    def leave_token_network(self, token):  # type: ignore
+        """Close all channels in the token network of `token`."""
+        return self._request(
+            "leave_token_network",
+            "DELETE",
+            f"connections/{token}",
+            timeout=self.transaction_timeout,
+        )
+
+    def register_token(self, token):  # type: ignore
+        """Register a token network."""
+        return self._request(
+            "register_token", "PUT", f"tokens/{token}", timeout=self.transaction_timeout
+        )
+
+    def open_channel(self, partner, token, deposit, settle_timeout=DEFAULT_SETTLE_TIMEOUT):  # type: ignore
+        """Open a channel with `partner` and deposit `deposit` into it."""
+        json_data = {
+            "partner_address": partner,
+            "settle_timeout": settle_timeout,
+            "token_address": token,
+            "total_deposit": deposit,
+        }
+        return self._request(
+            "open_channel",
+            "PUT",
+            "channels",
+            timeout=self.transaction_timeout,
+            json=json_data,
+        )
+
+    def fund_channel(self, partner, token, deposit):  # type: ignore
+        """Raise the total deposit of the channel with `partner` to `deposit`."""
+        return self._request(
+            "fund_channel",
+            "PATCH",
+            f"channels/{token}/{partner}",
+            timeout=self.transaction_timeout,
+            json={"total_deposit": deposit},
+        )
+
+    def close_channel(self, partner, token):  # type: ignore
+        """Close the channel with `partner`."""
+        return self._request(
+            "close_channel",
+            "PATCH",
+            f"channels/{token}/{partner}",
+            timeout=self.transaction_timeout,
+            json={"state": "closed"},
+        )
+
+    def transfer(self, partner, token, amount, identifier=None):  # type: ignore
+        """Pay `amount` of `token` to `partner`."""
+        json_data = {"amount": amount}  # type: Dict[str, Any]
+        if identifier:
+            json_data["identifier"] = identifier
+        return self._request(
+            "transfer",
+            "POST",
+            f"payments/{token}/{partner}",
+            timeout=self.transaction_timeout,
+            json=json_data,
+        )
+
+    def mint_tokens(self, receiver, token, amount):  # type: ignore
+        """Mint test tokens for `receiver`."""
+        return self._request(
+            "mint_tokens",
+            "POST",
+            f"_testing/tokens/{token}/mint",
+            timeout=self.transaction_timeout,
+            json={"to": receiver, "value": amount},
+        )
+
+
+class RaidenClient(Model, RaidenNodeClient):
+    """
+    The Raiden REST clients shared by all components of the skill.
+
+    The model is the client of the first node. With `node_count` nodes the
+    API of node `i` listens on `port + i`, `nodes` holds the client of every
+    node, the model first.
+    """
+
+    def __init__(self, **kwargs: Any) -> None:
+        """Initialize the clients."""
+        host = kwargs.pop("host", DEFAULT_HOST)
+        port = int(kwargs.pop("port", DEFAULT_PORT))
+        node_count = int(kwargs.pop("node_count", DEFAULT_NODE_COUNT))
+        settings = dict(
+            api_version=kwargs.pop("api_version", DEFAULT_API_VERSION),
+            pool_size=int(kwargs.pop("pool_size", DEFAULT_POOL_SIZE)),
+            connect_timeout=float(kwargs.pop("connect_timeout", DEFAULT_CONNECT_TIMEOUT)),
+            read_timeout=float(kwargs.pop("read_timeout", DEFAULT_READ_TIMEOUT)),
+            transaction_timeout=float(
+                kwargs.pop("transaction_timeout", DEFAULT_TRANSACTION_TIMEOUT)
+            ),
+        )  # type: Dict[str, Any]
+        if node_count < 1:
+            raise ValueError("node_count must be at least 1")
+        Model.__init__(self, **kwargs)
+        RaidenNodeClient.__init__(self, host, port, **settings)
+        self.nodes = [self] + [
+            RaidenNodeClient(host, port + index, **settings)
+            for index in range(1, node_count)
+        ]  # type: List[RaidenNodeClient]
+
+    def teardown(self) -> None:
+        """Close the pooled connections of every node."""
+        for node in self.nodes:
+            node.close()
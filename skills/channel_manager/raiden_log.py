@@ -0,0 +1,175 @@
+"""This module contains the incremental reader of the Raiden node's JSON log."""
+
+import json
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+
+DEFAULT_MAX_READ_BYTES = 1024 * 1024
+
+EVENT_PAYMENT_SENT = "payment_sent"
+EVENT_PAYMENT_SENT_FAILED = "payment_sent_failed"
+EVENT_PAYMENT_RECEIVED = "payment_received"
+EVENT_CHANNEL_OPENED = "channel_opened"
+EVENT_CHANNEL_CLOSED = "channel_closed"
+EVENT_ERROR = "error"
+
+# suffixes of the `_type` of serialized Raiden events and state changes
+_TYPE_EVENTS = {
+    "EventPaymentSentSuccess": EVENT_PAYMENT_SENT,
+    "EventPaymentSentFailed": EVENT_PAYMENT_SENT_FAILED,
+    "EventPaymentReceivedSuccess": EVENT_PAYMENT_RECEIVED,
+    "ContractReceiveChannelNew": EVENT_CHANNEL_OPENED,
+    "ContractReceiveChannelClosed": EVENT_CHANNEL_CLOSED,
+}
+_ERROR_LEVELS = ("error", "critical")
+# lines without any of these cannot produce an event and are not decoded
+_MARKERS = (b'"_type"', b'"error"', b'"critical"')
+
+
+class JsonLogTailer:
+    """
+    Read the lines appended to a log file since the last read.
+
+    The reader keeps its byte offset in the file, so every read costs only
+    the new bytes. A file that was replaced or truncated is detected by its
+    inode and size, the rest of the old file is drained and reading resumes
+    at the start of the new one.
+    """
+
+    def __init__(
+        self,
+        path: str,
+        from_end: bool = True,
+        max_read_bytes: int = DEFAULT_MAX_READ_BYTES,
+    ) -> None:
+        """
+        Initialize the tailer.
+
+        :param path: the path of the log file
+        :param from_end: whether to skip the content present on the first read
+        :param max_read_bytes: the maximum number of bytes consumed per read
+        """
+        self.path = path
+        self.max_read_bytes = max_read_bytes
+        self.offset = 0
+        self.rotations = 0
+        self._from_end = from_end
+        self._file = None  # type: Optional[Any]
+        self._inode = None  # type: Optional[int]
+        self._partial = b""
+
+    def read_lines(self) -> List[bytes]:
+        """Get the complete lines appended since the last read."""
+        try:
+            stat = os.stat(self.path)
+        except OSError:
+            return []
+        lines = []  # type: List[bytes]
+        if self._file is not None and (
+            stat.st_ino != self._inode or stat.st_size < self.offset
+        ):
+            if stat.st_ino != self._inode:
+                lines.extend(self._drain())
+            self._close()
+            self.rotations += 1
+        if self._file is None:
+            self._open(stat)
+        lines.extend(self._read())
+        return lines
+
+    def _open(self, stat: os.stat_result) -> None:
+        """Open the current log file."""
+        self._file = open(self.path, "rb")
+        self._inode = stat.st_ino
+        self._partial = b""
+        self.offset = 0
+        if self._from_end:
+            self.offset = self._file.seek(0, os.SEEK_END)
+            self._from_end = False
+
+    def _read(self) -> List[bytes]:
+        """Read the complete lines after the offset."""
+        return self._split(self._file.read(self.max_read_bytes))
+
+    def _drain(self) -> List[bytes]:
+        """
+        Read the rest of a rotated file to its end, however much it holds.
+
+        Its last line is kept if it is complete JSON, the rotation may have
+        come before its newline.
+        """
+        lines = []  # type: List[bytes]
+        while True:
+            chunk = self._file.read(self.max_read_bytes)
+            if not chunk:
+                break
+            lines.extend(self._split(chunk))
+        if self._partial:
+            try:
+                json.loads(self._partial)
+            except ValueError:
+                pass
+            else:
+                lines.append(self._partial)
+            self._partial = b""
+        return lines
+
+    def _split(self, chunk: bytes) -> List[bytes]:
+        """Split the lines completed by a chunk read after the offset."""
+        if not chunk:
+            return []
+        self.offset += len(chunk)
+        lines = (self._partial + chunk).split(b"\n")
+        self._partial = lines.pop()
+        return lines
+
+    def _close(self) -> None:
+        """Close the log file."""
+        if self._file is not None:
+            self._file.close()
+        self._file = None
+        self._inode = None
+        self._partial = b""
+
+    def close(self) -> None:
+        """Stop tailing the log file."""
+        self._close()
+
+
+def _find_types(value: Any) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """Yield the `_type` of every serialized object nested in a log record."""
+    if isinstance(value, dict):
+        type_ = value.get("_type")
+        if isinstance(type_, str):
+            yield type_, value
+        for item in value.values():
+            yield from _find_types(item)
+    elif isinstance(value, list):
+        for item in value:
+            yield from _find_types(item)
+
+
+def parse_events(line: bytes) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Get the events of interest in one line of the Raiden JSON log.
+
+    :param line: the log line
+    :return: (event kind, event data) pairs, empty for irrelevant or malformed lines
+    """
+    if not any(marker in line for marker in _MARKERS):
+        return []
+    try:
+        record = json.loads(line)
+    except ValueError:
+        return []
+    if not isinstance(record, dict):
+        return []
+    events = []  # type: List[Tuple[str, Dict[str, Any]]]
+    for type_, data in _find_types(record):
+        kind = _TYPE_EVENTS.get(type_.rsplit(".", 1)[-1])
+        if kind is not None:
+            events.append((kind, data))
+    if record.get("log_level") in _ERROR_LEVELS:
+        events.append((EVENT_ERROR, record))
+    return events
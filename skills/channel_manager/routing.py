@@ -0,0 +1,160 @@
+"""This module contains the routing of channel calls to the Raiden nodes of the agent."""
+
+import bisect
+import hashlib
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Tuple
+
+from packages.brainbot.skills.channel_manager.channel_state import ChannelKey, channel_key
+
+
+ROUTING_HASH = "hash"
+ROUTING_LEAST_LOADED = "least_loaded"
+ROUTING_POLICIES = (ROUTING_HASH, ROUTING_LEAST_LOADED)
+DEFAULT_ROUTING_POLICY = ROUTING_HASH
+DEFAULT_VIRTUAL_NODES = 64
+
+
+class NodeUnavailable(ValueError):
+    """The node a call has to go to is not ready."""
+
+    def __init__(self, index: int) -> None:
+        """Initialize the error."""
+        super().__init__(f"Raiden node {index} is not ready, retry later")
+        self.index = index
+
+
+def _hash(data: bytes) -> int:
+    """Get the position of `data` on the ring."""
+    return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), "big")
+
+
+class NodeRouter:
+    """
+    Routes the calls on a channel to the node that has the channel.
+
+    A channel lives on the node whose account opened it, so every call on it
+    has to go there, and fails fast while that node is not ready instead of
+    holding up the channels of the other nodes. The owners of the channels
+    the nodes report, and of those opened through the router, are known; an
+    unknown channel belongs to its node on a consistent hash ring of
+    (partner, token), so adding a node moves few channels. A new channel goes
+    to the first ready node from its ring position with the `hash` policy,
+    or to the ready node with the fewest calls in flight with the
+    `least_loaded` policy.
+    """
+
+    def __init__(
+        self,
+        node_count: int,
+        is_ready: Callable[[int], bool],
+        policy: str = DEFAULT_ROUTING_POLICY,
+        virtual_nodes: int = DEFAULT_VIRTUAL_NODES,
+    ) -> None:
+        """
+        Initialize the router.
+
+        :param node_count: the number of nodes
+        :param is_ready: tells whether the node of an index is ready
+        :param policy: how a new channel picks its node, `hash` or `least_loaded`
+        :param virtual_nodes: the points of each node on the ring
+        """
+        if policy not in ROUTING_POLICIES:
+            raise ValueError(f"Unknown routing policy {policy}, expected one of {ROUTING_POLICIES}")
+        self.node_count = node_count
+        self.policy = policy
+        self._is_ready = is_ready
+        self._lock = threading.Lock()
+        self._owners = {}  # type: Dict[ChannelKey, int]
+        self._in_flight = [0] * node_count
+        self._calls = [0] * node_count
+        ring = sorted(
+            (_hash(f"{index}:{point}".encode()), index)
+            for index in range(node_count)
+            for point in range(max(1, virtual_nodes))
+        )
+        self._ring_points = [point for point, _ in ring]
+        self._ring_nodes = [index for _, index in ring]
+
+    def _ring_walk(self, key: ChannelKey) -> Iterator[int]:
+        """Get the nodes in ring order from the position of a channel, each once."""
+        start = bisect.bisect(self._ring_points, _hash(key[0] + key[1]))
+        seen = set()
+        count = len(self._ring_nodes)
+        for offset in range(count):
+            index = self._ring_nodes[(start + offset) % count]
+            if index not in seen:
+                seen.add(index)
+                yield index
+                if len(seen) == self.node_count:
+                    return
+
+    def route(self, partner_address: Any, token_address: Any, new_channel: bool = False) -> int:
+        """
+        Get the node of a channel.
+
+        :param partner_address: the address of the channel partner
+        :param token_address: the address of the channel token
+        :param new_channel: whether the call opens the channel, so any ready node may take it
+        :return: the index of the node
+        :raises NodeUnavailable: if the node is not ready, or no node is for a new channel
+        """
+        if self.node_count == 1:
+            if not self._is_ready(0):
+                raise NodeUnavailable(0)
+            return 0
+        key = channel_key(partner_address, token_address)
+        with self._lock:
+            owner = self._owners.get(key)
+        if owner is None and new_channel:
+            ready = [index for index in self._ring_walk(key) if self._is_ready(index)]
+            if not ready:
+                raise NodeUnavailable(next(self._ring_walk(key)))
+            if self.policy == ROUTING_LEAST_LOADED:
+                # ties go to the node nearest on the ring
+                owner = min(ready, key=lambda index: self._in_flight[index])
+            else:
+                owner = ready[0]
+            with self._lock:
+                owner = self._owners.setdefault(key, owner)
+        elif owner is None:
+            owner = next(self._ring_walk(key))
+        if not self._is_ready(owner):
+            raise NodeUnavailable(owner)
+        return owner
+
+    def learn(self, index: int, channels: List[Dict[str, Any]]) -> None:
+        """
+        Record a node as the owner of the channels it reports.
+
+        :param index: the index of the node
+        :param channels: the channels as returned by the node's channels endpoint
+        """
+        owners = {
+            channel_key(channel["partner_address"], channel["token_address"]): index
+            for channel in channels
+        }
+        with self._lock:
+            self._owners.update(owners)
+
+    def acquire(self, index: int) -> None:
+        """Count a call sent to a node as in flight."""
+        with self._lock:
+            self._in_flight[index] += 1
+            self._calls[index] += 1
+
+    def release(self, index: int) -> None:
+        """Count a call of a node as done."""
+        with self._lock:
+            self._in_flight[index] -= 1
+
+    def stats(self) -> List[Tuple[int, int, int]]:
+        """Get the calls in flight, the calls sent and the channels known of every node."""
+        with self._lock:
+            channels = [0] * self.node_count
+            for index in self._owners.values():
+                channels[index] += 1
+            return [
+                (self._in_flight[index], self._calls[index], channels[index])
+                for index in range(self.node_count)
+            ]
@@ -0,0 +1,12 @@
+"""Make the packages of this repository importable as packages.brainbot for the tests."""
+
+import os
+import sys
+
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "benchmarks"))
+
+from bootstrap import register_packages  # noqa: E402
+
+
+register_packages()
@@ -0,0 +1,62 @@
+"""Tests of the pool of pre-generated Raiden node accounts."""
+
+import json
+import logging
+import os
+import time
+from concurrent.futures import Executor, Future
+from typing import Any, Callable
+
+from packages.brainbot.skills.channel_manager.accounts import (
+    AccountPool,
+    STALE_CLAIM_AGE,
+)
+
+
+class FlakyExecutor(Executor):
+    """An executor that runs calls inline and fails the first `failures` of them."""
+
+    def __init__(self, failures: int = 0) -> None:
+        """Initialize the executor."""
+        self.failures = failures
+        self.submitted = 0
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> Future:  # type: ignore
+        """Run a call, or fail it."""
+        self.submitted += 1
+        future = Future()  # type: Future
+        if self.failures:
+            self.failures -= 1
+            future.set_exception(MemoryError("scrypt"))
+        else:
+            future.set_result(
+                {"address": f"0x{self.submitted:040x}", "password": "secret", "keyfile": {}}
+            )
+        return future
+
+
+def test_failed_generation_is_logged_and_generated_again(tmp_path, caplog):
+    """A failed generation does not leave the pool short until the next take."""
+    executor = FlakyExecutor(failures=1)
+    pool = AccountPool(str(tmp_path), executor, size=2)
+    with caplog.at_level(logging.ERROR):
+        pool.fill()
+    assert "MemoryError" in caplog.text
+    assert pool.ready == 2
+    assert executor.submitted == 3
+
+
+def test_stale_claim_is_returned_to_the_pool(tmp_path, monkeypatch):
+    """An account claimed by a process that died during take is pooled again."""
+    pool = AccountPool(str(tmp_path), FlakyExecutor(), size=0)
+    account = {"address": "0x" + "11" * 20, "password": "secret", "keyfile": {}}
+    claimed_path = os.path.join(str(tmp_path), f"{account['address']}.json.4242.claimed")
+    with open(claimed_path, "w") as f:
+        json.dump(account, f)
+    # a claim in progress is left alone
+    assert pool.ready == 0
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + STALE_CLAIM_AGE + 1)
+    assert pool.take() == account
+    assert os.listdir(str(tmp_path)) == []
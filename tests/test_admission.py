@@ -0,0 +1,46 @@
+"""Tests of the admission control of the requests of the channel manager."""
+
+from packages.brainbot.skills.channel_manager.admission import AdmissionControl, TokenBucket
+
+
+def test_bucket_refills_at_its_rate_up_to_its_burst():
+    """A full bucket gives `burst` tokens at once, then one per 1/rate seconds."""
+    bucket = TokenBucket(rate=10.0, burst=2, now=0.0)
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.0
+    assert bucket.take(0.0) == 0.1
+    assert bucket.take(0.1) == 0.0
+    # a long pause does not refill beyond the burst
+    bucket.take(100.0)
+    bucket.take(100.0)
+    assert bucket.take(100.0) > 0
+
+
+def test_rate_limit_is_per_sender(monkeypatch):
+    """A sender out of tokens is told when to retry, the others are admitted."""
+    monkeypatch.setattr("time.monotonic", lambda: 0.0)
+    admission = AdmissionControl(rate=10.0, burst=1, max_in_flight=0)
+    assert admission.admit("a") is None
+    assert admission.admit("a") == 100
+    assert admission.admit("b") is None
+    assert admission.rate_limited == 1
+    assert admission.in_flight == 2
+
+
+def test_requests_in_flight_are_capped():
+    """Beyond max_in_flight a request is refused until one is released."""
+    admission = AdmissionControl(rate=0, max_in_flight=1, retry_after=50)
+    assert admission.admit("a") is None
+    assert admission.admit("b") == 50
+    admission.release()
+    assert admission.admit("b") is None
+    assert admission.overloaded == 1
+
+
+def test_least_recent_senders_are_dropped():
+    """At most max_senders buckets are kept."""
+    admission = AdmissionControl(rate=1.0, burst=1, max_in_flight=0, max_senders=1)
+    assert admission.admit("a") is None
+    assert admission.admit("b") is None
+    # the bucket of a was dropped, so it starts full again
+    assert admission.admit("a") is None
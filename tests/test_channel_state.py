@@ -0,0 +1,89 @@
+"""Tests of the channel state cache of the channel manager."""
+
+from aea.skills.base import SkillContext
+
+from packages.brainbot.skills.channel_manager.channel_state import ChannelStateStore
+
+
+PARTNER = "0x" + "11" * 20
+TOKEN = "0x" + "22" * 20
+
+
+def make_store(balance: int = 100) -> ChannelStateStore:
+    """Get a store that caches one open channel."""
+    store = ChannelStateStore(name="channel_state", skill_context=SkillContext())
+    store.load([_channel(balance)])
+    return store
+
+
+def _channel(balance: int) -> dict:
+    """Get the channel of the node's channels endpoint with our balance."""
+    return {
+        "partner_address": PARTNER,
+        "token_address": TOKEN,
+        "state": "opened",
+        "balance": str(balance),
+        "total_deposit": str(balance),
+    }
+
+
+def test_reserve_counts_transfers_in_flight():
+    """A transfer is rejected once the transfers in flight use up the balance."""
+    store = make_store(100)
+    assert store.reserve_transfer(PARTNER, TOKEN, 60)[0] is None
+    reason, version = store.reserve_transfer(PARTNER, TOKEN, 50)
+    assert reason.startswith("Insufficient capacity")
+    assert version is None
+    assert store.in_flight(PARTNER, TOKEN) == 60
+
+
+def test_complete_debits_the_reserved_channel():
+    """A successful transfer is debited, a failed one only releases its reservation."""
+    store = make_store(100)
+    _, version = store.reserve_transfer(PARTNER, TOKEN, 30)
+    store.complete_transfer(PARTNER, TOKEN, 30, True, version)
+    assert store.balance(PARTNER, TOKEN) == 70
+    _, version = store.reserve_transfer(PARTNER, TOKEN, 30)
+    store.complete_transfer(PARTNER, TOKEN, 30, False, version)
+    assert store.balance(PARTNER, TOKEN) == 70
+    assert store.in_flight(PARTNER, TOKEN) == 0
+
+
+def test_complete_after_reload_does_not_debit_twice():
+    """A channel reloaded while a transfer was in flight already reflects it."""
+    store = make_store(100)
+    _, version = store.reserve_transfer(PARTNER, TOKEN, 40)
+    store.load([_channel(60)])
+    store.complete_transfer(PARTNER, TOKEN, 40, True, version)
+    assert store.balance(PARTNER, TOKEN) == 60
+    assert store.in_flight(PARTNER, TOKEN) == 0
+    assert store.reserve_transfer(PARTNER, TOKEN, 60)[0] is None
+
+
+def test_complete_after_update_does_not_debit():
+    """A channel replaced by a channel endpoint's result is not debited either."""
+    store = make_store(100)
+    _, version = store.reserve_transfer(PARTNER, TOKEN, 40)
+    store.update_channel(_channel(60))
+    store.complete_transfer(PARTNER, TOKEN, 40, True, version)
+    assert store.balance(PARTNER, TOKEN) == 60
+
+
+def test_unknown_channel_is_left_to_the_node():
+    """A channel that is not cached is not checked and not debited."""
+    store = ChannelStateStore(name="channel_state", skill_context=SkillContext())
+    reason, version = store.reserve_transfer(PARTNER, TOKEN, 10 ** 30)
+    assert reason is None and version is None
+    store.load([_channel(100)])
+    store.complete_transfer(PARTNER, TOKEN, 10 ** 30, True, version)
+    assert store.balance(PARTNER, TOKEN) == 100
+
+
+def test_reserve_deposit_must_raise_the_total():
+    """A deposit must exceed the total deposit and the deposits pending."""
+    store = make_store(100)
+    assert store.reserve_deposit(PARTNER, TOKEN, 100) is not None
+    assert store.reserve_deposit(PARTNER, TOKEN, 150) is None
+    assert store.reserve_deposit(PARTNER, TOKEN, 120) is not None
+    store.complete_deposit(PARTNER, TOKEN, 150)
+    assert store.reserve_deposit(PARTNER, TOKEN, 120) is None
@@ -0,0 +1,38 @@
+"""Tests of the custom types of the raiden protocol."""
+
+import pytest
+
+from packages.brainbot.protocols.raiden.custom_types import Address, Amount, to_checksum_address
+
+
+# the test vectors of EIP-55
+CHECKSUMMED = (
+    "0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAed",
+    "0xfB6916095ca1df60bB79Ce92cE3Ea74c37c5d359",
+    "0xdbF03B407c01E7cD3CBea99509d93f8DDDC8C6FB",
+    "0xD1220A0cf47c7B9Be7A2E6BA89F429762e7b9aDb",
+)
+
+
+@pytest.mark.parametrize("hex_address", CHECKSUMMED)
+def test_checksum_address(hex_address):
+    """Addresses format as their EIP-55 checksummed hex and parse back."""
+    address = Address(hex_address.lower())
+    assert to_checksum_address(bytes(address)) == hex_address
+    assert str(address) == hex_address
+    assert Address(hex_address) == address
+
+
+def test_wrong_checksum_is_rejected():
+    """Mixed-case hex with a wrong checksum is not an address."""
+    with pytest.raises(ValueError):
+        Address("0x5aAeb6053F3E94C9b9A09f33669435E7Ef1BeAeD")
+
+
+def test_amount_bounds():
+    """Amounts are unsigned 256-bit integers."""
+    assert Amount("12") == 12
+    with pytest.raises(ValueError):
+        Amount(-1)
+    with pytest.raises(ValueError):
+        Amount(2 ** 256)
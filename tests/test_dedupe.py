@@ -0,0 +1,55 @@
+"""Tests of the cache of replies that answers retransmitted requests."""
+
+import pytest
+
+from packages.brainbot.skills.channel_manager.dedupe import ReplyCache
+
+
+REPLY = object()
+
+
+def test_first_copy_is_new_and_retransmissions_get_the_reply():
+    """A retransmission is absorbed while in flight and answered from the cache afterwards."""
+    cache = ReplyCache()
+    assert cache.seen("a") == (False, None)
+    assert cache.seen("a") == (True, None)
+    cache.store("a", REPLY)
+    assert cache.seen("a") == (True, REPLY)
+    assert cache.duplicates == 2
+
+
+def test_discarded_request_is_new_again():
+    """A request that got no reply may be handled again."""
+    cache = ReplyCache()
+    cache.seen("a")
+    cache.discard("a")
+    assert cache.seen("a") == (False, None)
+    assert len(cache) == 1
+
+
+def test_requests_beyond_the_window_are_new(monkeypatch):
+    """A copy arriving after the window of its reply is a new request."""
+    cache = ReplyCache(window=10.0)
+    now = [100.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    cache.seen("a")
+    cache.store("a", REPLY)
+    now[0] += 11.0
+    assert cache.seen("a") == (False, None)
+
+
+def test_oldest_requests_are_forgotten_first():
+    """At most max_entries requests are remembered."""
+    cache = ReplyCache(max_entries=2)
+    for key in ("a", "b", "c"):
+        cache.seen(key)
+        cache.store(key, REPLY)
+    assert len(cache) == 2
+    assert cache.seen("a") == (False, None)
+    assert cache.seen("c") == (True, REPLY)
+
+
+def test_max_entries_must_be_positive():
+    """A cache that remembers nothing is refused."""
+    with pytest.raises(ValueError):
+        ReplyCache(max_entries=0)
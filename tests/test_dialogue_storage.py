@@ -0,0 +1,142 @@
+"""Tests of the bounded storage of raiden dialogues and its SQLite archive."""
+
+import types
+from typing import Any, Tuple
+
+from aea.configurations.base import PublicId
+from aea.skills.base import SkillContext
+
+from packages.brainbot.protocols.raiden.message import RaidenMessage
+from packages.brainbot.skills.channel_manager.dialogues import RaidenDialogues
+
+
+PARTNER = bytes.fromhex("11" * 20)
+TOKEN = bytes.fromhex("22" * 20)
+
+
+def make_dialogues(**kwargs: Any) -> RaidenDialogues:
+    """Get the raiden dialogues of a skill without generic storage."""
+    skill = types.SimpleNamespace(
+        configuration=types.SimpleNamespace(
+            public_id=PublicId.from_str("brainbot/channel_manager:0.1.0")
+        )
+    )
+    context = SkillContext(skill=skill)
+    context.set_agent_context(types.SimpleNamespace(address="node", storage=None))
+    dialogues = RaidenDialogues(name="raiden_dialogues", skill_context=context, **kwargs)
+    dialogues.setup()
+    return dialogues
+
+
+def receive(dialogues: RaidenDialogues, reference: str, sender: str = "peer") -> Tuple[Any, RaidenMessage]:
+    """Let a transfer request arrive, get its dialogue and the request."""
+    message = RaidenMessage(
+        performative=RaidenMessage.Performative.TRANSFER,
+        dialogue_reference=(reference, ""),
+        partner_address=PARTNER,
+        token_address=TOKEN,
+        amount=1,
+    )
+    message.sender = sender
+    message.to = "node"
+    return dialogues.update(message), message
+
+
+def answer(dialogues: RaidenDialogues, reference: str, sender: str = "peer") -> RaidenMessage:
+    """Let a transfer request arrive and reply to it, which ends its dialogue."""
+    dialogue, message = receive(dialogues, reference, sender)
+    dialogue.reply(
+        performative=RaidenMessage.Performative.SUCCESS,
+        target_message=message,
+        action="transfer",
+        detail="",
+    )
+    return message
+
+
+def test_terminal_dialogues_beyond_the_bound_are_evicted_oldest_first():
+    """At most max_terminal_dialogues terminal dialogues stay in memory."""
+    dialogues = make_dialogues(max_terminal_dialogues=5)
+    messages = [answer(dialogues, str(index)) for index in range(20)]
+    assert dialogues.terminal_dialogues == 5
+    assert dialogues.evicted_dialogues == 15
+    assert dialogues.get_dialogue(messages[0]) is None
+    assert dialogues.get_dialogue(messages[-1]) is not None
+
+
+def test_a_used_terminal_dialogue_is_kept_longer():
+    """Looking a terminal dialogue up moves it to the end of the eviction order."""
+    dialogues = make_dialogues(max_terminal_dialogues=2)
+    first = answer(dialogues, "1")
+    second = answer(dialogues, "2")
+    assert dialogues.get_dialogue(first) is not None
+    answer(dialogues, "3")
+    assert dialogues.get_dialogue(first) is not None
+    assert dialogues.get_dialogue(second) is None
+
+
+def test_unused_terminal_dialogues_expire(monkeypatch):
+    """A terminal dialogue unused for the TTL is evicted on the next eviction."""
+    now = [1000.0]
+    monkeypatch.setattr("time.monotonic", lambda: now[0])
+    dialogues = make_dialogues(terminal_dialogue_ttl=10)
+    message = answer(dialogues, "1")
+    now[0] += 5.0
+    answer(dialogues, "2")
+    assert dialogues.terminal_dialogues == 2
+    now[0] += 6.0
+    answer(dialogues, "3")
+    assert dialogues.terminal_dialogues == 2
+    assert dialogues.get_dialogue(message) is None
+
+
+def test_live_dialogues_are_never_evicted():
+    """Dialogues still waiting for their reply stay whatever the bounds."""
+    dialogues = make_dialogues(max_terminal_dialogues=0, terminal_dialogue_ttl=0)
+    requests = [receive(dialogues, str(index))[1] for index in range(10)]
+    answer(dialogues, "done")
+    assert dialogues.terminal_dialogues == 0
+    assert dialogues.evicted_dialogues == 1
+    for message in requests:
+        assert dialogues.get_dialogue(message) is not None
+
+
+def test_evicted_dialogues_are_archived(tmp_path):
+    """Evicted dialogues can be queried from the archive once flushed."""
+    dialogues = make_dialogues(
+        max_terminal_dialogues=1, archive_file=str(tmp_path / "dialogues.db")
+    )
+    for index in range(4):
+        answer(dialogues, str(index), sender="alice" if index % 2 else "bob")
+    dialogues.teardown()
+    archive = dialogues.archive
+    assert archive.archived == 3
+    rows = archive.query()
+    assert len(rows) == 3
+    assert {row["end_performative"] for row in rows} == {"success"}
+    assert [row["counterparty"] for row in archive.query(counterparty="bob")] == ["bob", "bob"]
+    assert len(archive.query(limit=1)) == 1
+    terminal_at = sorted(row["terminal_at"] for row in rows)
+    assert len(archive.query(since=terminal_at[1])) == 2
+
+
+def test_restore_after_eviction():
+    """A journaled dialogue is restored whether or not it was evicted meanwhile."""
+    dialogues = make_dialogues(max_terminal_dialogues=1)
+    dialogue, request = receive(dialogues, "pending")
+    pending = dialogue.json()
+    done = answer(dialogues, "done")
+    done_json = dialogues.get_dialogue(done).json()
+    answer(dialogues, "later")
+    assert dialogues.get_dialogue(done) is None
+
+    # a terminal dialogue got its reply, there is nothing to redo
+    assert dialogues.restore(done_json) is None
+    assert dialogues.get_dialogue(done) is not None
+
+    restarted = make_dialogues(max_terminal_dialogues=1)
+    for index in range(3):
+        answer(restarted, str(index))
+    restored = restarted.restore(pending)
+    assert restored == request
+    assert restarted.get_dialogue(restored) is not None
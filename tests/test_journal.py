@@ -0,0 +1,182 @@
+"""Tests of the request journal and the reconciliation of its unfinished requests."""
+
+import pytest
+
+from packages.brainbot.skills.channel_manager.journal import (
+    EVENT_PAYMENT_SENT_FAILED,
+    EVENT_PAYMENT_SENT_SUCCESS,
+    PendingOutcome,
+    RequestJournal,
+    TRANSACTION_GRACE_PERIOD,
+    TRANSFER_GRACE_PERIOD,
+    reconcile_call,
+)
+
+
+PARTNER = "0x" + "11" * 20
+TOKEN = "0x" + "22" * 20
+
+
+class FakeRaiden:
+    """The endpoints of a Raiden node that reconciliation reads."""
+
+    def __init__(self, payments=(), pending=(), channels=()):
+        """Initialize the node state."""
+        self.payments = list(payments)
+        self.pending = list(pending)
+        self.channels = list(channels)
+
+    def get_payments(self, partner, token, limit, offset):
+        """Get a page of the payment events."""
+        return self.payments[offset : offset + limit]
+
+    def get_pending_transfer(self, token, partner):
+        """Get the pending transfers of a channel."""
+        return self.pending
+
+    def get_channels(self, token):
+        """Get the channels of a token network."""
+        return self.channels
+
+
+def _transfer(identifier=7):
+    """Get a journaled transfer call."""
+    return {
+        "method": "transfer",
+        "partner": PARTNER,
+        "token": TOKEN,
+        "amount": "5",
+        "identifier": identifier,
+    }
+
+
+def _open_channel(prior_channel=None):
+    """Get a journaled open_channel call."""
+    return {
+        "method": "open_channel",
+        "partner": PARTNER,
+        "token": TOKEN,
+        "amount": "100",
+        "settle_timeout": 500,
+        "prior_channel": prior_channel,
+    }
+
+
+def _channel(identifier="1", state="opened", total_deposit="100", settle_timeout="500"):
+    """Get a channel of the channels endpoint."""
+    return {
+        "channel_identifier": identifier,
+        "partner_address": PARTNER,
+        "token_address": TOKEN,
+        "state": state,
+        "total_deposit": total_deposit,
+        "settle_timeout": settle_timeout,
+    }
+
+
+def test_transfer_with_success_event_succeeded():
+    """A payment event of the identifier tells the outcome."""
+    event = {"event": EVENT_PAYMENT_SENT_SUCCESS, "identifier": 7}
+    raiden = FakeRaiden(payments=[{"event": "Other", "identifier": 7}] * 150 + [event])
+    assert reconcile_call(raiden, _transfer(), 0) == (True, event)
+
+
+def test_transfer_with_failed_event_failed():
+    """A failed payment event fails the call with its reason."""
+    raiden = FakeRaiden(
+        payments=[{"event": EVENT_PAYMENT_SENT_FAILED, "identifier": "7", "reason": "no route"}]
+    )
+    assert reconcile_call(raiden, _transfer(), 0) == (False, "no route")
+
+
+def test_pending_transfer_is_pending():
+    """A payment the node still routes has no outcome yet."""
+    raiden = FakeRaiden(pending=[{"payment_identifier": "7"}])
+    with pytest.raises(PendingOutcome):
+        reconcile_call(raiden, _transfer(), TRANSFER_GRACE_PERIOD * 10)
+
+
+def test_transfer_waits_while_the_channel_is_busy():
+    """Other payments pending on the channel keep a traceless payment open."""
+    raiden = FakeRaiden(pending=[{"payment_identifier": "8"}])
+    with pytest.raises(PendingOutcome):
+        reconcile_call(raiden, _transfer(), TRANSFER_GRACE_PERIOD * 10)
+
+
+def test_traceless_transfer_waits_for_the_grace_period():
+    """A payment without a trace is only taken as not sent once the node was ready long enough."""
+    raiden = FakeRaiden()
+    with pytest.raises(PendingOutcome):
+        reconcile_call(raiden, _transfer(), TRANSFER_GRACE_PERIOD - 1)
+    succeeded, reason = reconcile_call(raiden, _transfer(), TRANSFER_GRACE_PERIOD)
+    assert not succeeded
+    assert "not sent" in reason
+
+
+def test_open_channel_opened_by_the_request():
+    """A new open channel with the requested deposit and settle timeout was opened by the request."""
+    channel = _channel(identifier="2", total_deposit="150")
+    assert reconcile_call(FakeRaiden(channels=[channel]), _open_channel("1"), 0) == (True, channel)
+
+
+@pytest.mark.parametrize(
+    "channel",
+    [
+        _channel(identifier="1"),
+        _channel(identifier="2", total_deposit="50"),
+        _channel(identifier="2", settle_timeout="40"),
+        _channel(identifier="2", state="closed"),
+    ],
+)
+def test_open_channel_not_opened_by_the_request(channel):
+    """A channel there before the request, or unlike it, is not its outcome."""
+    raiden = FakeRaiden(channels=[channel])
+    with pytest.raises(PendingOutcome):
+        reconcile_call(raiden, _open_channel("1"), 0)
+    succeeded, _ = reconcile_call(raiden, _open_channel("1"), TRANSACTION_GRACE_PERIOD)
+    assert not succeeded
+
+
+def test_missing_channel_was_not_opened():
+    """Without a channel the opening failed, once the node had time to mine it."""
+    succeeded, reason = reconcile_call(FakeRaiden(), _open_channel(), TRANSACTION_GRACE_PERIOD)
+    assert not succeeded
+    assert "not opened" in reason
+
+
+def test_close_and_deposit():
+    """Closing and depositing are read from the state of the channel."""
+    close = {"method": "close_channel", "partner": PARTNER, "token": TOKEN}
+    deposit = {"method": "fund_channel", "partner": PARTNER, "token": TOKEN, "amount": "200"}
+    closed = FakeRaiden(channels=[_channel(state="closed", total_deposit="200")])
+    assert reconcile_call(closed, close, 0)[0]
+    assert reconcile_call(closed, deposit, 0)[0]
+    opened = FakeRaiden(channels=[_channel()])
+    with pytest.raises(PendingOutcome):
+        reconcile_call(opened, close, 0)
+    assert not reconcile_call(opened, deposit, TRANSACTION_GRACE_PERIOD)[0]
+
+
+def test_unknown_method_cannot_be_reconciled():
+    """Only the journaled methods are reconciled."""
+    with pytest.raises(ValueError):
+        reconcile_call(FakeRaiden(), {"method": "mint", "partner": PARTNER, "token": TOKEN}, 0)
+
+
+def test_journal_reopens_with_the_unfinished_requests(tmp_path):
+    """Requests that began and did not end are unfinished on the next open."""
+    path = str(tmp_path / "journal")
+    journal = RequestJournal(path)
+    assert journal.open() == []
+    first, durable = journal.begin({"calls": [_transfer(1)]})
+    durable.result(timeout=5)
+    second, _ = journal.begin({"calls": [_transfer(2)]})
+    journal.end(first, "success", "{}")
+    journal.close()
+    with open(path, "a") as f:
+        f.write('{"op": "end", "id"')
+    reopened = RequestJournal(path)
+    unfinished = reopened.open()
+    assert [record["id"] for record in unfinished] == [second]
+    assert reopened.begin({"calls": []})[0] == second + 1
+    reopened.close()
@@ -0,0 +1,97 @@
+"""Tests of the per-channel execution lanes of the channel manager."""
+
+from concurrent.futures import Executor
+from typing import Any, Callable, List, Tuple
+
+from packages.brainbot.skills.channel_manager.lanes import ChannelLaneScheduler
+
+
+class StepExecutor(Executor):
+    """An executor that runs the submitted calls only when told to."""
+
+    def __init__(self) -> None:
+        """Initialize the executor."""
+        self.pending = []  # type: List[Tuple[Callable, Tuple]]
+
+    def submit(self, fn: Callable, *args: Any, **kwargs: Any) -> None:  # type: ignore
+        """Queue a call."""
+        self.pending.append((fn, args))
+
+    def run_next(self) -> None:
+        """Run the oldest queued call."""
+        fn, args = self.pending.pop(0)
+        fn(*args)
+
+    def run_all(self) -> None:
+        """Run calls until none is queued."""
+        while self.pending:
+            self.run_next()
+
+
+def make_scheduler(max_active_lanes: int = 1) -> Tuple[ChannelLaneScheduler, StepExecutor]:
+    """Get a scheduler with an executor stepped by the test."""
+    executor = StepExecutor()
+    return ChannelLaneScheduler(executor, max_active_lanes, aging=60.0), executor
+
+
+def test_calls_on_a_lane_keep_their_order_whatever_their_priority():
+    """A more urgent call does not overtake an earlier call on the same channel."""
+    scheduler, executor = make_scheduler()
+    ran = []  # type: List[str]
+    scheduler.submit("a", ran.append, "first", priority=2)
+    scheduler.submit("a", ran.append, "second", priority=2)
+    scheduler.submit("a", ran.append, "urgent", priority=0)
+    executor.run_all()
+    assert ran == ["first", "second", "urgent"]
+
+
+def test_priority_picks_the_lane_that_runs_next():
+    """The lane holding the most urgent call gets the free slot first."""
+    scheduler, executor = make_scheduler()
+    ran = []  # type: List[str]
+    scheduler.submit("a", ran.append, "a1", priority=2)
+    scheduler.submit("b", ran.append, "b1", priority=2)
+    scheduler.submit("c", ran.append, "c1", priority=2)
+    scheduler.submit("c", ran.append, "c2", priority=0)
+    executor.run_all()
+    # c holds an urgent call behind c1, so the whole of c goes before b
+    assert ran == ["a1", "c1", "c2", "b1"]
+
+
+def test_lanes_run_in_parallel_up_to_the_limit():
+    """Calls on different lanes run concurrently, at most max_active_lanes at a time."""
+    scheduler, executor = make_scheduler(max_active_lanes=2)
+    for key in ("a", "b", "c"):
+        scheduler.submit(key, lambda: None)
+    assert scheduler.active_lanes == 2
+    assert len(executor.pending) == 2
+    executor.run_next()
+    assert scheduler.active_lanes == 2
+    executor.run_all()
+    assert scheduler.active_lanes == 0
+
+
+def test_failures_are_set_on_the_future():
+    """An exception of a call fails its future and the lane goes on."""
+    scheduler, executor = make_scheduler()
+
+    def fail() -> None:
+        raise ValueError("boom")
+
+    failed = scheduler.submit("a", fail)
+    succeeded = scheduler.submit("a", lambda: 42)
+    executor.run_all()
+    assert isinstance(failed.exception(), ValueError)
+    assert succeeded.result() == 42
+
+
+def test_stats_of_a_lane_are_dropped_once_it_is_empty():
+    """Only lanes with queued or running calls keep statistics."""
+    scheduler, executor = make_scheduler()
+    scheduler.submit("a", lambda: None)
+    scheduler.submit("a", lambda: None)
+    assert scheduler.stats()["a"]["depth"] == 2
+    assert scheduler.hottest_lanes()[0][0] == "a"
+    executor.run_all()
+    assert scheduler.stats() == {}
+    assert scheduler.priority_stats()[0]["started"] == 2
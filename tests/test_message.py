@@ -0,0 +1,33 @@
+"""Tests of the raiden protocol messages against protocol_specs.yaml."""
+
+import os
+
+import yaml
+
+from packages.brainbot.protocols.raiden.message import _SPEECH_ACTS, RaidenMessage
+
+
+SPEC_FILE = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "protocol_specs.yaml"
+)
+
+
+def _load_protocol() -> dict:
+    """Get the protocol part of the protocol specification."""
+    with open(SPEC_FILE, "r") as f:
+        return next(yaml.safe_load_all(f))
+
+
+def test_speech_acts_match_the_spec():
+    """The contents the messages are validated against are those of protocol_specs.yaml, in order."""
+    spec = {
+        RaidenMessage.Performative(performative): tuple((contents or {}).items())
+        for performative, contents in _load_protocol()["speech_acts"].items()
+    }
+    assert _SPEECH_ACTS == spec
+
+
+def test_protocol_id_matches_the_spec():
+    """The messages carry the protocol specification id of protocol_specs.yaml."""
+    protocol = _load_protocol()
+    assert str(RaidenMessage.protocol_specification_id) == protocol["protocol_specification_id"]
@@ -0,0 +1,44 @@
+"""Tests of the metrics of the channel manager."""
+
+import socket
+
+from aea.skills.base import SkillContext
+
+from packages.brainbot.skills.channel_manager.metrics import Histogram, SkillMetrics
+
+
+def test_histogram_buckets_are_cumulative():
+    """Every bucket counts the observations up to its bound."""
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in (0.05, 0.1, 0.5, 3.0):
+        histogram.observe(value)
+    assert histogram.render("latency", 'node="0"') == [
+        'latency_bucket{node="0",le="0.1"} 2',
+        'latency_bucket{node="0",le="1.0"} 3',
+        'latency_bucket{node="0",le="+Inf"} 4',
+        'latency_sum{node="0"} 3.65',
+        'latency_count{node="0"} 4',
+    ]
+
+
+def test_histogram_copy_is_a_snapshot():
+    """Observations after a copy do not change the copy."""
+    histogram = Histogram()
+    histogram.observe(0.2)
+    snapshot = histogram.copy()
+    histogram.observe(0.3)
+    assert snapshot.count == 1
+    assert snapshot.counts != histogram.counts
+
+
+def test_setup_runs_on_when_the_port_is_taken():
+    """A taken port leaves the skill running without the endpoint."""
+    with socket.socket() as taken:
+        taken.bind(("127.0.0.1", 0))
+        taken.listen()
+        metrics = SkillMetrics(
+            name="metrics", skill_context=SkillContext(), port=taken.getsockname()[1]
+        )
+        metrics.setup()
+    assert metrics._server is None
+    metrics.teardown()
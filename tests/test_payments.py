@@ -0,0 +1,186 @@
+"""Tests of the cursor over the payment events of the nodes and of the payment notifications."""
+
+import logging
+import types
+from typing import Any, Dict, List
+
+import pytest
+
+from packages.brainbot.skills.channel_manager.behaviours import PaymentNotificationBehaviour
+from packages.brainbot.skills.channel_manager.payments import (
+    EVENT_PAYMENT_RECEIVED_SUCCESS,
+    PaymentCursor,
+    fetch_payments,
+)
+
+
+def payment(identifier: int) -> Dict[str, Any]:
+    """Get a payment event as listed by the node."""
+    return {
+        "event": EVENT_PAYMENT_RECEIVED_SUCCESS,
+        "initiator": "0x" + "11" * 20,
+        "token_address": "0x" + "22" * 20,
+        "amount": 10 ** 18 + identifier,
+        "identifier": str(identifier),
+        "log_time": "2021-01-01T00:00:00",
+    }
+
+
+class FakeNode:
+    """A Raiden API client listing a fixed payment history."""
+
+    def __init__(self, events: List[Dict[str, Any]]) -> None:
+        """Initialize the node with its history."""
+        self.events = events
+        self.calls = []  # type: List[Any]
+
+    def get_payments(self, limit: int, offset: int) -> List[Dict[str, Any]]:
+        """Get a page of the history."""
+        self.calls.append((limit, offset))
+        return self.events[offset : offset + limit]
+
+
+class Result:
+    """The result of a task run on enqueueing."""
+
+    def __init__(self, value: Any) -> None:
+        """Initialize the result."""
+        self.value = value
+
+    def ready(self) -> bool:
+        """The task is done."""
+        return True
+
+    def get(self) -> Any:
+        """Get the return value of the task."""
+        return self.value
+
+
+class TaskManager:
+    """A task manager running the tasks on enqueueing."""
+
+    def __init__(self) -> None:
+        """Initialize the task manager."""
+        self.results = []  # type: List[Result]
+
+    def enqueue_task(self, func: Any, args: Any = ()) -> int:
+        """Run the task and keep its result."""
+        self.results.append(Result(func(*args)))
+        return len(self.results) - 1
+
+    def get_task_result(self, task_id: int) -> Result:
+        """Get the result of a task."""
+        return self.results[task_id]
+
+
+def record(notified: List[str]) -> Any:
+    """Get a notify function that records the identifiers of the notified payments."""
+
+    def notify(subscriber: str, performative: Any, **content: Any) -> None:
+        notified.append(content["identifier"])
+
+    return notify
+
+
+def make_behaviour(tmp_path: Any, node: FakeNode, notify: Any) -> PaymentNotificationBehaviour:
+    """Get the payment notification behaviour of a single node, set up."""
+    context = types.SimpleNamespace(
+        logger=logging.getLogger("payments"),
+        raiden_client=types.SimpleNamespace(nodes=[node]),
+        behaviours=types.SimpleNamespace(
+            channel_monitor=types.SimpleNamespace(is_ready=lambda index: True)
+        ),
+        handlers=types.SimpleNamespace(channel_handler=types.SimpleNamespace(notify=notify)),
+        task_manager=TaskManager(),
+    )
+    behaviour = PaymentNotificationBehaviour(
+        name="payment_notification",
+        skill_context=context,
+        cursor_file=str(tmp_path / "payments.cursor"),
+        page_size=2,
+        subscribers=["subscriber"],
+    )
+    behaviour.setup()
+    return behaviour
+
+
+def test_cursor_is_persisted_and_reloaded(tmp_path):
+    """A saved offset is loaded by a new cursor on the same file."""
+    path = str(tmp_path / "payments.cursor")
+    cursor = PaymentCursor(path)
+    assert cursor.load() is None
+    cursor.save(7)
+    cursor.save(12)
+    assert PaymentCursor(path).load() == 12
+    assert not (tmp_path / "payments.cursor.tmp").exists()
+
+
+def test_unreadable_cursor_is_no_cursor(tmp_path):
+    """A corrupted cursor file counts as no cursor."""
+    path = tmp_path / "payments.cursor"
+    path.write_text("{")
+    assert PaymentCursor(str(path)).load() is None
+
+
+def test_fetch_payments_pages_through_the_received_payments():
+    """Every page is fetched and only received payments are returned."""
+    events = [payment(1), {"event": "EventPaymentSentSuccess"}, payment(2), payment(3)]
+    node = FakeNode(events)
+    offset, received = fetch_payments(node, 0, page_size=2)
+    assert offset == 4
+    assert [event["identifier"] for event in received] == ["1", "2", "3"]
+    assert node.calls == [(2, 0), (2, 2), (2, 4)]
+    assert fetch_payments(node, 4, page_size=2) == (4, [])
+
+
+def test_history_is_skipped_without_a_cursor(tmp_path):
+    """Without a cursor file the existing payments are not notified, the later ones are."""
+    notified = []  # type: List[str]
+    node = FakeNode([payment(1), payment(2), payment(3)])
+    behaviour = make_behaviour(tmp_path, node, record(notified))
+    behaviour.act()
+    behaviour.act()
+    assert notified == []
+    assert PaymentCursor(str(tmp_path / "payments.cursor")).load() == 3
+
+    node.events.append(payment(4))
+    behaviour.act()
+    behaviour.act()
+    assert notified == ["4"]
+
+
+def test_payments_after_the_cursor_are_notified_after_a_restart(tmp_path):
+    """A restarted agent notifies the payments received since its saved cursor."""
+    PaymentCursor(str(tmp_path / "payments.cursor")).save(1)
+    notified = []  # type: List[str]
+    node = FakeNode([payment(1), payment(2), payment(3)])
+    behaviour = make_behaviour(tmp_path, node, record(notified))
+    behaviour.act()
+    behaviour.act()
+    assert notified == ["2", "3"]
+
+
+def test_cursor_advances_only_after_the_notifications_are_queued(tmp_path):
+    """Payments whose notification failed are fetched and notified again."""
+    path = str(tmp_path / "payments.cursor")
+    PaymentCursor(path).save(0)
+    notified = []  # type: List[str]
+    failing = [True]
+
+    def notify(subscriber: str, performative: Any, **content: Any) -> None:
+        assert PaymentCursor(path).load() == 0
+        if failing[0]:
+            raise RuntimeError("outbox closed")
+        notified.append(content["identifier"])
+
+    behaviour = make_behaviour(tmp_path, FakeNode([payment(1), payment(2)]), notify)
+    behaviour.act()
+    with pytest.raises(RuntimeError):
+        behaviour.act()
+    assert PaymentCursor(path).load() == 0
+
+    failing[0] = False
+    behaviour.act()
+    behaviour.act()
+    assert notified == ["1", "2"]
+    assert PaymentCursor(path).load() == 2
@@ -0,0 +1,106 @@
+"""Tests of the incremental reader of the Raiden node's JSON log."""
+
+import json
+import os
+
+from packages.brainbot.skills.channel_manager.raiden_log import (
+    EVENT_ERROR,
+    EVENT_PAYMENT_RECEIVED,
+    JsonLogTailer,
+    parse_events,
+)
+
+
+def _record(index: int) -> bytes:
+    """Get a JSON log line."""
+    return json.dumps({"event": "processed", "index": index}).encode() + b"\n"
+
+
+def _append(path: str, data: bytes) -> None:
+    """Append bytes to the log."""
+    with open(path, "ab") as f:
+        f.write(data)
+
+
+def test_from_end_skips_the_content_of_the_first_read(tmp_path):
+    """Only lines appended after the first read are returned."""
+    path = str(tmp_path / "raiden.log")
+    _append(path, _record(0))
+    tailer = JsonLogTailer(path)
+    assert tailer.read_lines() == []
+    _append(path, _record(1))
+    assert tailer.read_lines() == [_record(1)[:-1]]
+
+
+def test_from_start_reads_the_existing_content(tmp_path):
+    """Without from_end the content present on the first read is returned."""
+    path = str(tmp_path / "raiden.log")
+    _append(path, _record(0))
+    tailer = JsonLogTailer(path, from_end=False)
+    assert tailer.read_lines() == [_record(0)[:-1]]
+
+
+def test_partial_line_waits_for_its_newline(tmp_path):
+    """A line is only returned once it is complete."""
+    path = str(tmp_path / "raiden.log")
+    tailer = JsonLogTailer(path, from_end=False)
+    _append(path, b'{"event": ')
+    assert tailer.read_lines() == []
+    _append(path, b'"done"}\n')
+    assert tailer.read_lines() == [b'{"event": "done"}']
+
+
+def test_rotation_drains_the_old_file_beyond_max_read_bytes(tmp_path):
+    """Every line written before a rotation is read, however much was unread."""
+    path = str(tmp_path / "raiden.log")
+    tailer = JsonLogTailer(path, from_end=False, max_read_bytes=64)
+    _append(path, _record(0))
+    assert len(tailer.read_lines()) == 1
+    old = b"".join(_record(index) for index in range(1, 50))
+    assert len(old) > 10 * tailer.max_read_bytes
+    # the last record of the old file lost its newline to the rotation
+    _append(path, old + _record(50)[:-1])
+    os.rename(path, path + ".1")
+    _append(path, _record(51))
+
+    lines = tailer.read_lines()
+    assert lines == [_record(index)[:-1] for index in range(1, 52)]
+    assert tailer.rotations == 1
+
+
+def test_rotation_drops_an_incomplete_last_line(tmp_path):
+    """A last line of the rotated file that is not complete JSON is dropped."""
+    path = str(tmp_path / "raiden.log")
+    tailer = JsonLogTailer(path, from_end=False)
+    _append(path, _record(0) + b'{"event": "cut')
+    assert tailer.read_lines() == [_record(0)[:-1]]
+    os.rename(path, path + ".1")
+    _append(path, _record(1))
+    assert tailer.read_lines() == [_record(1)[:-1]]
+
+
+def test_truncation_restarts_at_the_beginning(tmp_path):
+    """A file truncated in place is read again from its start."""
+    path = str(tmp_path / "raiden.log")
+    tailer = JsonLogTailer(path, from_end=False)
+    _append(path, _record(0) + _record(1))
+    assert len(tailer.read_lines()) == 2
+    with open(path, "wb") as f:
+        f.write(_record(2))
+    assert tailer.read_lines() == [_record(2)[:-1]]
+    assert tailer.rotations == 1
+
+
+def test_parse_events_finds_raiden_events_and_errors():
+    """Serialized events nested in a record and error records are recognized."""
+    line = json.dumps(
+        {
+            "event": "Raiden events",
+            "log_level": "error",
+            "raiden_events": [{"_type": "raiden.transfer.events.EventPaymentReceivedSuccess"}],
+        }
+    ).encode()
+    kinds = [kind for kind, _ in parse_events(line)]
+    assert kinds == [EVENT_PAYMENT_RECEIVED, EVENT_ERROR]
+    assert parse_events(b'{"event": "irrelevant"}') == []
+    assert parse_events(b'{"_type": broken') == []
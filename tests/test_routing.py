@@ -0,0 +1,109 @@
+"""Tests of the routing of channel calls to the Raiden nodes of the agent."""
+
+from typing import Optional, Set
+
+import pytest
+
+from packages.brainbot.skills.channel_manager.routing import (
+    ROUTING_LEAST_LOADED,
+    NodeRouter,
+    NodeUnavailable,
+)
+
+
+TOKEN = bytes.fromhex("22" * 20)
+
+
+def partner(index: int) -> bytes:
+    """Get the address of a channel partner."""
+    return index.to_bytes(20, "big")
+
+
+def make_router(node_count: int, down: Optional[Set[int]] = None, **kwargs) -> NodeRouter:
+    """Get a router over nodes that are ready unless they are in `down`, which may change later."""
+    down = set() if down is None else down
+    return NodeRouter(node_count, lambda index: index not in down, **kwargs)
+
+
+def test_hash_placement_follows_the_ring():
+    """A new channel goes to the node of its ring position, the next ready one if that is down."""
+    router = make_router(3)
+    owner = router.route(partner(1), TOKEN, new_channel=True)
+    assert make_router(3).route(partner(1), TOKEN) == owner
+    assert router.route(partner(1), TOKEN) == owner
+
+    fallback = make_router(3, down={owner}).route(partner(1), TOKEN, new_channel=True)
+    assert fallback != owner
+
+
+def test_hash_placement_spreads_channels_over_the_nodes():
+    """Every node gets a share of the new channels."""
+    router = make_router(3)
+    owners = [router.route(partner(index), TOKEN, new_channel=True) for index in range(300)]
+    assert all(owners.count(index) > 50 for index in range(3))
+
+
+def test_least_loaded_placement_picks_the_node_with_fewest_calls():
+    """A new channel goes to the ready node with the fewest calls in flight."""
+    router = make_router(3, down={2}, policy=ROUTING_LEAST_LOADED)
+    router.acquire(0)
+    router.acquire(0)
+    router.acquire(1)
+    assert router.route(partner(1), TOKEN, new_channel=True) == 1
+    router.acquire(1)
+    router.acquire(1)
+    # the channel stays with its node whatever the load
+    assert router.route(partner(1), TOKEN, new_channel=True) == 1
+    assert router.route(partner(2), TOKEN, new_channel=True) == 0
+
+
+def test_learned_owner_overrides_the_ring():
+    """A channel reported by a node is routed to that node."""
+    router = make_router(3)
+    ring_owner = router.route(partner(1), TOKEN)
+    reporter = (ring_owner + 1) % 3
+    router.learn(
+        reporter,
+        [{"partner_address": "0x" + partner(1).hex(), "token_address": "0x" + TOKEN.hex()}],
+    )
+    assert router.route(partner(1), TOKEN) == reporter
+    assert router.stats()[reporter][2] == 1
+
+
+def test_unready_owner_fails_instead_of_moving_the_channel():
+    """Calls on a channel whose node is down fail fast, a new node is not tried."""
+    down = set()  # type: Set[int]
+    router = make_router(3, down)
+    owner = router.route(partner(1), TOKEN, new_channel=True)
+    down.add(owner)
+    with pytest.raises(NodeUnavailable) as error:
+        router.route(partner(1), TOKEN)
+    assert error.value.index == owner
+    with pytest.raises(NodeUnavailable):
+        router.route(partner(1), TOKEN, new_channel=True)
+
+
+def test_no_ready_node_for_a_new_channel():
+    """A new channel cannot be placed while every node is down."""
+    with pytest.raises(NodeUnavailable):
+        make_router(2, down={0, 1}).route(partner(1), TOKEN, new_channel=True)
+
+
+def test_adding_a_node_moves_a_fraction_of_the_channels():
+    """Only the channels the new node takes over change their node."""
+    before = make_router(4)
+    after = make_router(5)
+    keys = [partner(index) for index in range(2000)]
+    moved = [key for key in keys if before.route(key, TOKEN) != after.route(key, TOKEN)]
+    # a fifth of the channels on average go to the new node, and only those move
+    assert 0.1 * len(keys) < len(moved) < 0.3 * len(keys)
+    assert all(after.route(key, TOKEN) == 4 for key in moved)
+
+
+def test_in_flight_calls_are_counted():
+    """Acquired calls count until released, sent calls for good."""
+    router = make_router(2)
+    router.acquire(1)
+    router.acquire(1)
+    router.release(1)
+    assert router.stats() == [(0, 0, 0), (1, 2, 0)]
@@ -0,0 +1,147 @@
+"""Tests of the serialization of the raiden protocol."""
+
+import pytest
+from aea.mail.base_pb2 import Message as ProtobufMessage
+
+from packages.brainbot.protocols.raiden import raiden_pb2
+from packages.brainbot.protocols.raiden.custom_types import Amounts, UINT256_MAX
+from packages.brainbot.protocols.raiden.message import RaidenMessage
+from packages.brainbot.protocols.raiden.serialization import RaidenSerializer
+
+
+PARTNER = bytes.fromhex("ab" * 20)
+TOKEN = bytes.fromhex("cd" * 20)
+
+CONTENTS = [
+    (
+        RaidenMessage.Performative.OPEN_CHANNEL,
+        dict(partner_address=PARTNER, token_address=TOKEN, total_deposit=UINT256_MAX),
+    ),
+    (RaidenMessage.Performative.CLOSE_CHANNEL, dict(partner_address=PARTNER, token_address=TOKEN)),
+    (
+        RaidenMessage.Performative.DEPOSIT,
+        dict(partner_address=PARTNER, token_address=TOKEN, amount=10 ** 18),
+    ),
+    (
+        RaidenMessage.Performative.TRANSFER,
+        dict(partner_address=PARTNER, token_address=TOKEN, amount=0),
+    ),
+    (
+        RaidenMessage.Performative.BATCH_TRANSFER,
+        dict(
+            partner_addresses=(PARTNER, TOKEN),
+            token_addresses=(TOKEN, TOKEN),
+            amounts=(1, 2 ** 200),
+        ),
+    ),
+    (
+        RaidenMessage.Performative.PAYMENT_RECEIVED,
+        dict(
+            partner_address=PARTNER,
+            token_address=TOKEN,
+            amount=5,
+            identifier="42",
+            log_time="2022-05-01T12:00:00.000000",
+        ),
+    ),
+    (RaidenMessage.Performative.SUCCESS, dict(action="transfer", detail='{"amount": "1"}')),
+    (RaidenMessage.Performative.SUCCESS, dict(action="transfer")),
+    (RaidenMessage.Performative.FAILURE, dict(action="transfer", detail="")),
+    (RaidenMessage.Performative.STOP_NODE, dict()),
+]
+
+
+@pytest.mark.parametrize("performative,contents", CONTENTS)
+def test_round_trip(performative, contents):
+    """Every performative survives an encode/decode round trip."""
+    message = RaidenMessage(
+        performative=performative, dialogue_reference=("1", "2"), target=0, **contents
+    )
+    decoded = RaidenSerializer.decode(RaidenSerializer.encode(message))
+    assert decoded == message
+    for name, value in contents.items():
+        assert decoded.get(name) == value
+
+
+def test_unset_optional_detail_stays_unset():
+    """An optional content that was not set is not set after decoding."""
+    message = RaidenMessage(
+        performative=RaidenMessage.Performative.FAILURE,
+        dialogue_reference=("1", ""),
+        action="transfer",
+    )
+    assert RaidenSerializer.decode(RaidenSerializer.encode(message)).get("detail") is None
+
+
+def test_field_numbers_of_version_0_2_0():
+    """The addresses and amounts keep the field numbers of protocol version 0.2.0."""
+    fields = raiden_pb2.RaidenMessage.Transfer_Performative.DESCRIPTOR.fields_by_name
+    assert {name: field.number for name, field in fields.items()} == {
+        "legacy_partner_address": 1,
+        "legacy_token_address": 2,
+        "legacy_amount": 3,
+        "amount": 4,
+        "partner_address": 5,
+        "token_address": 6,
+    }
+
+
+def _encoded(raiden_pb: raiden_pb2.RaidenMessage) -> bytes:
+    """Wrap the content of a raiden message the way the serializer does."""
+    message_pb = ProtobufMessage()
+    message_pb.dialogue_message.dialogue_starter_reference = "1"
+    message_pb.dialogue_message.content = raiden_pb.SerializeToString()
+    return message_pb.SerializeToString()
+
+
+def test_version_0_0_1_strings_decode_into_ints_and_bytes():
+    """The hex addresses and decimal amounts of version 0.0.1 are still read."""
+    raiden_pb = raiden_pb2.RaidenMessage()
+    raiden_pb.transfer.legacy_partner_address = "0x" + PARTNER.hex()
+    raiden_pb.transfer.legacy_token_address = "0x" + TOKEN.hex()
+    raiden_pb.transfer.legacy_amount = str(10 ** 18)
+    decoded = RaidenSerializer.decode(_encoded(raiden_pb))
+    assert decoded.amount == 10 ** 18
+    assert isinstance(decoded.amount, int)
+    assert decoded.partner_address == PARTNER
+    assert decoded.token_address == TOKEN
+
+
+def test_version_0_1_0_payload_decodes():
+    """A 0.1.0 message, with amounts as integers and addresses as hex, is still read."""
+    raiden_pb = raiden_pb2.RaidenMessage()
+    batch = raiden_pb.batch_transfer
+    batch.legacy_partner_addresses.extend(["0x" + PARTNER.hex(), "0x" + TOKEN.hex()])
+    batch.legacy_token_addresses.extend(["0x" + TOKEN.hex()] * 2)
+    Amounts.encode(batch.amounts, (1, 2 ** 200))
+    decoded = RaidenSerializer.decode(_encoded(raiden_pb))
+    assert decoded.amounts == (1, 2 ** 200)
+    assert decoded.partner_addresses == (PARTNER, TOKEN)
+    assert decoded.token_addresses == (TOKEN, TOKEN)
+
+
+def test_invalid_legacy_amount_is_rejected():
+    """A legacy amount that is not a decimal string is rejected."""
+    raiden_pb = raiden_pb2.RaidenMessage()
+    raiden_pb.deposit.legacy_partner_address = "0x" + PARTNER.hex()
+    raiden_pb.deposit.legacy_token_address = "0x" + TOKEN.hex()
+    raiden_pb.deposit.legacy_amount = "-1"
+    with pytest.raises(ValueError):
+        RaidenSerializer.decode(_encoded(raiden_pb))
+
+
+def test_short_address_is_rejected():
+    """A decoded address of the wrong length is rejected."""
+    raiden_pb = raiden_pb2.RaidenMessage()
+    raiden_pb.close_channel.partner_address.value = PARTNER[:19]
+    raiden_pb.close_channel.token_address.value = TOKEN
+    with pytest.raises(ValueError):
+        RaidenSerializer.decode(_encoded(raiden_pb))
+
+
+@pytest.mark.parametrize("performative,contents", CONTENTS)
+def test_trusted_decode_builds_the_same_message(performative, contents):
+    """A trusted decode only skips the validation."""
+    message = RaidenMessage(performative=performative, dialogue_reference=("1", ""), **contents)
+    encoded = RaidenSerializer.encode(message)
+    assert RaidenSerializer.decode(encoded, trusted=True) == RaidenSerializer.decode(encoded)